@@ -0,0 +1,168 @@
+"""
+Divisão das páginas do DOU em atos (portarias, extratos, editais...).
+
+Cada ato começa com um cabeçalho em negrito: as linhas do órgão emissor,
+seguidas do título, que começa com o tipo do ato ("PORTARIA Nº 12, DE ...").
+O corpo, em fonte regular, vai até o próximo cabeçalho, inclusive nas colunas
+e páginas seguintes. As margens superior e inferior (cabeçalho e rodapé do
+jornal) não pertencem a nenhum ato.
+
+A divisão é feita em duas partes: `page_segments` roda junto com a extração de
+cada página (nos processos filhos) e só olha a própria página; `assign_acts`
+percorre as páginas em ordem e dá a cada trecho o identificador do seu ato,
+ligando os trechos que continuam o ato da página anterior.
+"""
+import re
+from collections import namedtuple
+
+from text_utils import fold_text
+
+# Trecho de uma página pertencente a um ato: palavras [start, end) de `PageContent.words`.
+# `act_id` é "<página inicial>-<ordem na página>" e é None nas margens e antes do primeiro ato.
+ActSegment = namedtuple("ActSegment", ["act_id", "start", "end", "organ", "title"])
+
+# Fração da altura da página ocupada pelo cabeçalho e pelo rodapé do jornal
+MARGIN_BAND = 0.05
+# Tipos de ato que iniciam um título no DOU (comparados sem acentos)
+ACT_TYPES = (
+    "portaria", "resolucao", "despacho", "decreto", "lei", "medida provisoria", "instrucao normativa",
+    "instrucao", "extrato", "aviso", "edital", "ato", "atos", "deliberacao", "retificacao", "republicacao",
+    "acordao", "circular", "sumula", "parecer", "alvara", "solucao de consulta", "ordem de servico",
+    "comunicado", "decisao", "mensagem", "resultado", "homologacao", "adjudicacao", "termo", "ata",
+    "convocacao", "pauta", "recomendacao", "notificacao", "intimacao", "orientacao", "emenda", "errata",
+)
+_ACT_TITLE = re.compile(rf"^(?:{'|'.join(sorted(ACT_TYPES, key=len, reverse=True))})\b")
+_BOLD_FLAG = 16
+
+# Tipos de trecho devolvidos por page_segments, antes de receberem o identificador do ato
+SEGMENT_ACT = "act"
+SEGMENT_CONTINUED = "continued"
+SEGMENT_MARGIN = "margin"
+
+
+def _line_styles(page, textpage):
+    """Retorna {(bloco, linha): (negrito, texto, y0, y1)} das linhas de texto da página."""
+    styles = {}
+    for block in page.get_text("dict", textpage=textpage)["blocks"]:
+        for line_no, line in enumerate(block.get("lines", ())):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            bold = all(span["flags"] & _BOLD_FLAG or "bold" in span["font"].lower() for span in spans)
+            text = " ".join(span["text"].strip() for span in spans)
+            styles[block["number"], line_no] = (bold, text, line["bbox"][1], line["bbox"][3])
+    return styles
+
+
+def is_act_title(text):
+    """Indica se a linha começa com um tipo de ato em maiúsculas ("PORTARIA Nº ...")."""
+    first_word = text.split(maxsplit=1)[0] if text.strip() else ""
+    return first_word.isupper() and bool(_ACT_TITLE.match(fold_text(text)))
+
+
+def _heading_acts(lines):
+    """
+    Divide um grupo de linhas em negrito, (primeira palavra, texto, bloco), nos
+    atos que ele inicia: retorna [(primeira palavra, órgão, título)]. As linhas
+    antes de cada título são o órgão emissor; as linhas seguintes do mesmo bloco
+    são o título quebrado. Um ato sem corpo deixa o cabeçalho do próximo no mesmo grupo.
+    """
+    acts = []
+    pending = []
+    title_block = None
+    for start, text, block in lines:
+        if is_act_title(text):
+            organ = " / ".join(line_text for _, line_text in pending) or None
+            acts.append([pending[0][0] if pending else start, organ, text])
+            title_block = block
+            pending = []
+        elif acts and not pending and block == title_block:
+            acts[-1][2] += " " + text
+        else:
+            pending.append((start, text))
+    return [tuple(act) for act in acts]
+
+
+def page_segments(page, textpage, words):
+    """
+    Divide as palavras de uma página (extraídas de `textpage` com get_text("words"))
+    em trechos. Retorna tuplas (tipo, início, fim, órgão, título), em que o tipo é
+    SEGMENT_ACT para um ato que começa na página, SEGMENT_CONTINUED para o corpo
+    do ato anterior e SEGMENT_MARGIN para o cabeçalho e o rodapé do jornal.
+    """
+    styles = _line_styles(page, textpage)
+    top = page.rect.y0 + page.rect.height * MARGIN_BAND
+    bottom = page.rect.y1 - page.rect.height * MARGIN_BAND
+
+    # Agrupa as palavras por linha, na ordem de leitura
+    lines = []
+    for index, word in enumerate(words):
+        key = (word[5], word[6])
+        if lines and lines[-1][0] == key:
+            lines[-1][2] = index + 1
+        else:
+            lines.append([key, index, index + 1])
+
+    segments = []
+    heading = []  # linhas em negrito ainda sem corpo: (índice da primeira palavra, texto, bloco)
+
+    def open_segment(kind, start, organ=None, title=None):
+        if segments:
+            segments[-1][2] = start
+        segments.append([kind, start, start, organ, title])
+
+    def close_heading():
+        acts = _heading_acts(heading)
+        for start, organ, title in acts:
+            open_segment(SEGMENT_ACT, start, organ, title)
+        if not acts and (not segments or segments[-1][0] == SEGMENT_MARGIN):
+            # Negrito que não é título de ato (ex.: "ANEXO I") continua o ato em curso
+            open_segment(SEGMENT_CONTINUED, heading[0][0])
+        heading.clear()
+
+    for key, start, _ in lines:
+        bold, text, y0, y1 = styles.get(key, (False, "", 0, 0))
+        if y1 <= top or y0 >= bottom:
+            if heading:
+                close_heading()
+            if not segments or segments[-1][0] != SEGMENT_MARGIN:
+                open_segment(SEGMENT_MARGIN, start)
+        elif bold:
+            heading.append((start, text, key[0]))
+        else:
+            if heading:
+                close_heading()
+            if not segments or segments[-1][0] == SEGMENT_MARGIN:
+                open_segment(SEGMENT_CONTINUED, start)
+    if heading:
+        close_heading()
+    if segments:
+        segments[-1][2] = len(words)
+    return [tuple(segment) for segment in segments]
+
+
+def assign_acts(pages):
+    """
+    Recebe as páginas em ordem, com os trechos de page_segments em `acts`, e
+    gera as páginas com a lista de ActSegment. Um trecho que continua o ato da
+    página (ou coluna) anterior recebe o mesmo identificador, órgão e título.
+    Um ato sem órgão no cabeçalho herda o órgão do ato anterior.
+    """
+    current = None
+    for page in pages:
+        if page.acts is None:
+            yield page
+            continue
+        acts = []
+        count = 0
+        for kind, start, end, organ, title in page.acts:
+            if kind == SEGMENT_ACT:
+                count += 1
+                organ = organ or (current.organ if current else None)
+                current = ActSegment(f"{page.number}-{count}", start, end, organ, title)
+                acts.append(current)
+            elif kind == SEGMENT_CONTINUED and current:
+                acts.append(current._replace(start=start, end=end))
+            else:
+                acts.append(ActSegment(None, start, end, None, None))
+        yield page._replace(acts=acts)
@@ -0,0 +1,169 @@
+"""
+Reprocessa edições passadas do DOU em um intervalo de datas e seções.
+
+Uso: python backfill.py --start 2026-01-01 --end 2026-03-31 --sections do1,do2,do3 [--workers 4]
+
+Cada edição é baixada, analisada e gravada no ReportStore, e o seu texto vai
+para o índice de busca (text_index.py). As edições já
+processadas com a mesma planilha de termos ficam registradas como checkpoints,
+então uma execução interrompida retoma de onde parou; se a planilha mudar,
+todas as edições do intervalo são analisadas novamente.
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from browser_pool import BrowserPool
+from dou_fetcher import DOUFetcher
+from edition_cache import EditionCache
+from main import (
+    OUTPUT_DIR, TERMS_FILE_ID, GoogleDriveService, download_dou_pdf_with_browser_pool, get_dou_date_str,
+    get_dou_pdf_filename,
+)
+from pdf_utils import search_terms_in_pdf
+from report_store import EDITION_DONE, EDITION_MISSING, ReportStore
+from term_matcher import TermMatcher
+from terms_loader import load_terms_matcher
+from text_index import TextIndex, index_cached_edition
+
+BACKFILL_DIR = os.path.join(OUTPUT_DIR, "backfill")
+
+
+def iter_editions(start_date, end_date, sections):
+    """Gera os pares (data, seção) do intervalo, do mais antigo para o mais recente."""
+    current = start_date
+    while current <= end_date:
+        for section in sections:
+            yield current, section
+        current += timedelta(days=1)
+
+
+def load_terms(terms_path=None):
+    """Lê a planilha de termos local ou, se não informada, a do Google Drive (com cache)."""
+    if terms_path:
+        import pandas as pd
+
+        return TermMatcher.from_dataframe(pd.read_excel(terms_path))
+    if not TERMS_FILE_ID:
+        raise ValueError("Informe --terms ou defina TERMS_FILE_ID")
+    matcher = load_terms_matcher(GoogleDriveService(), TERMS_FILE_ID)
+    if not matcher:
+        raise RuntimeError("Falha ao obter a planilha de termos do Google Drive")
+    return matcher
+
+
+def process_edition(fetcher, cache, matcher, store, edition_date, section, extraction_workers, browser_pool=None,
+                    text_index=None):
+    """
+    Baixa (ou lê do cache) e analisa uma edição; retorna a situação registrada no checkpoint.
+    Com `browser_pool`, falhas no download por HTTP são contornadas com um navegador do pool.
+    """
+    pdf_path = cache.lookup(edition_date, section)
+    if not pdf_path:
+        date_str = get_dou_date_str(edition_date)
+        download_path = os.path.join(BACKFILL_DIR, get_dou_pdf_filename(date_str, section))
+        try:
+            pdf_url = fetcher.resolve_pdf_url(edition_date, section)
+            if not pdf_url:
+                store.mark_edition_missing(edition_date.isoformat(), section, terms_version=matcher.version)
+                return EDITION_MISSING
+            fetcher.download(pdf_url, download_path)
+        except Exception as e:
+            # Falhas de rede propagam a exceção e a edição fica sem checkpoint, para ser tentada de novo
+            if not browser_pool:
+                raise
+            logging.warning(f"Falha no download por HTTP da edição {edition_date} {section} ({e}); usando o navegador")
+            page_url = fetcher.edition_page_url(edition_date, section)
+            if not download_dou_pdf_with_browser_pool(browser_pool, date_str, download_path, page_url):
+                raise RuntimeError("Falha no download pelo navegador") from e
+        pdf_path = cache.store_pdf(download_path, edition_date, section)
+    # As páginas passam uma a uma pela análise (a primeira leitura grava o arquivo auxiliar) e a
+    # indexação as lê de novo do auxiliar: nenhuma edição fica inteira na memória de um worker
+    pages = cache.iter_pages(pdf_path, workers=extraction_workers)
+    findings = search_terms_in_pdf(pdf_path, None, matcher=matcher, pages=pages)
+    if text_index:
+        # Antes do checkpoint: uma falha aqui deixa a edição pendente para a próxima execução
+        index_cached_edition(text_index, cache, pdf_path, edition_date, section, workers=extraction_workers)
+    store.append(findings, edition_date.isoformat(), section, terms_version=matcher.version)
+    return EDITION_DONE
+
+
+def run_backfill(start_date, end_date, sections, matcher, workers=2, force=False, retry_missing=False, browsers=0):
+    """
+    Processa o intervalo com no máximo `workers` edições simultâneas.
+    Com `browsers` > 0, mantém esse número de navegadores prontos para quando o HTTP falhar.
+    """
+    os.makedirs(BACKFILL_DIR, exist_ok=True)
+    store = ReportStore()
+    fetcher = DOUFetcher()
+    cache = EditionCache()
+    text_index = TextIndex()
+
+    done = {} if force else store.processed_editions(start_date.isoformat(), end_date.isoformat(), matcher.version)
+    skip = {EDITION_DONE} if retry_missing else {EDITION_DONE, EDITION_MISSING}
+    pending = [
+        (edition_date, section)
+        for edition_date, section in iter_editions(start_date, end_date, sections)
+        if done.get((edition_date.isoformat(), section)) not in skip
+    ]
+    logging.info(f"Backfill de {start_date} a {end_date} ({', '.join(sections)}): {len(pending)} edições pendentes")
+
+    # Divide os núcleos entre as edições simultâneas para não disputar CPU na extração
+    extraction_workers = max(1, (os.cpu_count() or 1) // workers)
+    summary = {EDITION_DONE: 0, EDITION_MISSING: 0, "error": 0}
+    browser_pool = BrowserPool(size=browsers).start() if browsers and pending else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    process_edition, fetcher, cache, matcher, store, edition_date, section, extraction_workers,
+                    browser_pool, text_index,
+                ): (edition_date, section)
+                for edition_date, section in pending
+            }
+            for future in as_completed(futures):
+                edition_date, section = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    logging.error(f"Erro ao processar a edição {edition_date} {section}: {e}")
+                    status = "error"
+                summary[status] += 1
+                logging.info(f"Edição {edition_date} {section}: {status}")
+    finally:
+        if browser_pool:
+            browser_pool.close()
+    logging.info(f"Backfill concluído: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="data final (AAAA-MM-DD)")
+    parser.add_argument("--sections", default="do1", help="seções separadas por vírgula (do1,do2,do3)")
+    parser.add_argument("--workers", type=int, default=2, help="edições processadas simultaneamente")
+    parser.add_argument("--terms", help="planilha de termos local (padrão: baixa do Google Drive)")
+    parser.add_argument("--force", action="store_true", help="ignora os checkpoints e reprocessa tudo")
+    parser.add_argument("--retry-missing", action="store_true", help="tenta de novo as edições não encontradas")
+    parser.add_argument("--browsers", type=int, default=0,
+                        help="navegadores mantidos prontos para quando o download por HTTP falhar (padrão: 0)")
+    args = parser.parse_args()
+
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    started = datetime.now()
+    summary = run_backfill(
+        args.start, args.end, sections, load_terms(args.terms),
+        workers=args.workers, force=args.force, retry_missing=args.retry_missing, browsers=args.browsers,
+    )
+    logging.info(f"Tempo total: {datetime.now() - started}")
+    shutil.rmtree(BACKFILL_DIR, ignore_errors=True)
+    return 1 if summary["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
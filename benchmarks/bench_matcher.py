@@ -0,0 +1,109 @@
+"""
+Benchmark do matcher de termos contra o laço original de search_terms_in_pdf.
+
+Uso: python benchmarks/bench_matcher.py [--pages 500] [--terms 5000] [--legacy-sample 50]
+
+O laço original é medido em uma amostra de páginas e extrapolado linearmente
+(o custo dele é proporcional ao número de páginas).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from term_matcher import TermMatcher
+
+WORDS = (
+    "portaria ministério saúde educação licitação pregão eletrônico contrato extrato "
+    "aditivo processo secretaria nacional federal união diário oficial resolução "
+    "decreto nomear exonerar servidor cargo comissão fundação instituto conselho "
+    "orçamento despesa empenho fornecedor objeto vigência valor global dotação "
+    "superintendência regional agência autarquia edital concurso público homologação"
+).split()
+SECTORS = ["Jurídico", "Compras", "Saúde", "Educação", "Pessoal"]
+
+
+def make_pages(n_pages, words_per_page, rng):
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_page)) + f" processo {rng.randint(10000, 99999)}"
+        for _ in range(n_pages)
+    ]
+
+
+def make_terms(n_terms, rng):
+    terms = []
+    for i in range(n_terms):
+        if i % 10 == 0:
+            # Alguns termos compostos de palavras reais, que aparecem no texto
+            terms.append(" ".join(rng.sample(WORDS, 2)))
+        else:
+            terms.append(f"{rng.choice(WORDS)} {rng.randint(10000, 99999)}")
+    return pd.DataFrame({"Setor": [rng.choice(SECTORS) for _ in terms], "Termo": terms})
+
+
+def legacy_search(pages, terms_df):
+    findings = []
+    for page_num, page_text in enumerate(pages):
+        for _, row in terms_df.iterrows():
+            term = row['Termo']
+            sector = row['Setor']
+            if term.lower() in page_text.lower():
+                findings.append((sector, term, page_num + 1))
+    return findings
+
+
+def matcher_search(pages, matcher):
+    findings = []
+    for page_num, page_text in enumerate(pages):
+        findings.extend(matcher.search_page(page_text, page_num + 1))
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--words-per-page", type=int, default=900)
+    parser.add_argument("--legacy-sample", type=int, default=50,
+                        help="páginas usadas para medir o laço original (0 = todas)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = make_pages(args.pages, args.words_per_page, rng)
+    terms_df = make_terms(args.terms, rng)
+
+    start = time.perf_counter()
+    matcher = TermMatcher.from_dataframe(terms_df)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    findings = matcher_search(pages, matcher)
+    match_time = time.perf_counter() - start
+
+    sample = args.legacy_sample or args.pages
+    sample = min(sample, args.pages)
+    start = time.perf_counter()
+    legacy_findings = legacy_search(pages[:sample], terms_df)
+    legacy_time = (time.perf_counter() - start) * args.pages / sample
+
+    # A normalização só pode acrescentar ocorrências (acentos, hifenização), nunca perdê-las
+    expected = {tuple(f[:3]) for f in findings if f[2] <= sample}
+    if not expected.issuperset(legacy_findings):
+        print("ERRO: o matcher perdeu ocorrências encontradas pelo laço original")
+        return 1
+
+    print(f"{args.pages} páginas x {args.terms} termos ({len(findings)} ocorrências)")
+    print(f"  laço original : {legacy_time:8.2f} s" + (f" (extrapolado de {sample} páginas)" if sample < args.pages else ""))
+    print(f"  matcher       : {build_time + match_time:8.2f} s (compilação {build_time:.2f} s, busca {match_time:.2f} s)")
+    print(f"  ganho         : {legacy_time / (build_time + match_time):8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Benchmark do pipeline com edições sintéticas do DOU e planilhas de termos.
+
+Uso: python benchmarks/bench_pipeline.py [--pages 100,500,1000] [--terms 100,1000,5000]
+                                         [--repeat 3] [--compare <commit ou arquivo.json>]
+
+Para cada combinação de páginas x termos mede a busca (search_terms_in_pdf),
+o pipeline em streaming (run_analysis), o destaque (highlight_terms_in_pdf),
+o PDF resumido (build_digest_pdf), o relatório (generate_report) e os envios ao GitHub e ao Drive, contra um
+servidor local que imita as duas APIs (benchmarks/standins.py). Vale o menor
+tempo entre as repetições.
+
+Os resultados ficam em benchmarks/results/<commit>.json, que é versionado: o
+arquivo entra no commit da mudança medida e serve de referência para as
+seguintes. Com --compare, cada tempo é comparado com o de outro commit e o
+benchmark falha se algum passar de --max-regression vezes o anterior.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import drive_uploader
+from digest_pdf import build_digest_pdf
+from github_utils import GitHubBatchUploader
+from pdf_utils import analyze_pdf, highlight_terms_in_pdf
+from pipeline import run_analysis
+from report_store import ReportStore
+from report_utils import generate_report
+from term_matcher import TermMatcher
+
+import standins
+import synthetic
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+# PDFs gerados ficam guardados entre execuções; gerar 1.000 páginas leva dezenas de segundos
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+
+
+def git_revision():
+    """Retorna (commit curto, há alterações não commitadas)."""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def synthetic_pdf(n_pages, seed):
+    path = os.path.join(DATA_DIR, f"dou_{n_pages}p_seed{seed}.pdf")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        started = time.perf_counter()
+        synthetic.make_dou_pdf(path + ".tmp", n_pages, random.Random(seed))
+        os.replace(path + ".tmp", path)
+        print(f"  edição sintética de {n_pages} páginas gerada em {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def best_of(repeat, fn):
+    """Executa `fn` `repeat` vezes; retorna (menor tempo, resultado da última execução)."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_case(pdf_path, n_terms, seed, repeat, server, work_dir, workers):
+    terms_df = synthetic.make_terms(n_terms, random.Random(seed + n_terms))
+    timings = {}
+
+    timings["build_matcher"], matcher = best_of(repeat, lambda: TermMatcher.from_dataframe(terms_df))
+    # search_terms_in_pdf é analyze_pdf sem as posições; medindo analyze_pdf as posições saem de graça
+    timings["search_terms_in_pdf"], (findings, highlights) = best_of(
+        repeat, lambda: analyze_pdf(pdf_path, matcher=matcher, workers=workers)
+    )
+    highlighted_path = os.path.join(work_dir, "highlighted.pdf")
+    timings["highlight_terms_in_pdf"], _ = best_of(
+        repeat, lambda: highlight_terms_in_pdf(pdf_path, findings, highlights, highlighted_path)
+    )
+    digest_path = os.path.join(work_dir, "digest.pdf")
+    timings["build_digest_pdf"], _ = best_of(
+        repeat, lambda: build_digest_pdf(highlighted_path, findings, digest_path)
+    )
+    timings["run_analysis"], _ = best_of(
+        repeat, lambda: run_analysis(pdf_path, matcher, os.path.join(work_dir, "pipeline.pdf"), workers=workers)
+    )
+
+    def report():
+        store = ReportStore(os.path.join(work_dir, f"report_{time.perf_counter_ns()}.sqlite"))
+        return generate_report(work_dir, findings, edition_date=date.today().isoformat(), store=store,
+                               terms_version=matcher.version)
+
+    timings["generate_report"], report_path = best_of(repeat, report)
+
+    def github_upload():
+        uploader = GitHubBatchUploader(repo="bench/dou", branch="main", token="bench", api_url=server.url)
+        uploader.add(highlighted_path, "PDFs/highlighted.pdf")
+        uploader.add(report_path, "Reports/search_report.xlsx")
+        return uploader.commit("benchmark")
+
+    timings["upload_github"], _ = best_of(repeat, github_upload)
+    timings["upload_drive"], _ = best_of(
+        repeat, lambda: drive_uploader.upload_to_drive(highlighted_path, folder_id="bench")
+    )
+    return {
+        "pages": None,
+        "terms": n_terms,
+        "findings": len(findings),
+        "highlighted_bytes": os.path.getsize(highlighted_path),
+        "digest_bytes": os.path.getsize(digest_path),
+        "timings": {step: round(seconds, 4) for step, seconds in timings.items()},
+    }
+
+
+def load_results(reference):
+    path = reference if os.path.exists(reference) else os.path.join(RESULTS_DIR, f"{reference}.json")
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(current, baseline, max_regression):
+    """Imprime a razão atual/anterior de cada tempo; retorna o número de regressões."""
+    previous = {(case["pages"], case["terms"]): case["timings"] for case in baseline["cases"]}
+    regressions = 0
+    print(f"\nComparação com {baseline['commit']} (limite {max_regression:.2f}x):")
+    for case in current["cases"]:
+        before = previous.get((case["pages"], case["terms"]))
+        if not before:
+            continue
+        for step, seconds in case["timings"].items():
+            if step not in before or before[step] <= 0:
+                continue
+            ratio = seconds / before[step]
+            flag = ""
+            # Tempos de milissegundos oscilam demais para serem comparados
+            if ratio > max_regression and seconds > 0.05:
+                flag = "  <-- REGRESSÃO"
+                regressions += 1
+            print(f"  {case['pages']:>5}p {case['terms']:>6}t {step:<24} {before[step]:8.3f}s -> {seconds:8.3f}s "
+                  f"({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="100,500,1000", help="tamanhos das edições (páginas)")
+    parser.add_argument("--terms", default="100,1000,5000", help="tamanhos das planilhas de termos")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por medida; vale a menor")
+    parser.add_argument("--workers", type=int, default=None, help="processos de extração (padrão: EXTRACTION_WORKERS)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", help="commit (em benchmarks/results) ou arquivo de resultados para comparar")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="razão máxima aceita entre o tempo atual e o comparado (padrão: 1,25)")
+    parser.add_argument("--no-save", action="store_true", help="não grava o arquivo de resultados")
+    args = parser.parse_args()
+
+    page_sizes = [int(n) for n in args.pages.split(",")]
+    term_sizes = [int(n) for n in args.terms.split(",")]
+    commit, dirty = git_revision()
+    results = {
+        "commit": commit + ("-dirty" if dirty else ""),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "cases": [],
+    }
+
+    with standins.StandinServer() as server, tempfile.TemporaryDirectory() as work_dir:
+        # Os envios ao Drive usam o cliente da thread atual; aqui ele aponta para o servidor local
+        drive_uploader._local.service = standins.drive_service(server.url)
+        for n_pages in page_sizes:
+            pdf_path = synthetic_pdf(n_pages, args.seed)
+            for n_terms in term_sizes:
+                print(f"{n_pages} páginas x {n_terms} termos")
+                case = run_case(pdf_path, n_terms, args.seed, args.repeat, server, work_dir, args.workers)
+                case["pages"] = n_pages
+                results["cases"].append(case)
+                for step, seconds in case["timings"].items():
+                    print(f"  {step:<24} {seconds:8.3f}s")
+                print(f"  ({case['findings']} ocorrências, PDF destacado com {case['highlighted_bytes']} bytes, "
+                      f"resumo com {case['digest_bytes']} bytes)")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResultados gravados em {path}")
+
+    if args.compare:
+        return 1 if compare(results, load_results(args.compare), args.max_regression) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark do tempo de importação a frio de main.py (python -X importtime).
+
+Uso: python benchmarks/bench_startup.py [--module main] [--runs 5] [--budget-ms 350]
+
+Importa o módulo em processos novos, usa o menor tempo entre as execuções e
+termina com erro se ele passar do orçamento ou se alguma dependência pesada
+(Selenium, pandas, googleapiclient, fitz...) for carregada já na importação.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências que só devem ser importadas nas etapas que as usam
+LAZY_MODULES = ("selenium", "pandas", "numpy", "PyPDF2", "googleapiclient", "google.oauth2", "fitz", "bs4")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def import_profile(module):
+    """Importa o módulo em um processo novo e retorna ([(cumulativo_us, nome)], módulos pesados carregados)."""
+    code = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings.append((int(match.group(2)), match.group(4), len(match.group(3))))
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="módulo importado (padrão: main)")
+    parser.add_argument("--runs", type=int, default=5, help="importações a frio; vale a mais rápida")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "350")),
+                        help="tempo máximo de importação em ms (padrão: 350 ou STARTUP_BUDGET_MS)")
+    parser.add_argument("--top", type=int, default=10, help="importações mais lentas exibidas")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        timings, loaded = import_profile(args.module)
+        total = next(us for us, name, _ in reversed(timings) if name == args.module)
+        if best is None or total < best[0]:
+            best = (total, timings, loaded)
+    total, timings, loaded = best
+
+    print(f"Importação de {args.module}: {total / 1000:.1f} ms (melhor de {args.runs}; orçamento {args.budget_ms:.0f} ms)")
+    # Só as importações diretas do módulo, para não contar o mesmo tempo duas vezes
+    top_level = sorted(((us, name) for us, name, depth in timings if depth == 2), reverse=True)
+    for us, name in top_level[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"ERRO: dependências pesadas carregadas na importação: {', '.join(loaded)}")
+        failed = True
+    if total / 1000 > args.budget_ms:
+        print(f"ERRO: importação acima do orçamento de {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
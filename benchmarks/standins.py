@@ -0,0 +1,158 @@
+"""
+Servidor HTTP local que imita as partes das APIs do GitHub (Git Data API) e do
+Google Drive (upload resumível) usadas pelos uploads, para medir os caminhos de
+envio sem rede e sem credenciais.
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.head = "c0"
+        self.commits = {"c0": "t0"}
+        self.blobs = {}
+        self.uploads = {}
+        self.files = {}
+        self.bytes_received = 0
+        # (método, caminho) de cada requisição, na ordem de chegada
+        self.requests = []
+        # Quantas atualizações de ref seguintes recebem 422, como se o branch tivesse avançado
+        self.ref_conflicts = 0
+        self.blob_content_lengths = []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        with self.state.lock:
+            self.state.bytes_received += len(body)
+            self.state.requests.append((self.command, self.path))
+        return body
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --- GitHub ---
+    def do_GET(self):
+        self._read_body()
+        if re.search(r"/git/ref/heads/", self.path):
+            return self._send(200, {"object": {"sha": self.state.head}})
+        match = re.search(r"/git/commits/(\w+)$", self.path)
+        if match and match.group(1) in self.state.commits:
+            return self._send(200, {"tree": {"sha": self.state.commits[match.group(1)]}})
+        self._send(404, {"message": "Not Found"})
+
+    def do_PATCH(self):
+        payload = json.loads(self._read_body() or b"{}")
+        if "/git/refs/heads/" in self.path:
+            if self.state.ref_conflicts:
+                self.state.ref_conflicts -= 1
+                # Outro commit chegou ao branch antes deste
+                self.state.head = f"c{uuid.uuid4().hex[:8]}"
+                self.state.commits[self.state.head] = "t0"
+                return self._send(422, {"message": "Update is not a fast forward"})
+            self.state.head = payload["sha"]
+            return self._send(200, {"object": {"sha": payload["sha"]}})
+        self._send(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/upload/drive/v3/files"):
+            return self._start_drive_upload(body)
+        payload = json.loads(body or b"{}")
+        if self.path.endswith("/git/blobs"):
+            data = base64.b64decode(payload["content"])
+            sha = hashlib.sha1(data).hexdigest()
+            self.state.blobs[sha] = data
+            self.state.blob_content_lengths.append(int(self.headers.get("Content-Length") or 0))
+            return self._send(201, {"sha": sha})
+        if self.path.endswith("/git/trees"):
+            return self._send(201, {"sha": f"t{uuid.uuid4().hex[:8]}"})
+        if self.path.endswith("/git/commits"):
+            sha = f"c{uuid.uuid4().hex[:8]}"
+            self.state.commits[sha] = payload["tree"]
+            return self._send(201, {"sha": sha})
+        self._send(404, {"message": "Not Found"})
+
+    # --- Google Drive (upload resumível) ---
+    def _start_drive_upload(self, body):
+        session = uuid.uuid4().hex
+        self.state.uploads[session] = {"metadata": json.loads(body or b"{}"), "received": 0}
+        host, port = self.server.server_address[:2]
+        self._send(200, {}, {"Location": f"http://{host}:{port}/upload/session/{session}"})
+
+    def do_PUT(self):
+        body = self._read_body()
+        match = re.search(r"/upload/session/(\w+)", self.path)
+        if not match or match.group(1) not in self.state.uploads:
+            return self._send(404, {"message": "Not Found"})
+        upload = self.state.uploads[match.group(1)]
+        upload["received"] += len(body)
+        total = re.search(r"/(\d+|\*)$", self.headers.get("Content-Range", ""))
+        if total and total.group(1) != "*" and upload["received"] >= int(total.group(1)):
+            file_id = uuid.uuid4().hex[:16]
+            self.state.files[file_id] = upload["received"]
+            return self._send(200, {"id": file_id})
+        self._send(308, None, {"Range": f"bytes=0-{upload['received'] - 1}"})
+
+
+class StandinServer:
+    """Servidor em uma thread; `url` é a raiz usada no lugar das APIs reais."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.state = _State()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def drive_service(root_url):
+    """Cliente do Drive apontado para o servidor local, a partir do documento de descoberta embutido."""
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    document = json.loads(get_static_doc("drive", "v3"))
+    document["rootUrl"] = root_url.rstrip("/") + "/"
+    document["baseUrl"] = document["rootUrl"] + document["servicePath"]
+    return build_from_document(document, credentials=AnonymousCredentials())
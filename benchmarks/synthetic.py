@@ -0,0 +1,122 @@
+"""
+Geração de edições sintéticas do DOU e de planilhas de termos para os benchmarks.
+
+As páginas imitam o layout do DOU: cabeçalho, três colunas, rodapé e atos com
+órgão emissor e título em negrito e corpo de texto em português. Tudo é determinístico
+a partir da semente do `random.Random` recebido.
+"""
+import fitz
+import pandas as pd
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 36
+COLUMN_GAP = 12
+HEADER_HEIGHT = 40
+FOOTER_HEIGHT = 24
+FOOTER = "Este documento pode ser verificado no endereço eletrônico http://www.in.gov.br/autenticidade.html"
+
+ACT_TYPES = ["PORTARIA", "RESOLUÇÃO", "DESPACHO", "EXTRATO DE CONTRATO", "AVISO DE LICITAÇÃO", "DECRETO", "EDITAL"]
+ORGANS = [
+    "MINISTÉRIO DA SAÚDE", "MINISTÉRIO DA EDUCAÇÃO", "MINISTÉRIO DA FAZENDA", "MINISTÉRIO DA JUSTIÇA",
+    "AGÊNCIA NACIONAL DE VIGILÂNCIA SANITÁRIA", "INSTITUTO NACIONAL DO SEGURO SOCIAL",
+    "FUNDAÇÃO NACIONAL DOS POVOS INDÍGENAS", "SECRETARIA DO TESOURO NACIONAL", "CONSELHO NACIONAL DE SAÚDE",
+]
+SUBUNITS = [
+    "Secretaria-Executiva", "Gabinete do Ministro", "Subsecretaria de Assuntos Administrativos",
+    "Coordenação-Geral de Licitações e Contratos", "Diretoria de Gestão de Pessoas", "Superintendência Regional",
+]
+WORDS = (
+    "portaria ministério saúde educação licitação pregão eletrônico contrato extrato aditivo processo "
+    "secretaria nacional federal união diário oficial resolução decreto nomear exonerar servidor cargo "
+    "comissão fundação instituto conselho orçamento despesa empenho fornecedor objeto vigência valor "
+    "global dotação superintendência regional agência autarquia edital concurso público homologação "
+    "considerando termos disposto artigo inciso parágrafo lei complementar regulamento competência "
+    "atribuições conferidas designar substituto função gratificada prorrogação prazo dias publicação "
+    "aquisição material consumo serviços continuados manutenção predial vigilância limpeza conservação"
+).split()
+FIRST_NAMES = ["Maria", "José", "Ana", "João", "Francisca", "Antônio", "Luíza", "Carlos", "Paulo", "Adriana"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Pereira", "Araújo", "Gonçalves", "Simões"]
+SECTORS = ["Jurídico", "Compras", "Saúde", "Educação", "Pessoal", "Financeiro"]
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def make_act(rng):
+    """Retorna (título, órgão, corpo) de um ato sintético."""
+    title = f"{rng.choice(ACT_TYPES)} Nº {rng.randint(1, 2999)}, DE {rng.randint(1, 28)} DE OUTUBRO DE 2026"
+    organ = f"{rng.choice(ORGANS)}\n{rng.choice(SUBUNITS)}"
+    sentences = []
+    for _ in range(rng.randint(3, 9)):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(12, 30))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), f"processo nº {rng.randint(10000, 99999)}.{rng.randint(100000, 999999)}/2026-{rng.randint(10, 99)}")
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), _person(rng))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return title, organ, " ".join(sentences)
+
+
+def _fill_column(page, rect, rng):
+    # Empilha atos na coluna até não caber mais nenhum
+    top = rect.y0
+    while top < rect.y1 - 30:
+        title, organ, body = make_act(rng)
+        for text, fontname, fontsize in ((organ, "hebo", 7), (title, "hebo", 7.5), (body, "helv", 7)):
+            if top >= rect.y1 - fontsize:
+                return
+            box = fitz.Rect(rect.x0, top, rect.x1, rect.y1)
+            remaining = page.insert_textbox(box, text, fontname=fontname, fontsize=fontsize, align=fitz.TEXT_ALIGN_JUSTIFY)
+            if remaining < 0:
+                return
+            top = rect.y1 - remaining + 4
+
+
+def make_dou_pdf(path, n_pages, rng, columns=3):
+    """Grava em `path` uma edição sintética com `n_pages` páginas em `columns` colunas."""
+    doc = fitz.open()
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * COLUMN_GAP) / columns
+    for number in range(1, n_pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((MARGIN, MARGIN), "DIÁRIO OFICIAL DA UNIÃO - Seção 1", fontname="hebo", fontsize=9)
+        page.insert_text((PAGE_WIDTH - MARGIN - 40, MARGIN), f"Pág. {number}", fontname="helv", fontsize=8)
+        page.insert_text((MARGIN, PAGE_HEIGHT - MARGIN + 12), FOOTER, fontname="helv", fontsize=6)
+        for column in range(columns):
+            x0 = MARGIN + column * (column_width + COLUMN_GAP)
+            column_rect = fitz.Rect(x0, MARGIN + HEADER_HEIGHT, x0 + column_width, PAGE_HEIGHT - MARGIN - FOOTER_HEIGHT)
+            _fill_column(page, column_rect, rng)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def make_terms(n_terms, rng, present_ratio=0.2):
+    """
+    DataFrame de termos (Setor, Termo). Uma parte dos termos vem do vocabulário das
+    edições (e aparece no texto, às vezes sem acento); o restante não ocorre.
+    """
+    terms = []
+    for i in range(n_terms):
+        if rng.random() < present_ratio:
+            kind = i % 4
+            if kind == 0:
+                term = " ".join(rng.sample(WORDS, 2))
+            elif kind == 1:
+                term = rng.choice(ORGANS).title()
+            elif kind == 2:
+                term = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            else:
+                # Sem acentos, como costuma ser digitado na planilha
+                term = rng.choice(WORDS).translate(str.maketrans("áâãçéêíóôõú", "aaaceeiooou"))
+        else:
+            term = f"{rng.choice(WORDS)} {rng.randint(10000, 99999)}"
+        terms.append(term)
+    return pd.DataFrame({"Setor": [rng.choice(SECTORS) for _ in terms], "Termo": terms})
+
+
+def make_terms_sheet(path, n_terms, rng, present_ratio=0.2):
+    """Grava a planilha de termos em Excel, como a do Google Drive, e retorna o DataFrame."""
+    terms_df = make_terms(n_terms, rng, present_ratio)
+    terms_df.to_excel(path, index=False)
+    return terms_df
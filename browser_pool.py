@@ -0,0 +1,197 @@
+"""
+Pool de navegadores Chromium headless reaproveitados entre downloads.
+
+Cada instância tem a sua porta de depuração e o seu diretório de download, de
+modo que vários downloads (ou vários processos) podem rodar lado a lado.
+Um navegador é emprestado com `lease()` e devolvido ao final do bloco `with`,
+já sem abas extras, cookies, armazenamento da página e downloads incompletos do
+empréstimo anterior. Antes de cada empréstimo ele passa por uma verificação de
+saúde, e é substituído por um novo depois de `max_uses` empréstimos, se deixar
+de responder ou se a limpeza falhar.
+"""
+import glob
+import logging
+import os
+import queue
+import shutil
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "20"))
+# Porta da primeira instância; as demais usam as seguintes (0 = portas livres escolhidas pelo sistema)
+BROWSER_BASE_PORT = int(os.getenv("BROWSER_BASE_PORT", "0"))
+BROWSER_DOWNLOAD_ROOT = os.getenv("BROWSER_DOWNLOAD_ROOT", os.path.join("output_files", "browsers"))
+
+# Arquivos deixados por downloads interrompidos
+PARTIAL_PATTERNS = ("*.crdownload", "*.tmp", "*.partial", "*.part")
+
+
+def free_port():
+    """Retorna uma porta TCP livre no momento da chamada."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_chrome_options(download_dir, port=None):
+    """Opções do Chromium headless com download automático de PDFs para `download_dir`."""
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Roda o navegador em modo headless
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-software-rasterizer")
+    chrome_options.add_argument("--disable-dev-tools")
+    # Porta própria por instância; a fixa 9222 impedia dois navegadores ao mesmo tempo
+    chrome_options.add_argument(f"--remote-debugging-port={port or free_port()}")
+
+    prefs = {
+        "download.default_directory": os.path.abspath(download_dir),
+        "download.prompt_for_download": False,
+        "plugins.always_open_pdf_externally": True,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    return chrome_options
+
+
+class PooledBrowser:
+    """Um Chromium do pool, com a sua porta, o seu diretório de download e o número de usos."""
+
+    def __init__(self, index, port, download_dir):
+        from selenium import webdriver
+
+        self.index = index
+        self.port = port
+        self.download_dir = download_dir
+        self.uses = 0
+        os.makedirs(download_dir, exist_ok=True)
+        started = time.time()
+        self.driver = webdriver.Chrome(options=build_chrome_options(download_dir, port))
+        logging.info(f"Navegador {index} iniciado na porta {port} em {time.time() - started:.1f}s")
+
+    def is_healthy(self):
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception as e:
+            logging.warning(f"Navegador {self.index} não responde: {e}")
+            return False
+
+    def reset(self):
+        """
+        Fecha as abas extras, apaga cookies, cache e o armazenamento da página, volta
+        para uma página em branco e remove downloads incompletos.
+        """
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        # localStorage/sessionStorage só podem ser limpos a partir da origem da página aberta
+        self.driver.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+        )
+        # Cookies de todos os domínios, não só os da página atual (delete_all_cookies)
+        self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        self.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        self.driver.get("about:blank")
+        for pattern in PARTIAL_PATTERNS:
+            for path in glob.glob(os.path.join(self.download_dir, pattern)):
+                os.remove(path)
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.warning(f"Erro ao fechar o navegador {self.index}: {e}")
+
+
+class BrowserPool:
+    """Mantém `size` navegadores prontos para empréstimo."""
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_uses=BROWSER_MAX_USES, base_port=BROWSER_BASE_PORT,
+                 download_root=BROWSER_DOWNLOAD_ROOT):
+        self.size = size
+        self.max_uses = max_uses
+        self.base_port = base_port
+        self.download_root = download_root
+        self._idle = queue.Queue()
+        self._browsers = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _launch(self, index):
+        port = self.base_port + index if self.base_port else free_port()
+        browser = PooledBrowser(index, port, os.path.join(self.download_root, f"browser_{index}"))
+        with self._lock:
+            self._browsers[index] = browser
+        return browser
+
+    def start(self):
+        """Inicia os navegadores em paralelo; a inicialização do Chromium domina o tempo."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            for browser in executor.map(self._launch, range(self.size)):
+                self._idle.put(browser)
+        return self
+
+    def _recycle(self, browser, reason):
+        logging.info(f"Reciclando o navegador {browser.index} ({reason})")
+        browser.quit()
+        return self._launch(browser.index)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Empresta um navegador saudável; ele volta ao pool ao final do bloco `with`."""
+        if self._closed:
+            raise RuntimeError("Pool de navegadores encerrado")
+        try:
+            browser = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Nenhum navegador livre em {timeout}s") from None
+        try:
+            if not browser.is_healthy():
+                browser = self._recycle(browser, "sem resposta")
+        except Exception:
+            # Sem conseguir iniciar outro, a vaga volta vazia para não travar o pool
+            self._idle.put(browser)
+            raise
+        try:
+            yield browser
+        finally:
+            browser.uses += 1
+            try:
+                if browser.uses >= self.max_uses:
+                    browser = self._recycle(browser, f"{browser.uses} usos")
+                else:
+                    try:
+                        browser.reset()
+                    except Exception as e:
+                        # Sem a limpeza, o próximo empréstimo herdaria a sessão; vai um navegador novo
+                        browser = self._recycle(browser, f"falha ao limpar a sessão: {e}")
+            except Exception as e:
+                logging.warning(f"Erro ao devolver o navegador {browser.index}: {e}")
+            self._idle.put(browser)
+
+    def close(self):
+        """Fecha todos os navegadores e remove os diretórios de download."""
+        self._closed = True
+        with self._lock:
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+        for browser in browsers:
+            browser.quit()
+        shutil.rmtree(self.download_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
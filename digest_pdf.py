@@ -0,0 +1,193 @@
+"""
+PDF resumido da edição: só as páginas com ocorrências, já destacadas, precedidas
+de um índice setor → termo → página.
+
+Os números de página do índice, dos marcadores e dos rótulos de página são os da
+edição original; cada número do índice é um link para a página no resumo. O
+arquivo é gravado com coleta de lixo e compressão, então fontes e imagens das
+páginas descartadas não vão junto.
+"""
+import logging
+import math
+import os
+
+from text_utils import fold_text
+
+# Página A4 em pontos
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+TITLE_SIZE = 14
+SECTOR_SIZE = 11
+ENTRY_SIZE = 9
+LINE_SPACING = 1.45
+TERM_INDENT = 12
+PAGES_INDENT = 24
+# Cor dos números de página com link
+LINK_COLOR = (0.05, 0.25, 0.6)
+NO_SECTOR = "Sem setor"
+
+
+def _sector_name(sector):
+    # Setor ausente, vazio ou NaN (célula vazia lida pelo pandas) fica no grupo "Sem setor"
+    if sector is None or (isinstance(sector, float) and math.isnan(sector)) or not str(sector).strip():
+        return NO_SECTOR
+    return str(sector)
+
+
+def _group_findings(findings):
+    """Retorna [(setor, [(termo, [páginas])])] em ordem alfabética, sem repetir páginas."""
+    groups = {}
+    for sector, term, page, *_ in findings:
+        groups.setdefault(_sector_name(sector), {}).setdefault(str(term), set()).add(page)
+    return [
+        (sector, [(term, sorted(groups[sector][term])) for term in sorted(groups[sector], key=fold_text)])
+        for sector in sorted(groups, key=lambda name: (name == NO_SECTOR, fold_text(name)))
+    ]
+
+
+def _fit(text, fontname, fontsize, width):
+    """Corta o texto com reticências para caber em `width` pontos."""
+    import fitz
+
+    if fitz.get_text_length(text, fontname=fontname, fontsize=fontsize) <= width:
+        return text
+    while text and fitz.get_text_length(text + "...", fontname=fontname, fontsize=fontsize) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def _index_lines(title, summary, groups):
+    """
+    Monta as linhas do índice, sem paginar: cada linha é (altura, [(x, texto, fonte,
+    tamanho, página de destino ou None)]). A página de destino é a da edição original.
+    """
+    import fitz
+
+    width = PAGE_WIDTH - 2 * MARGIN
+    lines = [
+        (TITLE_SIZE * LINE_SPACING, [(0, _fit(title, "hebo", TITLE_SIZE, width), "hebo", TITLE_SIZE, None)]),
+        (ENTRY_SIZE * LINE_SPACING * 1.5, [(0, summary, "helv", ENTRY_SIZE, None)]),
+    ]
+    for sector, terms in groups:
+        lines.append((SECTOR_SIZE * LINE_SPACING * 1.3, [(0, _fit(sector, "hebo", SECTOR_SIZE, width), "hebo",
+                                                           SECTOR_SIZE, None)]))
+        for term, pages in terms:
+            label = _fit(term, "helv", ENTRY_SIZE, width / 2 - TERM_INDENT) + ": "
+            items = [(TERM_INDENT, label, "helv", ENTRY_SIZE, None)]
+            x = TERM_INDENT + fitz.get_text_length(label, fontname="helv", fontsize=ENTRY_SIZE)
+            for position, page in enumerate(pages):
+                text = str(page) + (", " if position < len(pages) - 1 else "")
+                text_width = fitz.get_text_length(text, fontname="helv", fontsize=ENTRY_SIZE)
+                if x + text_width > width:
+                    lines.append((ENTRY_SIZE * LINE_SPACING, items))
+                    items, x = [], PAGES_INDENT
+                items.append((x, text, "helv", ENTRY_SIZE, page))
+                x += text_width
+            lines.append((ENTRY_SIZE * LINE_SPACING, items))
+    return lines
+
+
+def _paginate(lines):
+    """Distribui as linhas do índice em páginas; retorna [[(y, itens)]]."""
+    pages = [[]]
+    y = MARGIN
+    for height, items in lines:
+        if y + height > PAGE_HEIGHT - MARGIN and pages[-1]:
+            pages.append([])
+            y = MARGIN
+        y += height
+        pages[-1].append((y, items))
+    return pages
+
+
+def _draw_index_page(doc, page, index_lines, target):
+    """Escreve as linhas do índice na página e cria os links dos números de página."""
+    import fitz
+
+    links = []
+    for y, items in index_lines:
+        # Trechos seguidos com o mesmo estilo saem em uma única chamada de insert_text
+        runs = []
+        for x, text, fontname, fontsize, link_page in items:
+            style = (fontname, fontsize, link_page is not None)
+            if runs and runs[-1][0] == style:
+                runs[-1][2] += text
+            else:
+                runs.append([style, x, text])
+            if link_page is not None:
+                number_width = fitz.get_text_length(str(link_page), fontname=fontname, fontsize=fontsize)
+                links.append((fitz.Rect(MARGIN + x, y - fontsize, MARGIN + x + number_width, y + fontsize * 0.25),
+                              target[link_page]))
+        for (fontname, fontsize, is_link), x, text in runs:
+            page.insert_text((MARGIN + x, y), text, fontname=fontname, fontsize=fontsize,
+                             color=LINK_COLOR if is_link else (0, 0, 0))
+
+    # Page.insert_link procura um nome livre entre todos os links da página a cada chamada, o que fica
+    # quadrático com centenas de números por página; os objetos dos links são gravados diretamente
+    annots = []
+    for rect, target_page in links:
+        xref = doc.get_new_xref()
+        doc.update_object(
+            xref,
+            f"<</Type/Annot/Subtype/Link/BS<</W 0>>/Rect[{rect.x0:g} {PAGE_HEIGHT - rect.y1:g} {rect.x1:g} "
+            f"{PAGE_HEIGHT - rect.y0:g}]/A<</S/GoTo/D[{doc.page_xref(target_page)} 0 R/Fit]>>>>",
+        )
+        annots.append(f"{xref} 0 R")
+    if annots:
+        doc.xref_set_key(page.xref, "Annots", f"[{' '.join(annots)}]")
+
+
+def build_digest_pdf(highlighted_pdf_path, findings, output_pdf_path, title="Ocorrências"):
+    """
+    Grava em `output_pdf_path` as páginas de `highlighted_pdf_path` que têm
+    ocorrências (com os destaques), precedidas do índice. `findings` são as
+    ocorrências (Setor, Termo, Página, ...) da análise. Retorna o caminho gravado.
+    """
+    import fitz
+
+    groups = _group_findings(findings)
+    hit_pages = sorted({finding[2] for finding in findings})
+    summary = (
+        f"{len(findings)} ocorrências em {len(hit_pages)} páginas. "
+        "Os números são as páginas da edição original; clique para abrir."
+        if findings else "Nenhuma ocorrência nesta edição."
+    )
+    index_pages = _paginate(_index_lines(title, summary, groups))
+    # Posição (0-based) de cada página da edição no resumo, depois do índice
+    target = {page: len(index_pages) + position for position, page in enumerate(hit_pages)}
+
+    # Sem ocorrências, o resumo tem só o índice (select não aceita uma lista vazia)
+    doc = fitz.open(highlighted_pdf_path) if hit_pages else fitz.open()
+    try:
+        if hit_pages:
+            doc.select([page - 1 for page in hit_pages])
+        # Todas as páginas do índice são criadas antes dos links, que apontam para depois delas
+        for number in range(len(index_pages)):
+            doc.new_page(pno=number, width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        for number, index_lines in enumerate(index_pages):
+            _draw_index_page(doc, doc[number], index_lines, target)
+
+        # Marcadores setor > termo apontando para a primeira página do termo
+        toc = [[1, "Índice", 1]]
+        for sector, terms in groups:
+            toc.append([1, sector, target[terms[0][1][0]] + 1])
+            toc.extend([2, f"{term} (p. {pages[0]})", target[pages[0]] + 1] for term, pages in terms)
+        doc.set_toc(toc)
+        # Os leitores de PDF mostram o número da página na edição original
+        labels = [{"startpage": 0, "prefix": "", "style": "r", "firstpagenum": 1}]
+        labels.extend(
+            {"startpage": target[page], "prefix": "", "style": "D", "firstpagenum": page} for page in hit_pages
+        )
+        doc.set_page_labels(labels)
+
+        # garbage=2 descarta os objetos das páginas removidas; o nível 3 (objetos duplicados)
+        # cresce com o quadrado do número de páginas e não reduz o arquivo nas edições do DOU
+        doc.save(output_pdf_path, garbage=2, deflate=True)
+    finally:
+        doc.close()
+    logging.info(
+        f"PDF resumido gravado em {output_pdf_path}: {len(hit_pages)} páginas com ocorrências, "
+        f"{os.path.getsize(output_pdf_path)} bytes"
+    )
+    return output_pdf_path
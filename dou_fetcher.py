@@ -0,0 +1,117 @@
+import logging
+import os
+import re
+import time
+from datetime import date as date_cls
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Página de leitura do DOU; pode apontar para um servidor local em testes
+DOU_BASE_URL = os.getenv("DOU_BASE_URL", "https://www.in.gov.br/leiturajornal")
+DOU_USER_AGENT = os.getenv(
+    "DOU_USER_AGENT",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+)
+CHUNK_SIZE = 1024 * 1024
+
+
+def build_session(pool_size=10, retries=3, backoff_factor=1.0, extra_retry_methods=()):
+    """
+    Cria uma sessão HTTP com pool de conexões e novas tentativas com backoff.
+    Só os métodos idempotentes são repetidos; `extra_retry_methods` (ex.: POST) fica
+    para quem sabe que repetir a requisição não cria duplicatas.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | frozenset(extra_retry_methods),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = DOU_USER_AGENT
+    return session
+
+
+class DOUFetcher:
+    """
+    Baixa o PDF completo de uma edição do DOU diretamente por HTTP, sem navegador.
+    A URL do PDF é obtida do HTML da página `leiturajornal` da data/seção.
+    """
+
+    def __init__(self, base_url=DOU_BASE_URL, session=None, timeout=60):
+        self.base_url = base_url
+        self.session = session or build_session()
+        self.timeout = timeout
+
+    def edition_page_url(self, edition_date, section="do1"):
+        return f"{self.base_url}?data={edition_date:%d-%m-%Y}&secao={section}"
+
+    def resolve_pdf_url(self, edition_date=None, section="do1"):
+        """Retorna a URL do PDF completo da edição, ou None se a página não tiver o link da data e seção."""
+        edition_date = edition_date or date_cls.today()
+        page_url = self.edition_page_url(edition_date, section)
+        logging.info(f"Buscando o link do PDF em {page_url}")
+        response = self.session.get(page_url, timeout=self.timeout)
+        response.raise_for_status()
+        return self._find_pdf_link(response.text, response.url, edition_date, section)
+
+    @staticmethod
+    def _find_pdf_link(html, page_url, edition_date, section):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, "html.parser")
+        candidates = []
+        # O botão "Diário Completo" e o modal aberto por ele concentram os links do PDF da edição
+        for container in soup.select(".btn-diario-completo, .modal, #diario-completo"):
+            candidates.extend(a["href"] for a in container.find_all("a", href=True))
+            if container.name == "a" and container.get("href"):
+                candidates.append(container["href"])
+        candidates.extend(a["href"] for a in soup.find_all("a", href=True))
+
+        # Só vale o arquivo da data e da seção pedidas: sem edição no dia, a página pode
+        # listar o PDF de outra data, que não pode ser tomado pelo do dia pedido
+        expected = re.compile(rf"{edition_date:%Y_%m_%d}.*{re.escape(section)}\.pdf", re.IGNORECASE)
+        for href in candidates:
+            if expected.search(href):
+                return urljoin(page_url, href)
+        return None
+
+    def download(self, pdf_url, dest_path):
+        """Grava o PDF em disco por streaming; o arquivo final só aparece quando completo."""
+        start_time = time.time()
+        tmp_path = dest_path + ".part"
+        size = 0
+        with self.session.get(pdf_url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as fh:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if not size and not chunk.startswith(b"%PDF"):
+                        raise ValueError(f"Conteúdo recebido de {pdf_url} não é um PDF")
+                    fh.write(chunk)
+                    size += len(chunk)
+        os.replace(tmp_path, dest_path)
+        elapsed = max(time.time() - start_time, 1e-6)
+        logging.info(f"PDF baixado em {dest_path}: {size} bytes em {elapsed:.1f}s ({size / elapsed / 1024:.0f} KB/s)")
+        return dest_path
+
+    def fetch_pdf(self, dest_path, edition_date=None, section="do1"):
+        """Resolve e baixa o PDF da edição. Retorna o caminho local ou None em caso de falha."""
+        try:
+            pdf_url = self.resolve_pdf_url(edition_date, section)
+            if not pdf_url:
+                logging.warning("Link do PDF completo não encontrado na página do DOU")
+                return None
+            os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+            return self.download(pdf_url, dest_path)
+        except Exception as e:
+            logging.error(f"Erro ao baixar o PDF do DOU por HTTP: {e}")
+            if os.path.exists(dest_path + ".part"):
+                os.remove(dest_path + ".part")
+            return None
@@ -0,0 +1,164 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from collections import namedtuple
+
+# Extensões usadas pelos navegadores enquanto o download ainda está em andamento
+PARTIAL_EXTENSIONS = ('.crdownload', '.tmp', '.partial', '.part')
+
+# Eventos do inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_EVENT_HEADER = struct.Struct("iIII")
+
+DownloadResult = namedtuple("DownloadResult", ["path", "size", "elapsed", "bytes_per_second"])
+
+
+class _Inotify:
+    """Observa um diretório com inotify (Linux) via ctypes, sem dependências extras."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch falhou para {directory}")
+
+    def wait(self, timeout):
+        """Bloqueia até chegar algum evento ou o tempo acabar; retorna os nomes dos arquivos afetados."""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Polling:
+    """Alternativa para sistemas sem inotify: verifica o diretório em intervalos curtos."""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(max(min(self.interval, timeout), 0))
+        return []
+
+    def close(self):
+        pass
+
+
+def _recent_entries(directory, names, since):
+    # (entrada, stat) dos arquivos com as extensões informadas modificados desde `since`;
+    # arquivos removidos durante a varredura (o navegador renomeia o parcial) são ignorados
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(names):
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        if since is None or stat.st_mtime >= since - 1:
+            yield entry, stat
+
+
+def _completed_file(directory, suffix, since):
+    # Retorna o arquivo mais recente com a extensão esperada, se não houver download parcial pendente.
+    # Parciais anteriores a `since` (de downloads abandonados) não contam como pendentes
+    completed = []
+    for entry, stat in _recent_entries(directory, PARTIAL_EXTENSIONS + (suffix,), since):
+        if entry.name.endswith(PARTIAL_EXTENSIONS):
+            return None
+        if stat.st_size > 0:
+            completed.append((stat.st_mtime, entry.path, stat.st_size))
+    return max(completed) if completed else None
+
+
+def _started_file(directory, suffix, since):
+    # Qualquer arquivo parcial, ou já completo, criado depois do início do download
+    for entry, _ in _recent_entries(directory, PARTIAL_EXTENSIONS + (suffix,), since):
+        return entry.path
+    return None
+
+
+def _open_watcher(directory):
+    # O diretório precisa existir antes de ser observado e varrido
+    os.makedirs(directory, exist_ok=True)
+    try:
+        return _Inotify(directory)
+    except (OSError, AttributeError) as e:
+        logging.debug(f"inotify indisponível ({e}); usando verificação periódica")
+        return _Polling()
+
+
+def wait_for_download_start(directory, timeout=60, suffix=".pdf", since=None):
+    """
+    Espera o navegador criar o arquivo do download (parcial ou já completo) em
+    `directory`. Retorna o caminho do arquivo, ou None se `timeout` esgotar.
+    """
+    deadline = time.time() + timeout
+    watcher = _open_watcher(directory)
+    try:
+        while True:
+            path = _started_file(directory, suffix, since)
+            if path:
+                return path
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logging.error(f"Timeout de {timeout}s ao esperar o início do download em {directory}")
+                return None
+            watcher.wait(remaining)
+    finally:
+        watcher.close()
+
+
+def wait_for_download(directory, timeout=300, suffix=".pdf", since=None):
+    """
+    Espera um download terminar em `directory` e retorna um DownloadResult, ou
+    None se `timeout` (em segundos) esgotar. Reage aos eventos do sistema de
+    arquivos (o navegador renomeia o `.crdownload` ao concluir) em vez de
+    dormir em intervalos fixos. `since` ignora arquivos anteriores ao início do download.
+    """
+    start_time = since or time.time()
+    deadline = time.time() + timeout
+    watcher = _open_watcher(directory)
+    try:
+        while True:
+            found = _completed_file(directory, suffix, since)
+            if found:
+                _, path, size = found
+                elapsed = max(time.time() - start_time, 1e-6)
+                result = DownloadResult(path, size, elapsed, size / elapsed)
+                logging.info(
+                    f"Download finalizado: {path} ({size} bytes em {elapsed:.1f}s, "
+                    f"{result.bytes_per_second / 1024:.0f} KB/s)"
+                )
+                return result
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logging.error(f"Timeout de {timeout}s ao esperar o download em {directory}")
+                return None
+            watcher.wait(remaining)
+    finally:
+        watcher.close()
@@ -1,23 +1,33 @@
 import os
+import hashlib
 import io
+import json
 import logging
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from google.oauth2 import service_account
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "servicescraperdou.json")
 DELEGATE_EMAIL = os.getenv("DELEGATE_EMAIL")
+# Tamanho de cada bloco do upload resumível (múltiplo de 256 KB exigido pela API)
+DRIVE_CHUNK_SIZE = int(os.getenv("DRIVE_CHUNK_SIZE_MB", "8")) * 1024 * 1024
+DRIVE_UPLOAD_WORKERS = int(os.getenv("DRIVE_UPLOAD_WORKERS", "4"))
+# Status HTTP em que o bloco é reenviado a partir do último byte confirmado
+RETRIABLE_STATUS = (429, 500, 502, 503, 504)
 
-# Autenticação
-def authenticate_service():
-    credentials = service_account.Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    if DELEGATE_EMAIL:
-        credentials = credentials.with_subject(DELEGATE_EMAIL)
-    return build("drive", "v3", credentials=credentials)
+# Campos pedidos nas listagens; só o necessário para identificar e comparar arquivos
+FILE_FIELDS = "id, name, md5Checksum, modifiedTime, size, parents"
+LIST_PAGE_SIZE = 1000  # máximo aceito por files.list e changes.list
+# Um arquivo <folder_id>.json por pasta acompanhada
+DRIVE_METADATA_CACHE_DIR = os.getenv(
+    "DRIVE_METADATA_CACHE_DIR", os.path.join(os.getenv("DOU_CACHE_DIR", ".dou_cache"), "drive_metadata")
+)
+# ID do Drive compartilhado, necessário para acompanhar as alterações de um Shared Drive
+SHARED_DRIVE_ID = os.getenv("SHARED_DRIVE_ID")
 
-service = authenticate_service()
 # Aceita diferentes nomes de variáveis de ambiente para maior flexibilidade
 DRIVE_FOLDER_ID = (
     os.getenv("GOOGLE_DRIVE_FOLDER_ID")
@@ -25,26 +35,148 @@ DRIVE_FOLDER_ID = (
     or os.getenv("FOLDER_ID")
 )
 
-def upload_to_drive(file_path, mime_type="application/pdf"):
+UploadResult = namedtuple("UploadResult", ["file_id", "path", "size", "elapsed", "bytes_per_second"])
+
+_credentials = None
+_credentials_lock = threading.Lock()
+# O cliente HTTP do googleapiclient não é thread-safe: cada thread usa o seu próprio serviço
+_local = threading.local()
+
+
+# Autenticação
+def get_credentials():
+    """Carrega as credenciais da conta de serviço na primeira chamada e as reaproveita."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            from google.oauth2 import service_account
+
+            credentials = service_account.Credentials.from_service_account_file(
+                SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+            if DELEGATE_EMAIL:
+                credentials = credentials.with_subject(DELEGATE_EMAIL)
+            _credentials = credentials
+        return _credentials
+
+
+def authenticate_service():
+    """Cria um novo cliente da API do Drive com as credenciais compartilhadas."""
+    from googleapiclient.discovery import build
+
+    return build("drive", "v3", credentials=get_credentials(), cache_discovery=False)
+
+
+def get_service():
+    """Retorna o cliente do Drive da thread atual, criando-o na primeira vez."""
+    service = getattr(_local, "service", None)
+    if service is None:
+        service = _local.service = authenticate_service()
+    return service
+
+
+def file_md5(path, chunk_size=1024 * 1024):
+    """Calcula o MD5 de um arquivo local, no formato do campo md5Checksum do Drive."""
+    digest = hashlib.md5()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_retriable(error):
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRIABLE_STATUS
+    if isinstance(error, (FileNotFoundError, PermissionError, IsADirectoryError)):
+        # Problemas com o arquivo local não se resolvem com uma nova tentativa
+        return False
+    return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+
+def upload_to_drive(file_path, mime_type="application/pdf", folder_id=None, chunk_size=DRIVE_CHUNK_SIZE,
+                    progress=None, max_retries=5):
+    """
+    Envia um arquivo ao Drive por upload resumível, em blocos de `chunk_size` bytes.
+    Se um bloco falhar, o envio continua do último byte confirmado (com backoff
+    exponencial) em vez de recomeçar do zero. `progress(file_path, enviados, total)`
+    é chamado após cada bloco. Retorna um UploadResult.
+    """
+    from googleapiclient.http import MediaFileUpload
+
+    target_folder_id = folder_id or DRIVE_FOLDER_ID
     file_metadata = {
         "name": os.path.basename(file_path),
-        "parents": [DRIVE_FOLDER_ID] if DRIVE_FOLDER_ID else None
+        "parents": [target_folder_id] if target_folder_id else None
     }
-    media = MediaFileUpload(file_path, mimetype=mime_type)
-
-    file = service.files().create(
+    size = os.path.getsize(file_path)
+    media = MediaFileUpload(file_path, mimetype=mime_type, chunksize=chunk_size, resumable=True)
+    request = get_service().files().create(
         body=file_metadata,
         media_body=media,
         fields="id",
         supportsAllDrives=True
-    ).execute()
+    )
+
+    start_time = time.time()
+    response = None
+    failures = 0
+    while response is None:
+        try:
+            status, response = request.next_chunk()
+        except Exception as e:
+            if not _is_retriable(e) or failures >= max_retries:
+                raise
+            failures += 1
+            delay = min(2 ** failures, 60) + random.random()
+            logging.warning(f"Falha no envio de {file_path} ({e}); retomando em {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        failures = 0
+        if status and progress:
+            progress(file_path, status.resumable_progress, size)
+
+    elapsed = max(time.time() - start_time, 1e-6)
+    result = UploadResult(response.get("id"), file_path, size, elapsed, size / elapsed)
+    if progress:
+        progress(file_path, size, size)
+    logging.info(
+        f"Upload concluído. File ID: {result.file_id} ({size} bytes em {elapsed:.1f}s, "
+        f"{result.bytes_per_second / 1024:.0f} KB/s)"
+    )
+    return result
+
 
-    logging.info(f"Upload concluído. File ID: {file.get('id')}")
-    return file.get("id")
+def upload_many(files, folder_id=None, max_workers=DRIVE_UPLOAD_WORKERS, chunk_size=DRIVE_CHUNK_SIZE, progress=None):
+    """
+    Envia vários arquivos em paralelo. `files` é uma lista de caminhos ou de pares
+    (caminho, mime_type). Retorna {caminho: UploadResult ou exceção}, sem interromper
+    os demais envios quando um deles falha.
+    """
+    items = [(f, "application/pdf") if isinstance(f, str) else tuple(f) for f in files]
+    results = {}
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(upload_to_drive, path, mime_type, folder_id, chunk_size, progress): path
+            for path, mime_type in items
+        }
+        for future, path in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logging.error(f"Erro ao fazer upload do arquivo {path}: {e}")
+                results[path] = e
+    sent = sum(r.size for r in results.values() if isinstance(r, UploadResult))
+    elapsed = max(time.time() - start_time, 1e-6)
+    logging.info(f"{len(items)} arquivo(s), {sent} bytes enviados em {elapsed:.1f}s ({sent / elapsed / 1024:.0f} KB/s)")
+    return results
 
 
 def download_file_from_drive(file_id, dest_path):
-    request = service.files().get_media(fileId=file_id, supportsAllDrives=True)
+    from googleapiclient.http import MediaIoBaseDownload
+
+    request = get_service().files().get_media(fileId=file_id, supportsAllDrives=True)
     with io.FileIO(dest_path, "wb") as fh:
         downloader = MediaIoBaseDownload(fh, request)
         done = False
@@ -54,16 +186,125 @@ def download_file_from_drive(file_id, dest_path):
                 logging.info(f"Download {int(status.progress() * 100)}%.")
 
 
+def iter_files(query=None, fields=FILE_FIELDS):
+    """Percorre todas as páginas de files.list, com o tamanho máximo de página."""
+    page_token = None
+    while True:
+        results = get_service().files().list(
+            q=query,
+            pageSize=LIST_PAGE_SIZE,
+            pageToken=page_token,
+            fields=f"nextPageToken, files({fields})",
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        ).execute()
+        yield from results.get("files", [])
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def list_files_in_folder(folder_id, fields=FILE_FIELDS):
+    """Lista todos os arquivos (não excluídos) de uma pasta."""
+    return list(iter_files(f"'{folder_id}' in parents and trashed = false", fields))
+
+
 def list_files_in_drive():
-    query = f"'{DRIVE_FOLDER_ID}' in parents" if DRIVE_FOLDER_ID else None
-    results = service.files().list(
-        q=query,
-        pageSize=20,
-        fields="files(id, name)",
-        supportsAllDrives=True,
-        includeItemsFromAllDrives=True
-    ).execute()
-    files = results.get("files", [])
+    if DRIVE_FOLDER_ID:
+        files = list_files_in_folder(DRIVE_FOLDER_ID)
+    else:
+        files = list(iter_files("trashed = false"))
     for file in files:
         logging.info(f"{file['name']} ({file['id']})")
-    return files
\ No newline at end of file
+    return files
+
+
+class DriveMetadataCache:
+    """
+    Cópia local dos metadados dos arquivos de uma pasta do Drive.
+    A primeira chamada a `refresh` lista a pasta inteira; as seguintes aplicam apenas
+    as alterações do feed `changes` desde o último token, então perguntas como
+    "a edição de hoje já foi enviada?" não exigem uma nova listagem completa.
+    """
+
+    def __init__(self, folder_id=None, path=None, drive_id=SHARED_DRIVE_ID):
+        self.folder_id = folder_id or DRIVE_FOLDER_ID
+        self.path = path or os.path.join(DRIVE_METADATA_CACHE_DIR, f"{self.folder_id}.json")
+        self.drive_id = drive_id
+        self.page_token = None
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Cache de metadados do Drive inválido ({self.path}): {e}")
+            return
+        if data.get("folder_id") == self.folder_id:
+            self.page_token = data.get("page_token")
+            self.files = data.get("files", {})
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"folder_id": self.folder_id, "page_token": self.page_token, "files": self.files}, fh)
+        os.replace(tmp_path, self.path)
+
+    def _drive_kwargs(self):
+        if self.drive_id:
+            return {"driveId": self.drive_id, "supportsAllDrives": True, "includeItemsFromAllDrives": True}
+        return {"supportsAllDrives": True, "includeItemsFromAllDrives": True}
+
+    def refresh(self):
+        """Atualiza os metadados locais e retorna o número de arquivos alterados."""
+        service = get_service()
+        if self.page_token is None:
+            # O token é obtido antes da listagem para não perder alterações feitas durante ela
+            token = service.changes().getStartPageToken(**self._drive_kwargs()).execute()["startPageToken"]
+            self.files = {f["id"]: f for f in list_files_in_folder(self.folder_id)}
+            self.page_token = token
+            self._save()
+            logging.info(f"Metadados do Drive carregados: {len(self.files)} arquivos")
+            return len(self.files)
+
+        changed = 0
+        page_token = self.page_token
+        while page_token:
+            results = service.changes().list(
+                pageToken=page_token,
+                pageSize=LIST_PAGE_SIZE,
+                spaces="drive",
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}, trashed))",
+                **self._drive_kwargs()
+            ).execute()
+            for change in results.get("changes", []):
+                file = change.get("file")
+                in_folder = file and not file.get("trashed") and self.folder_id in file.get("parents", [])
+                if in_folder:
+                    file.pop("trashed", None)
+                    self.files[change["fileId"]] = file
+                    changed += 1
+                elif self.files.pop(change["fileId"], None) is not None:
+                    changed += 1
+            if "newStartPageToken" in results:
+                self.page_token = results["newStartPageToken"]
+            page_token = results.get("nextPageToken")
+        self._save()
+        logging.info(f"Metadados do Drive atualizados: {changed} alterações")
+        return changed
+
+    def find_by_name(self, name):
+        """Retorna os metadados do arquivo com o nome informado na pasta, ou None."""
+        matches = [f for f in self.files.values() if f.get("name") == name]
+        return max(matches, key=lambda f: f.get("modifiedTime", "")) if matches else None
+
+    def has_file(self, name, refresh=True):
+        """Indica se a pasta já contém um arquivo com esse nome."""
+        if refresh:
+            self.refresh()
+        return self.find_by_name(name) is not None
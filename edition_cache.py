@@ -0,0 +1,356 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: a remoção fica protegida só entre as threads do processo
+    fcntl = None
+
+from act_segmenter import ActSegment
+from pdf_utils import PageContent, iter_pdf_pages
+
+# Cache local de edições; fica fora de output_files para sobreviver à limpeza de cada execução
+CACHE_DIR = os.getenv("DOU_CACHE_DIR", ".dou_cache")
+CACHE_MAX_BYTES = int(os.getenv("DOU_CACHE_MAX_MB", "2048")) * 1024 * 1024
+SIDECAR_VERSION = 3
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcula o SHA-256 de um arquivo sem carregá-lo inteiro na memória."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EditionCache:
+    """
+    Cache de edições do DOU indexado por data, seção e SHA-256 do PDF.
+    Guarda o PDF original e um arquivo auxiliar compacto com o texto, as palavras e
+    os atos de cada página, de modo que uma nova análise não precise nem da rede nem do fitz.
+    Quando o tamanho total passa de `max_bytes`, as edições usadas há mais tempo são removidas.
+
+    Estrutura: <root>/<AAAA-MM-DD>_<seção>/<sha256>.pdf e <sha256>.pages.json.gz (uma página por linha)
+
+    O cache pode ser usado por várias threads (backfill) e processos ao mesmo tempo:
+    a remoção é feita por um de cada vez e não toca nas edições sendo gravadas.
+    Entre processos, quem grava mantém um flock compartilhado em <sha256>.writing, que a
+    remoção testa antes de apagar a edição; sem fcntl (Windows), a proteção vale só entre as
+    threads do processo. O arquivo <root>/<AAAA-MM-DD>_<seção>/current guarda o SHA-256 da
+    última versão gravada da edição, que é a devolvida por `lookup`.
+    """
+
+    # Serializa a remoção entre as threads; entre processos, um flock em <root>/.evict.lock
+    _evict_lock = threading.Lock()
+    # PDFs cujo arquivo ou auxiliar está sendo gravado neste processo (contagem por caminho)
+    _writing = Counter()
+
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _edition_dir(self, edition_date, section):
+        return os.path.join(self.root, f"{edition_date:%Y-%m-%d}_{section}")
+
+    @staticmethod
+    def _sidecar_path(pdf_path):
+        return pdf_path[:-len(".pdf")] + ".pages.json.gz"
+
+    @staticmethod
+    def _marker_path(pdf_path):
+        return pdf_path[:-len(".pdf")] + ".writing"
+
+    @staticmethod
+    def _touch(path):
+        # O mtime marca o último uso e define a ordem de remoção (LRU)
+        if os.path.exists(path):
+            os.utime(path)
+
+    def lookup(self, edition_date, section="do1", sha256=None):
+        """
+        Retorna o caminho do PDF da edição em cache, ou None. Com `sha256`, só aceita
+        essa versão; sem ele, devolve a última versão gravada da edição.
+        """
+        edition_dir = self._edition_dir(edition_date, section)
+        if sha256:
+            pdf_path = os.path.join(edition_dir, f"{sha256}.pdf")
+            pdf_path = pdf_path if os.path.exists(pdf_path) else None
+        else:
+            pdf_path = self._current_pdf(edition_dir)
+        if pdf_path is None:
+            return None
+        self._touch(pdf_path)
+        self._touch(self._sidecar_path(pdf_path))
+        logging.info(f"Edição {edition_date:%Y-%m-%d} {section} encontrada no cache: {pdf_path}")
+        return pdf_path
+
+    @staticmethod
+    def _current_pdf(edition_dir):
+        # A versão registrada em `current`; sem ele (caches antigos), a de mtime mais recente
+        try:
+            with open(os.path.join(edition_dir, "current")) as fh:
+                pdf_path = os.path.join(edition_dir, f"{fh.read().strip()}.pdf")
+            if os.path.exists(pdf_path):
+                return pdf_path
+        except FileNotFoundError:
+            pass
+        try:
+            pdfs = [os.path.join(edition_dir, name) for name in os.listdir(edition_dir) if name.endswith(".pdf")]
+        except FileNotFoundError:
+            return None
+        return max(pdfs, key=os.path.getmtime) if pdfs else None
+
+    def _begin_write(self, pdf_path):
+        """Marca o PDF como sendo gravado; retorna o marcador a passar para `_end_write`."""
+        with self._evict_lock:
+            self._writing[os.path.abspath(pdf_path)] += 1
+        if fcntl is None:
+            return None
+        marker = open(self._marker_path(pdf_path), "a")
+        fcntl.flock(marker, fcntl.LOCK_SH)
+        return marker
+
+    def _end_write(self, pdf_path, marker):
+        path = os.path.abspath(pdf_path)
+        if marker is not None:
+            # O arquivo fica para a remoção da edição; apagá-lo aqui abriria uma disputa com outro gravador
+            fcntl.flock(marker, fcntl.LOCK_UN)
+            marker.close()
+        with self._evict_lock:
+            self._writing[path] -= 1
+            if not self._writing[path]:
+                del self._writing[path]
+
+    def store_pdf(self, pdf_path, edition_date, section="do1"):
+        """Move o PDF baixado para o cache e retorna o novo caminho."""
+        sha256 = file_sha256(pdf_path)
+        edition_dir = self._edition_dir(edition_date, section)
+        cached_path = os.path.join(edition_dir, f"{sha256}.pdf")
+        os.makedirs(edition_dir, exist_ok=True)
+        marker = self._begin_write(cached_path)
+        try:
+            if os.path.exists(cached_path):
+                os.remove(pdf_path)
+            else:
+                shutil.move(pdf_path, cached_path)
+            self._touch(cached_path)
+            current_tmp = os.path.join(edition_dir, f"current.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(current_tmp, "w") as fh:
+                fh.write(sha256)
+            os.replace(current_tmp, os.path.join(edition_dir, "current"))
+            self.evict(keep=cached_path)
+        finally:
+            self._end_write(cached_path, marker)
+        return cached_path
+
+    def load_pages(self, pdf_path):
+        """Lê o texto, as palavras e os atos das páginas gravados para o PDF em cache, se existirem."""
+        if not os.path.exists(self._sidecar_path(pdf_path)):
+            return None
+        try:
+            return list(self._read_sidecar(pdf_path))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Arquivo auxiliar inválido no cache ({self._sidecar_path(pdf_path)}): {e}")
+            return None
+
+    def _read_sidecar(self, pdf_path):
+        # Uma página por linha, após um cabeçalho com a versão do formato
+        with gzip.open(self._sidecar_path(pdf_path), "rt", encoding="utf-8") as fh:
+            header = json.loads(fh.readline())
+            if header.get("version") != SIDECAR_VERSION:
+                raise ValueError(f"versão {header.get('version')} do arquivo auxiliar")
+            for line in fh:
+                number, text, words, acts = json.loads(line)
+                yield PageContent(
+                    number, text, [tuple(word) for word in words], [ActSegment(*act) for act in acts]
+                )
+
+    @staticmethod
+    def _page_line(page):
+        # Coordenadas com 2 casas decimais bastam para o destaque e reduzem o arquivo
+        words = [
+            [round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2), *rest]
+            for x0, y0, x1, y1, *rest in page.words
+        ]
+        acts = [list(act) for act in page.acts or ()]
+        return json.dumps([page.number, page.text, words, acts], ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def store_pages(self, pdf_path, pages):
+        """Grava o texto, as palavras e os atos das páginas ao lado do PDF em cache."""
+        for _ in self._write_sidecar(pdf_path, pages):
+            pass
+
+    def _write_sidecar(self, pdf_path, pages):
+        # Repassa cada página adiante assim que ela é gravada; o arquivo só é publicado no final
+        sidecar_path = self._sidecar_path(pdf_path)
+        tmp_path = f"{sidecar_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        completed = False
+        marker = self._begin_write(pdf_path)
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+                fh.write(json.dumps({"version": SIDECAR_VERSION}) + "\n")
+                for page in pages:
+                    fh.write(self._page_line(page))
+                    yield page
+            os.replace(tmp_path, sidecar_path)
+            completed = True
+            self.evict(keep=pdf_path)
+        finally:
+            self._end_write(pdf_path, marker)
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def iter_pages(self, pdf_path, workers=None):
+        """
+        Gera as páginas (com palavras) do PDF em cache, uma a uma. Na primeira vez
+        extrai do PDF e grava o arquivo auxiliar enquanto as páginas são consumidas.
+        """
+        if os.path.exists(self._sidecar_path(pdf_path)):
+            try:
+                # Valida o cabeçalho antes de começar a entregar páginas
+                pages = self._read_sidecar(pdf_path)
+                first = next(pages, None)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Arquivo auxiliar inválido no cache ({self._sidecar_path(pdf_path)}): {e}")
+            else:
+                logging.info("Texto das páginas lido do cache")
+                if first is not None:
+                    yield first
+                    yield from pages
+                return
+        pages = iter_pdf_pages(pdf_path, workers=workers, with_words=True)
+        yield from self._write_sidecar(pdf_path, pages)
+
+    def get_pages(self, pdf_path, workers=None):
+        """Retorna a lista de páginas (com palavras) do PDF em cache."""
+        return list(self.iter_pages(pdf_path, workers=workers))
+
+    def iter_editions(self):
+        """Gera (data, seção, caminho do PDF) de cada edição em cache, em ordem de data, sem marcar uso."""
+        for edition_name in sorted(os.listdir(self.root)):
+            edition_dir = os.path.join(self.root, edition_name)
+            date_str, _, section = edition_name.partition("_")
+            try:
+                edition_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            except ValueError:
+                continue  # outros diretórios do cache (ex.: termos)
+            pdf_path = self._current_pdf(edition_dir)
+            if pdf_path:
+                yield edition_date, section, pdf_path
+
+    def evict(self, keep=None):
+        """
+        Remove as edições usadas há mais tempo até o cache caber em `max_bytes`.
+        `keep` (o PDF recém-gravado) e as edições sendo gravadas, neste ou em outro
+        processo, nunca são removidos; arquivos que somem durante a varredura
+        (removidos por outro processo) são ignorados.
+        """
+        with self._evict_lock, self._lock_file():
+            protected = set(self._writing)
+            if keep:
+                protected.add(os.path.abspath(keep))
+            self._evict(protected)
+
+    def _lock_file(self):
+        if fcntl is None:
+            return nullcontext()
+        return _FileLock(os.path.join(self.root, ".evict.lock"))
+
+    def _evict(self, protected):
+        editions = []
+        total = 0
+        for edition_name in os.listdir(self.root):
+            edition_dir = os.path.join(self.root, edition_name)
+            if not os.path.isdir(edition_dir):
+                continue
+            try:
+                names = os.listdir(edition_dir)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                pdf_path = os.path.join(edition_dir, name)
+                files = [pdf_path, self._sidecar_path(pdf_path)]
+                try:
+                    mtime = os.path.getmtime(pdf_path)
+                except FileNotFoundError:
+                    continue
+                size = sum(_file_size(f) for f in files)
+                total += size
+                if os.path.abspath(pdf_path) not in protected:
+                    editions.append((mtime, size, files))
+        editions.sort()
+        # A edição mais recente é sempre mantida, mesmo que sozinha passe do limite
+        while total > self.max_bytes and len(editions) > 1:
+            _, size, files = editions.pop(0)
+            if not self._remove_edition_files(files):
+                continue  # sendo gravada por outro processo
+            total -= size
+            edition_dir = os.path.dirname(files[0])
+            try:
+                if os.listdir(edition_dir) == ["current"]:
+                    _remove(os.path.join(edition_dir, "current"))
+                os.rmdir(edition_dir)
+            except OSError:
+                pass  # ainda tem arquivos (ex.: outro PDF ou um auxiliar sendo gravado) ou já foi removido
+            logging.info(f"Removido do cache: {files[0]} ({size} bytes)")
+
+    def _remove_edition_files(self, files):
+        # O flock exclusivo no marcador falha se outro processo estiver gravando a edição e,
+        # enquanto seguro, impede que uma nova gravação comece
+        marker_path = self._marker_path(files[0])
+        if fcntl is None or not os.path.exists(marker_path):
+            for path in files:
+                _remove(path)
+            return True
+        with open(marker_path, "a") as marker:
+            try:
+                fcntl.flock(marker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            for path in files:
+                _remove(path)
+            _remove(marker_path)
+        return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+class _FileLock:
+    """flock exclusivo em um arquivo, para serializar a remoção entre processos."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = None
+
+    def __enter__(self):
+        self.fh = open(self.path, "a")
+        fcntl.flock(self.fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fh, fcntl.LOCK_UN)
+        self.fh.close()
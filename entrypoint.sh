@@ -1,10 +1,6 @@
-### entrypoint.sh
 #!/bin/bash
 
-# Executa o script principal diariamente (simulação com loop para Render)
-while true; do
-  echo "Executando scraper..."
-  python main.py
-  echo "Aguardando 24h para nova execução..."
-  sleep 86400
-done
\ No newline at end of file
+# Processo contínuo: procura a edição do dia no horário de publicação (SCHEDULE_TIME)
+# e roda o pipeline assim que ela aparece, reaproveitando os clientes entre os dias
+echo "Iniciando agendador do scraper..."
+exec python scheduler.py
@@ -4,10 +4,16 @@ import os
 import shutil
 import requests
 
+from dou_fetcher import build_session
+
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_REPO = os.getenv("GITHUB_REPO") or os.getenv("TARGET_REPO")
 GITHUB_BRANCH = os.getenv("GITHUB_BRANCH") or os.getenv("TARGET_BRANCH") or "main"
+# Definida automaticamente no GitHub Actions; pode apontar para um mock local da API
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
 LOCAL_OUTPUT_DIR = os.getenv("LOCAL_OUTPUT_DIR", "output_files")
+# Bytes lidos por vez ao codificar um arquivo em base64 (múltiplo de 3 para concatenar os blocos)
+BLOB_READ_SIZE = 3 * 256 * 1024
 
 
 def save_file_locally(file_path, dest_dir=LOCAL_OUTPUT_DIR):
@@ -19,43 +25,131 @@ def save_file_locally(file_path, dest_dir=LOCAL_OUTPUT_DIR):
     return dest_path
 
 
-def upload_file_to_github(file_path, repo_path=None, message="Add highlighted PDF"):
-    """Envia um arquivo para um repositório do GitHub via API REST."""
+class _Base64BlobBody:
+    """
+    Corpo JSON de POST /git/blobs gerado por streaming: o arquivo é lido e
+    codificado em base64 em blocos, sem manter o conteúdo inteiro na memória.
+    Pode ser percorrido de novo (novas tentativas) e informa o Content-Length.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._prefix = b'{"encoding":"base64","content":"'
+        self._suffix = b'"}'
+        size = os.path.getsize(file_path)
+        self._length = len(self._prefix) + 4 * ((size + 2) // 3) + len(self._suffix)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        yield self._prefix
+        with open(self.file_path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(BLOB_READ_SIZE), b""):
+                yield base64.b64encode(chunk)
+        yield self._suffix
+
+
+class GitHubBatchUploader:
+    """
+    Envia vários arquivos para um repositório em um único commit, usando a Git Data API
+    (blobs -> tree -> commit -> ref) com uma sessão HTTP reaproveitada e novas tentativas.
+    """
+
+    def __init__(self, repo=GITHUB_REPO, branch=GITHUB_BRANCH, token=GITHUB_TOKEN,
+                 api_url=GITHUB_API_URL, session=None):
+        self.repo = repo
+        self.branch = branch
+        self.api_url = api_url.rstrip("/")
+        # Os objetos da Git Data API são endereçados pelo conteúdo: repetir POST de blob ou tree devolve o
+        # mesmo SHA, um commit repetido fica solto sem ref, e o PATCH da ref com o mesmo SHA não muda nada
+        self.session = session or build_session(extra_retry_methods=("POST", "PATCH"))
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        }
+        self.files = []
+
+    def _request(self, method, endpoint, **kwargs):
+        url = f"{self.api_url}/repos/{self.repo}/{endpoint}"
+        headers = dict(self.headers, **kwargs.pop("headers", {}))
+        resp = self.session.request(method, url, headers=headers, timeout=300, **kwargs)
+        logging.debug("%s %s -> %s", method, url, resp.status_code)
+        resp.raise_for_status()
+        return resp.json()
+
+    def add(self, file_path, repo_path=None):
+        """Inclui um arquivo no próximo commit."""
+        self.files.append((file_path, repo_path or os.path.basename(file_path)))
+
+    def create_blob(self, file_path):
+        body = _Base64BlobBody(file_path)
+        blob = self._request("POST", "git/blobs", data=body, headers={"Content-Type": "application/json"})
+        logging.info("Blob criado para %s (%s bytes): %s", file_path, os.path.getsize(file_path), blob["sha"])
+        return blob["sha"]
+
+    def commit(self, message, max_attempts=3):
+        """Cria um commit com todos os arquivos adicionados e retorna o SHA do commit."""
+        if not self.files:
+            logging.info("Nenhum arquivo para enviar ao GitHub")
+            return None
+        tree_entries = [
+            {"path": repo_path, "mode": "100644", "type": "blob", "sha": self.create_blob(file_path)}
+            for file_path, repo_path in self.files
+        ]
+        for attempt in range(max_attempts):
+            head = self._request("GET", f"git/ref/heads/{self.branch}")["object"]["sha"]
+            base_tree = self._request("GET", f"git/commits/{head}")["tree"]["sha"]
+            tree = self._request("POST", "git/trees", json={"base_tree": base_tree, "tree": tree_entries})
+            commit = self._request(
+                "POST", "git/commits", json={"message": message, "tree": tree["sha"], "parents": [head]}
+            )
+            try:
+                self._request("PATCH", f"git/refs/heads/{self.branch}", json={"sha": commit["sha"]})
+            except requests.exceptions.HTTPError as e:
+                # 422: o branch avançou entre a leitura e a atualização; refaz sobre o novo HEAD
+                if e.response is not None and e.response.status_code == 422 and attempt + 1 < max_attempts:
+                    logging.warning("Branch %s foi atualizado durante o envio; tentando novamente", self.branch)
+                    continue
+                raise
+            logging.info(
+                "Commit %s com %s arquivo(s) enviado para %s@%s", commit["sha"], len(self.files), self.repo, self.branch
+            )
+            self.files = []
+            return commit["sha"]
+
+
+def upload_files_to_github(files, message="Add DOU artifacts"):
+    """
+    Envia vários arquivos [(caminho_local, caminho_no_repo)] em um único commit.
+    Em caso de falha, salva cópias locais. Retorna o SHA do commit ou None.
+    """
     if not GITHUB_TOKEN or not GITHUB_REPO:
         logging.error("Variáveis GITHUB_TOKEN ou GITHUB_REPO não configuradas")
-        return save_file_locally(file_path)
+        for file_path, _ in files:
+            save_file_locally(file_path)
+        return None
 
+    uploader = GitHubBatchUploader()
+    for file_path, repo_path in files:
+        uploader.add(file_path, repo_path)
+    try:
+        return uploader.commit(message)
+    except Exception as e:
+        detail = e.response.text if isinstance(e, requests.exceptions.HTTPError) and e.response is not None else e
+        logging.error("Erro ao enviar para o GitHub: %s", detail)
+        for file_path, _ in files:
+            save_file_locally(file_path)
+        return None
+
+
+def upload_file_to_github(file_path, repo_path=None, message="Add highlighted PDF"):
+    """Envia um arquivo para um repositório do GitHub via API REST."""
     repo_path = repo_path or os.path.basename(file_path)
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{repo_path}"
     logging.debug("Enviando %s para %s em %s", file_path, GITHUB_REPO, GITHUB_BRANCH)
-
-    with open(file_path, "rb") as f:
-        content = base64.b64encode(f.read()).decode("utf-8")
-
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json",
-    }
-
-    params = {"ref": GITHUB_BRANCH}
-    resp = requests.get(url, headers=headers, params=params)
-    logging.debug("GET %s -> %s", url, resp.status_code)
-    sha = resp.json().get("sha") if resp.status_code == 200 else None
-
-    payload = {
-        "message": message,
-        "branch": GITHUB_BRANCH,
-        "content": content,
-    }
-    if sha:
-        payload["sha"] = sha
-
-    resp = requests.put(url, headers=headers, json=payload)
-    logging.debug("PUT %s -> %s", url, resp.status_code)
-    if resp.status_code not in (200, 201):
-        logging.error("Erro ao enviar para o GitHub: %s", resp.text)
-        return save_file_locally(file_path)
-
-    html_url = resp.json().get("content", {}).get("html_url")
+    commit_sha = upload_files_to_github([(file_path, repo_path)], message)
+    if not commit_sha:
+        return os.path.join(LOCAL_OUTPUT_DIR, os.path.basename(file_path))
+    html_url = f"https://github.com/{GITHUB_REPO}/blob/{GITHUB_BRANCH}/{repo_path}"
     logging.info("Arquivo enviado para o GitHub em %s", html_url)
     return html_url
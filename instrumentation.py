@@ -0,0 +1,297 @@
+"""
+Medição do tempo e dos recursos de cada etapa de uma execução.
+
+`SpanRecorder.span(nome)` cronometra um bloco `with` e guarda o intervalo,
+para que se saiba onde o tempo total foi gasto (carregamento da página, clique,
+início e fim do download...).
+
+`RunMetrics` acrescenta, por etapa do pipeline (termos, download, extração,
+busca, destaque, relatório, upload), tempo de CPU, pico de memória, bytes
+lidos/gravados e número de itens, e grava o resumo da execução em JSON e no
+formato textfile do Prometheus (node_exporter). Cada etapa custa só algumas
+chamadas ao sistema operacional no início e no fim.
+"""
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Diretório do resumo das execuções (last_run.json, runs.jsonl e scraperdou.prom)
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+# Arquivo .prom lido pelo textfile collector do node_exporter (padrão: dentro de METRICS_DIR)
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE", os.path.join(METRICS_DIR, "scraperdou.prom"))
+METRIC_PREFIX = "scraperdou"
+
+# Intervalo medido; `start` é o horário de início (epoch) e `duration` a duração em segundos
+Span = namedtuple("Span", ["name", "start", "duration"])
+
+
+def _proc_status_kb(field):
+    try:
+        with open("/proc/self/status") as fh:
+            match = re.search(rf"^{field}:\s+(\d+)", fh.read(), re.MULTILINE)
+        return int(match.group(1)) if match else None
+    except OSError:
+        return None
+
+
+def reset_peak_rss():
+    """Zera o pico de memória do processo (Linux), para medir o pico de cada etapa."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo desde o último reset_peak_rss()."""
+    hwm = _proc_status_kb("VmHWM")
+    if hwm is not None:
+        return hwm * 1024
+    if resource:
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+    return 0
+
+
+def current_rss_bytes():
+    """Memória residente atual do processo (Linux); 0 quando não disponível."""
+    rss = _proc_status_kb("VmRSS")
+    return rss * 1024 if rss is not None else 0
+
+
+def _children_cpu():
+    # CPU dos processos filhos já encerrados (ex.: o pool de extração de páginas)
+    if not resource:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageMetrics:
+    """Números de uma etapa; `add` acumula itens e bytes informados pela própria etapa."""
+
+    FIELDS = ("name", "wall_seconds", "cpu_seconds", "children_cpu_seconds", "peak_rss_bytes",
+              "bytes_in", "bytes_out", "items", "status")
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.children_cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.items = 0
+        self.status = "ok"
+        # Tempos incluindo as etapas anteriores de um pipeline de geradores
+        self._inclusive_wall = 0.0
+        self._inclusive_cpu = 0.0
+        self._inclusive_children_cpu = 0.0
+
+    def add(self, items=0, bytes_in=0, bytes_out=0):
+        self.items += items
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def as_dict(self):
+        return {
+            field: round(value, 6) if isinstance(value, float) else value
+            for field, value in ((field, getattr(self, field)) for field in self.FIELDS)
+        }
+
+
+class SpanRecorder:
+    """Acumula os intervalos medidos em uma execução, na ordem em que terminam."""
+
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def span(self, name):
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started_at, time.perf_counter() - start)
+
+    def record(self, name, started_at, duration):
+        self.spans.append(Span(name, started_at, duration))
+        logging.info(f"Etapa {name}: {duration:.2f}s")
+
+    def durations(self):
+        """Retorna {etapa: segundos}; etapas repetidas são somadas."""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return totals
+
+
+class RunMetrics(SpanRecorder):
+    """Métricas de uma execução do pipeline, por etapa."""
+
+    def __init__(self, run_id=None, metrics_dir=METRICS_DIR, textfile=PROMETHEUS_TEXTFILE):
+        super().__init__()
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.metrics_dir = metrics_dir
+        self.textfile = textfile
+        self.started_at = time.time()
+        self.stages = {}
+        # Teto de memória do modo de memória limitada, quando ativo (ver pipeline.MemoryGuard)
+        self.memory_limit_bytes = None
+
+    def _stage_record(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Mede um bloco `with`; o registro recebido aceita `add(items, bytes_in, bytes_out)`."""
+        record = self._stage_record(name)
+        reset_peak_rss()
+        wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+        try:
+            yield record
+        except BaseException:
+            record.status = "error"
+            raise
+        finally:
+            record.wall_seconds += time.perf_counter() - wall
+            record.cpu_seconds += time.process_time() - cpu
+            record.children_cpu_seconds += _children_cpu() - children
+            record.peak_rss_bytes = max(record.peak_rss_bytes, peak_rss_bytes())
+            self._log(record)
+
+    def iter_stage(self, name, iterable, upstream=None):
+        """
+        Mede uma etapa de um pipeline de geradores. Cada `next` também executa as
+        etapas anteriores, então o tempo de `upstream` é descontado do desta etapa.
+        Cada item gerado conta como um item da etapa.
+        """
+        # O registro é criado já aqui, para que as etapas apareçam no resumo na ordem do pipeline
+        return self._iter_stage(self._stage_record(name), iter(iterable), upstream)
+
+    def _iter_stage(self, record, iterator, upstream):
+        if upstream is None:
+            reset_peak_rss()
+        children = _children_cpu()
+        try:
+            while True:
+                wall, cpu = time.perf_counter(), time.process_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    record._inclusive_wall += time.perf_counter() - wall
+                    record._inclusive_cpu += time.process_time() - cpu
+                record.items += 1
+                yield item
+        except GeneratorExit:
+            # Consumidor encerrou o pipeline antes do fim; não é erro da etapa
+            raise
+        except BaseException:
+            record.status = "error"
+            raise
+        finally:
+            record._inclusive_children_cpu += _children_cpu() - children
+            upstream_record = self.stages.get(upstream) or StageMetrics(upstream)
+            record.wall_seconds = record._inclusive_wall - upstream_record._inclusive_wall
+            record.cpu_seconds = record._inclusive_cpu - upstream_record._inclusive_cpu
+            record.children_cpu_seconds = record._inclusive_children_cpu - upstream_record._inclusive_children_cpu
+            # As etapas de um mesmo pipeline dividem a memória; vale o pico do conjunto
+            record.peak_rss_bytes = max(record.peak_rss_bytes, peak_rss_bytes())
+            self._log(record)
+
+    @staticmethod
+    def _log(record):
+        logging.info(
+            f"Etapa {record.name}: {record.wall_seconds:.2f}s, CPU {record.cpu_seconds:.2f}s, "
+            f"pico {record.peak_rss_bytes / 2 ** 20:.0f} MB, {record.items} itens"
+        )
+
+    def summary(self, status=None):
+        stages = [record.as_dict() for record in self.stages.values()]
+        if status is None:
+            status = "error" if any(stage["status"] == "error" for stage in stages) else "ok"
+        return {
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "wall_seconds": round(time.time() - self.started_at, 3),
+            "status": status,
+            "peak_rss_bytes": max((stage["peak_rss_bytes"] for stage in stages), default=0),
+            "memory_limit_bytes": self.memory_limit_bytes,
+            "stages": stages,
+            "steps": self.durations(),
+        }
+
+    def prometheus_text(self, summary):
+        """Converte o resumo para o formato de exposição do Prometheus."""
+        metrics = [
+            ("stage_wall_seconds", "wall_seconds", "Tempo de relógio da etapa"),
+            ("stage_cpu_seconds", "cpu_seconds", "Tempo de CPU do processo na etapa"),
+            ("stage_children_cpu_seconds", "children_cpu_seconds", "Tempo de CPU dos processos filhos na etapa"),
+            ("stage_peak_rss_bytes", "peak_rss_bytes", "Pico de memória residente na etapa"),
+            ("stage_bytes_in", "bytes_in", "Bytes lidos pela etapa"),
+            ("stage_bytes_out", "bytes_out", "Bytes gravados ou enviados pela etapa"),
+            ("stage_items", "items", "Itens processados pela etapa"),
+        ]
+        lines = []
+        for metric, field, help_text in metrics:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f'{name}{{stage="{stage["name"]}"}} {stage[field]}' for stage in summary["stages"]]
+        name = f"{METRIC_PREFIX}_step_seconds"
+        lines += [f"# HELP {name} Duração de cada passo da navegação", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{step="{step}"}} {seconds}' for step, seconds in summary["steps"].items()]
+        run_metrics = [
+            ("run_wall_seconds", summary["wall_seconds"], "Duração total da última execução"),
+            ("run_success", int(summary["status"] == "ok"), "1 se a última execução terminou sem erros"),
+            ("run_timestamp_seconds", round(self.started_at), "Início da última execução (epoch)"),
+            ("run_peak_rss_bytes", summary["peak_rss_bytes"], "Pico de memória residente da última execução"),
+        ]
+        if summary["memory_limit_bytes"]:
+            run_metrics.append(
+                ("run_memory_limit_bytes", summary["memory_limit_bytes"], "Teto de memória do modo de memória limitada")
+            )
+        for metric, value, help_text in run_metrics:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_atomic(path, text):
+        # O node_exporter pode ler o arquivo a qualquer momento; ele só é substituído quando completo
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp_path, path)
+
+    def write(self, status=None):
+        """Grava last_run.json, acrescenta a execução a runs.jsonl e atualiza o textfile do Prometheus."""
+        summary = self.summary(status)
+        try:
+            self._write_atomic(os.path.join(self.metrics_dir, "last_run.json"), json.dumps(summary, indent=2))
+            with open(os.path.join(self.metrics_dir, "runs.jsonl"), "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(summary) + "\n")
+            self._write_atomic(self.textfile, self.prometheus_text(summary))
+            logging.info(f"Métricas da execução gravadas em {self.metrics_dir}")
+        except OSError as e:
+            logging.error(f"Erro ao gravar as métricas da execução: {e}")
+        return summary
@@ -1,22 +1,27 @@
 import os
-import io
 import logging
+import shutil
 import time
 from datetime import datetime
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import PyPDF2 # Ou sua biblioteca de manipulação de PDF, por exemplo, PyPDF2
 import requests
-import base64
 
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from google.oauth2 import service_account
+# Selenium, pandas, googleapiclient e fitz são importados só nas etapas que os usam,
+# para que a importação deste módulo seja rápida e não acesse a rede
+import drive_uploader
+
+from digest_pdf import build_digest_pdf
+from dou_fetcher import DOUFetcher
+from browser_pool import build_chrome_options
+from download_watcher import wait_for_download, wait_for_download_start
+from edition_cache import EditionCache
+from terms_loader import load_terms_matcher
+from pipeline import run_analysis
+from report_store import EDITION_DONE, ReportStore
+from report_utils import generate_report
+from term_matcher import TermMatcher
+from text_index import TextIndex, index_cached_edition
+from github_utils import GitHubBatchUploader
+from instrumentation import RunMetrics, SpanRecorder
 
 # --- Configuração de Logging ---
 # Configura o logging para exibir mensagens INFO e DEBUG no console
@@ -46,26 +51,25 @@ BRANCH = os.getenv("BRANCH", "main") # Padrão 'main' para o branch
 # Diretório para salvar arquivos temporários (PDFs e relatórios)
 OUTPUT_DIR = "output_files"
 PDF_DOWNLOAD_DIR = os.path.join(OUTPUT_DIR, "PDF") # Subdiretório para PDFs
-if not os.path.exists(PDF_DOWNLOAD_DIR):
-    os.makedirs(PDF_DOWNLOAD_DIR)
+# PDFs enviados ao GitHub: "digest" (só as páginas com ocorrências e o índice),
+# "full" (a edição inteira destacada) ou "both"
+PDF_UPLOAD_MODE = os.getenv("PDF_UPLOAD_MODE", "digest").lower()
+# Tempo máximo de espera pelo download do PDF pelo navegador, em segundos
+DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "300"))
 
 # --- Classes e Funções de Serviço ---
 
 class GoogleDriveService:
-    SCOPES = ["https://www.googleapis.com/auth/drive"]
+    SCOPES = drive_uploader.SCOPES
 
     def __init__(self):
         logging.info("Iniciando autenticação do serviço Google Drive...")
         try:
-            self.credentials = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_FILE, scopes=self.SCOPES)
-            # Sem delegação de domínio para uma conta @gmail.com padrão
-            # Se fosse Google Workspace com DWD, seria:
-            # DELEGATE_EMAIL = os.getenv("DELEGATE_EMAIL")
-            # if DELEGATE_EMAIL:
-            #     self.credentials = self.credentials.with_subject(DELEGATE_EMAIL)
-
-            self.service = build("drive", "v3", credentials=self.credentials)
+            # Credenciais e cliente vêm do módulo drive_uploader, compartilhados com os uploads
+            self.credentials = drive_uploader.get_credentials()
+            self.service = drive_uploader.get_service()
+            # Metadados de cada pasta de destino, reaproveitados entre os envios (feed de alterações)
+            self._metadata_caches = {}
             logging.info("Autenticação do serviço Google Drive concluída com sucesso.")
         except Exception as e:
             logging.error(f"Erro na autenticação do serviço Google Drive: {e}")
@@ -75,15 +79,7 @@ class GoogleDriveService:
         """Faz o download de um arquivo do Google Drive."""
         logging.info(f"Iniciando download do arquivo com ID: {file_id} para {dest_path}")
         try:
-            # supportsAllDrives=True é importante para Shared Drives
-            request = self.service.files().get_media(fileId=file_id, supportsAllDrives=True)
-            with io.FileIO(dest_path, "wb") as fh:
-                downloader = MediaIoBaseDownload(fh, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    if status:
-                        logging.info(f"Download {int(status.progress() * 100)}%.")
+            drive_uploader.download_file_from_drive(file_id, dest_path)
             logging.info(f"Download concluído para: {dest_path}")
             return True
         except Exception as e:
@@ -91,50 +87,94 @@ class GoogleDriveService:
             return False
 
     def list_files_in_folder(self, folder_id):
-        """Lista os arquivos em uma pasta específica do Google Drive."""
+        """Lista todos os arquivos de uma pasta específica do Google Drive (todas as páginas)."""
         logging.info(f"Listando arquivos na pasta: {folder_id}")
         try:
-            query = f"'{folder_id}' in parents"
-            results = self.service.files().list(
-                q=query,
-                pageSize=20,
-                fields="files(id, name)",
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True
-            ).execute()
-            files = results.get("files", [])
-            return files
+            return drive_uploader.list_files_in_folder(folder_id)
         except Exception as e:
             logging.error(f"Erro ao listar arquivos na pasta {folder_id}: {e}")
             return []
 
+    def existing_files(self, names, folder_id=None):
+        """
+        Retorna {nome: File ID} dos nomes que a pasta já tem, pelo cache de metadados
+        (atualizado pelo feed de alterações, sem listar a pasta de novo).
+        """
+        return {name: file["id"] for name, file in self._existing_metadata(names, folder_id).items()}
+
+    def _existing_metadata(self, names, folder_id=None):
+        folder_id = folder_id or DRIVE_FOLDER_ID
+        try:
+            cache = self._metadata_caches.get(folder_id)
+            if cache is None:
+                cache = self._metadata_caches[folder_id] = drive_uploader.DriveMetadataCache(folder_id)
+            cache.refresh()
+        except Exception as e:
+            logging.error(f"Erro ao consultar arquivos da pasta no Google Drive: {e}")
+            return {}
+        found = {name: cache.find_by_name(name) for name in names}
+        return {name: file for name, file in found.items() if file}
+
+    def _unchanged_files(self, paths, folder_id):
+        # {caminho: File ID} dos arquivos que a pasta já tem com o mesmo nome e o mesmo conteúdo (MD5)
+        existing = self._existing_metadata([os.path.basename(path) for path in paths], folder_id)
+        unchanged = {}
+        for path in paths:
+            file = existing.get(os.path.basename(path))
+            if file is None:
+                continue
+            if file.get("md5Checksum") == drive_uploader.file_md5(path):
+                unchanged[path] = file["id"]
+            else:
+                logging.info(f"{os.path.basename(path)} mudou desde o último envio; será enviado de novo")
+        return unchanged
+
+    def file_exists(self, name, folder_id=None):
+        """Verifica, pelo cache de metadados, se a pasta já tem um arquivo com esse nome."""
+        return name in self.existing_files([name], folder_id)
+
     def upload_file(self, file_path, mime_type="application/pdf", folder_id=None):
-        """Realiza o upload de um arquivo para o Google Drive."""
+        """
+        Realiza o upload resumível de um arquivo para o Google Drive. Se a pasta já tiver
+        o mesmo arquivo (mesmo nome e MD5, ex.: nova execução do mesmo dia), retorna o ID dele.
+        """
         target_folder_id = folder_id if folder_id else DRIVE_FOLDER_ID
         if not target_folder_id:
             logging.error("ID da pasta do Google Drive não definido para upload.")
             return None
 
+        unchanged = self._unchanged_files([file_path], target_folder_id)
+        if file_path in unchanged:
+            logging.info(f"{os.path.basename(file_path)} já está na pasta {target_folder_id}; upload ignorado")
+            return unchanged[file_path]
         logging.info(f"Iniciando upload do arquivo: {file_path} para pasta {target_folder_id}")
-        file_metadata = {
-            "name": os.path.basename(file_path),
-            "parents": [target_folder_id]
-        }
-        media = MediaFileUpload(file_path, mimetype=mime_type, resumable=True)
-
         try:
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields="id",
-                supportsAllDrives=True
-            ).execute()
-            logging.info(f"Upload concluído. File ID: {file.get('id')}")
-            return file.get("id")
+            return drive_uploader.upload_to_drive(file_path, mime_type, folder_id=target_folder_id).file_id
         except Exception as e:
             logging.error(f"Erro ao fazer upload do arquivo {file_path}: {e}")
             return None
 
+    def upload_files(self, file_paths, folder_id=None):
+        """
+        Envia vários arquivos em paralelo, exceto os que a pasta já tem com o mesmo
+        nome e o mesmo conteúdo. Retorna {caminho: File ID ou None}.
+        """
+        target_folder_id = folder_id if folder_id else DRIVE_FOLDER_ID
+        if not target_folder_id:
+            logging.error("ID da pasta do Google Drive não definido para upload.")
+            return {}
+        paths = [f if isinstance(f, str) else f[0] for f in file_paths]
+        file_ids = self._unchanged_files(paths, target_folder_id)
+        if file_ids:
+            logging.info(f"{len(file_ids)} arquivo(s) já estão na pasta {target_folder_id}; upload ignorado")
+        pending = [f for f, path in zip(file_paths, paths) if path not in file_ids]
+        results = drive_uploader.upload_many(pending, folder_id=target_folder_id) if pending else {}
+        file_ids.update(
+            (path, result.file_id if isinstance(result, drive_uploader.UploadResult) else None)
+            for path, result in results.items()
+        )
+        return file_ids
+
 class GitHubUploader:
     def __init__(self):
         self.github_token = GITHUB_TOKEN
@@ -146,86 +186,47 @@ class GitHubUploader:
             logging.error("Variáveis GITHUB_TOKEN, REPO_OWNER ou REPO_NAME não configuradas.")
             raise ValueError("Erro de configuração de variáveis do GitHub. Não é possível inicializar o uploader.")
 
-        self.headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        self.base_url = "https://api.github.com"
-
-    def github_api_request(self, endpoint, method="GET", data=None):
-        """Faz uma requisição à API REST do GitHub."""
-        url = f"{self.base_url}/{endpoint}"
-        logging.debug(f"{method} {url}")
-        response = requests.request(method, url, headers=self.headers, json=data)
-        response.raise_for_status() # Lança um erro para status de erro (4xx, 5xx)
-        return response.json()
+        self.batch = GitHubBatchUploader(
+            repo=f"{self.repo_owner}/{self.repo_name}", branch=self.branch, token=self.github_token
+        )
 
-    def upload_file(self, local_file_path, github_folder_path=""):
+    def upload_files(self, files, message=None):
         """
-        Realiza o upload de um arquivo local para um repositório GitHub.
-        Se o arquivo já existe, ele é atualizado.
+        Envia vários arquivos [(caminho_local, pasta_no_github)] em um único commit,
+        via Git Data API (blobs, tree, commit e atualização do branch).
         """
-        file_name = os.path.basename(local_file_path)
-        # Constrói o caminho completo no GitHub, incluindo a pasta
-        github_content_path = os.path.join(github_folder_path, file_name).replace("\\", "/")
-        logging.info(f"Enviando '{local_file_path}' para 'github.com/{self.repo_owner}/{self.repo_name}/{github_content_path}' no branch '{self.branch}'")
+        for local_file_path, github_folder_path in files:
+            file_name = os.path.basename(local_file_path)
+            github_content_path = os.path.join(github_folder_path, file_name).replace("\\", "/")
+            logging.info(f"Enviando '{local_file_path}' para 'github.com/{self.repo_owner}/{self.repo_name}/{github_content_path}' no branch '{self.branch}'")
+            self.batch.add(local_file_path, github_content_path)
 
+        names = ", ".join(os.path.basename(path) for path, _ in files)
         try:
-            with open(local_file_path, 'rb') as f:
-                content_bytes = f.read()
-            encoded_content = base64.b64encode(content_bytes).decode('utf-8')
-
-            sha = None
-            # Tenta obter o SHA do arquivo se ele já existe (para atualização)
-            try:
-                # O endpoint para buscar conteúdo é /repos/:owner/:repo/contents/:path
-                get_response = self.github_api_request(
-                    f"repos/{self.repo_owner}/{self.repo_name}/contents/{github_content_path}?ref={self.branch}",
-                    method="GET"
-                )
-                sha = get_response.get('sha')
-                logging.debug(f"Arquivo '{github_content_path}' encontrado no GitHub. SHA: {sha}")
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    logging.debug(f"Arquivo '{github_content_path}' não encontrado no GitHub. Será criado.")
-                    sha = None
-                else:
-                    logging.error(f"Erro inesperado ao verificar arquivo no GitHub: {e.response.json()}")
-                    return False
-            except Exception as e:
-                logging.error(f"Erro ao verificar arquivo no GitHub (erro geral): {e}")
-                return False
-
-            # Prepara os dados para a requisição PUT (criar/atualizar)
-            commit_message = f"Adiciona {file_name} via ScraperDOU" if not sha else f"Atualiza {file_name} via ScraperDOU"
-            data = {
-                "message": commit_message,
-                "content": encoded_content,
-                "branch": self.branch
-            }
-            if sha:
-                data["sha"] = sha # Necessário para atualizar um arquivo existente
-
-            # Realiza o upload (PUT)
-            upload_response = self.github_api_request(
-                f"repos/{self.repo_owner}/{self.repo_name}/contents/{github_content_path}",
-                method="PUT",
-                data=data
-            )
-            logging.info(f"Upload de '{file_name}' para o GitHub concluído. Commit SHA: {upload_response.get('commit', {}).get('sha')}")
+            commit_sha = self.batch.commit(message or f"Adiciona {names} via ScraperDOU")
+            logging.info(f"Upload para o GitHub concluído. Commit SHA: {commit_sha}")
             return True
-
         except requests.exceptions.HTTPError as e:
-            logging.error(f"Erro HTTP ao enviar '{file_name}' para o GitHub: {e.response.status_code} - {e.response.json()}")
-            return False
+            logging.error(f"Erro HTTP ao enviar '{names}' para o GitHub: {e.response.status_code} - {e.response.text}")
         except Exception as e:
-            logging.error(f"Erro geral ao enviar '{file_name}' para o GitHub: {e}")
-            return False
+            logging.error(f"Erro geral ao enviar '{names}' para o GitHub: {e}")
+        self.batch.files = []
+        return False
+
+    def upload_file(self, local_file_path, github_folder_path=""):
+        """
+        Realiza o upload de um arquivo local para um repositório GitHub.
+        Se o arquivo já existe, ele é atualizado.
+        """
+        return self.upload_files([(local_file_path, github_folder_path)])
 
 # --- Funções de Manipulação de Arquivos e Lógica do DOU ---
 
 def cleanup_local_files(directory):
-    """Remove todos os arquivos do diretório especificado."""
+    """
+    Remove os arquivos temporários do diretório especificado.
+    Subdiretórios são preservados; o cache de edições (DOU_CACHE_DIR) não é tocado.
+    """
     logging.info(f"Executando limpeza dos arquivos locais em: {directory}")
     for filename in os.listdir(directory):
         file_path = os.path.join(directory, filename)
@@ -240,104 +241,72 @@ def cleanup_local_files(directory):
         except Exception as e:
             logging.error(f"Falha ao remover {file_path}. Razão: {e}")
 
-def get_dou_date_str():
-    """Retorna a data atual no formato YYYY_MM_DD."""
-    return datetime.now().strftime("%Y_%m_%d")
+def get_dou_date_str(date=None):
+    """Retorna a data informada (ou a atual) no formato YYYY_MM_DD."""
+    return (date or datetime.now()).strftime("%Y_%m_%d")
 
-def get_dou_pdf_filename(date_str):
+def get_dou_pdf_filename(date_str, section="do1"):
     """Retorna o nome esperado do arquivo PDF do DOU."""
     # O nome real do arquivo baixado pode variar, mas usaremos este para renomear/identificar
-    return f"{date_str}_ASSINADO_do1.pdf"
-
-def setup_chrome_options(download_dir):
-    """Configura as opções do Chrome para download automático de PDFs."""
-    # Garante que o diretório usado pelo Chrome seja absoluto
-    abs_download_dir = os.path.abspath(download_dir)
-
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Roda o navegador em modo headless
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-software-rasterizer")
-    chrome_options.add_argument("--disable-dev-tools")
-    chrome_options.add_argument("--remote-debugging-port=9222")
-
-    # Preferências de download
-    prefs = {
-        "download.default_directory": abs_download_dir,
-        "download.prompt_for_download": False,
-        "plugins.always_open_pdf_externally": True,
-        "download.directory_upgrade": True,
-        "safeBrowse.enabled": True,
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-    return chrome_options
-
-def download_dou_pdf(driver, date_str, download_dir):
-    """Navega no site do DOU e baixa o PDF."""
+    return f"{date_str}_ASSINADO_{section}.pdf"
+
+def setup_chrome_options(download_dir, port=None):
+    """
+    Configura as opções do Chrome para download automático de PDFs.
+    Sem `port`, a porta de depuração é uma porta livre, para permitir navegadores simultâneos.
+    """
+    return build_chrome_options(download_dir, port)
+
+def download_dou_pdf(driver, date_str, download_dir, page_url=None, timings=None):
+    """
+    Navega no site do DOU (ou na página da edição em `page_url`) e baixa o PDF.
+    O tempo de cada passo é registrado em `timings` (SpanRecorder).
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
     logging.info("Iniciando navegação e download do PDF")
-    dou_url = "https://www.in.gov.br/leiturajornal"
-    
+    dou_url = page_url or "https://www.in.gov.br/leiturajornal"
+    timings = timings or SpanRecorder()
+    original_window = None
+
     try:
         logging.info(f"Acessando a página do DOU: {dou_url}")
-        driver.get(dou_url)
-        # Define o tamanho da janela para garantir que elementos estejam visíveis
-        driver.set_window_size(1024, 768)
-        
-        # Espera pelo botão do diário completo
+        download_started = time.time()
         wait = WebDriverWait(driver, 30)
-        btn_diario_completo = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn-diario-completo"))
-        )
-        
-        logging.info("Tentando clicar em .btn-diario-completo")
-        # Rola o elemento para a visualização antes de clicar
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn_diario_completo)
-        btn_diario_completo.click()
-        
-        # Espera pela nova janela/aba do PDF
-        # Obtém todas as janelas/abas abertas
-        window_handles = driver.window_handles
-        # Troca para a nova janela/aba (geralmente a última)
-        driver.switch_to.window(window_handles[-1])
-        
+        with timings.span("page_load"):
+            driver.get(dou_url)
+            original_window = driver.current_window_handle
+            # Define o tamanho da janela para garantir que elementos estejam visíveis
+            driver.set_window_size(1024, 768)
+            # Espera pelo botão do diário completo
+            btn_diario_completo = wait.until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ".btn-diario-completo"))
+            )
+
+        with timings.span("click"):
+            logging.info("Tentando clicar em .btn-diario-completo")
+            # Rola o elemento para a visualização antes de clicar
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn_diario_completo)
+            btn_diario_completo.click()
+
+        # Troca para a nova janela/aba do PDF, se houver (geralmente a última)
+        with timings.span("new_window"):
+            driver.switch_to.window(driver.window_handles[-1])
+
+        with timings.span("download_start"):
+            if not wait_for_download_start(download_dir, timeout=60, since=download_started):
+                return None
+
         logging.info("Esperando a conclusão do download")
-        
-        # Espera até que o arquivo PDF apareça no diretório de download
-        downloaded_file = None
-        start_time = time.time()
-        timeout = 300000  # 2 minutos de timeout para o download
-
-        while time.time() - start_time < timeout:
-            list_of_files = [f for f in os.listdir(download_dir) if f.endswith(".pdf")]
-            logging.info(f"Arquivos PDF encontrados: {list_of_files}")
-            if list_of_files:
-                # Usa o arquivo PDF mais recente encontrado
-                list_of_files.sort(key=lambda f: os.path.getmtime(os.path.join(download_dir, f)), reverse=True)
-                downloaded_file = os.path.join(download_dir, list_of_files[0])
-                # Espera até que o download esteja completo (tamanho do arquivo não mude)
-                current_size = -1
-                for _ in range(10): # Checa 10 vezes com 1 segundo de intervalo
-                    time.sleep(1)
-                    if os.path.exists(downloaded_file):
-                        new_size = os.path.getsize(downloaded_file)
-                        if new_size == current_size and new_size > 0:
-                            logging.info(f"Download finalizado: {downloaded_file}")
-                            return downloaded_file
-                        current_size = new_size
-                    else:
-                        logging.warning(f"Arquivo {downloaded_file} ainda não existe após {_+1}s.")
-                logging.warning(f"Download de {downloaded_file} parece não ter terminado após o tempo de espera de estabilidade.")
-                if os.path.exists(downloaded_file) and os.path.getsize(downloaded_file) > 0:
-                     logging.info(f"Download parece estar Ok, tamanho: {os.path.getsize(downloaded_file)} bytes")
-                     return downloaded_file
-                break # Sai do loop se o arquivo não estiver estável
-
-            time.sleep(2) # Espera antes de verificar novamente
-        
+
+        # Retorna assim que o navegador renomear o .crdownload para o PDF final
+        with timings.span("download_end"):
+            result = wait_for_download(download_dir, timeout=DOWNLOAD_TIMEOUT, since=download_started)
+        if result:
+            return result.path
+
         logging.error("Timeout ou falha ao baixar o PDF do DOU.")
         return None
 
@@ -346,108 +315,56 @@ def download_dou_pdf(driver, date_str, download_dir):
         return None
     finally:
         # Volta para a janela original antes de fechar o driver se houver múltiplas abas
-        if len(driver.window_handles) > 1:
-            driver.switch_to.window(window_handles[0])
+        if original_window and len(driver.window_handles) > 1:
+            driver.switch_to.window(original_window)
 
 
-def analyze_and_highlight_pdf(pdf_path, terms_df, output_dir):
-    """
-    Simula a análise e destaque do PDF.
-    Você precisará implementar a lógica real de leitura e manipulação do PDF aqui.
-    Para este exemplo, apenas cria um arquivo de saída simulado.
-    """
-    logging.info(f"Iniciando análise do PDF: {pdf_path}")
-    output_pdf_path = os.path.join(output_dir, os.path.basename(pdf_path).replace(".pdf", "_highlighted.pdf"))
-    
-    try:
-        # AQUI VOCÊ IMPLEMENTARIA A LÓGICA REAL:
-        # 1. Carregar o PDF (ex: PyPDF2.PdfReader)
-        # 2. Extrair texto
-        # 3. Iterar pelos termos em terms_df
-        # 4. Destacar termos no PDF (PyPDF2 não faz destaque visual diretamente,
-        #    você precisaria de bibliotecas como reportlab ou PyMuPDF/fitz)
-        #    Para um destaque visual complexo, PyMuPDF (fitz) é a melhor opção.
-        #    Se você está apenas buscando texto, PyPDF2 é suficiente.
-
-        # Exemplo simulado: Apenas copia o arquivo e adiciona um "_highlighted"
-        # Isso NÃO faz o destaque real, apenas simula a criação do arquivo de saída.
-        with open(pdf_path, 'rb') as infile:
-            with open(output_pdf_path, 'wb') as outfile:
-                outfile.write(infile.read())
-        
-        logging.info(f"PDF com destaque simulado criado: {output_pdf_path}")
-        return output_pdf_path
-    except Exception as e:
-        logging.error(f"Erro ao analisar/destacar PDF: {e}")
-        return None
+def download_dou_pdf_with_browser_pool(browser_pool, date_str, dest_path, page_url=None, timings=None):
+    """Baixa o PDF com um navegador emprestado do pool e o move para `dest_path`."""
+    with browser_pool.lease() as browser:
+        downloaded_pdf_path = download_dou_pdf(browser.driver, date_str, browser.download_dir, page_url, timings)
+        if not downloaded_pdf_path:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        shutil.move(downloaded_pdf_path, dest_path)
+    return dest_path
 
-def generate_search_report(terms_df, output_dir):
+
+def download_dou_pdf_with_fallback(date_str, fetcher=None, edition_date=None, browser_pool=None, timings=None):
     """
-    Simula a geração de um relatório de pesquisa.
-    Você precisaria implementar a lógica real para criar este relatório.
+    Baixa o PDF por HTTP e, se falhar, pelo navegador (um do `browser_pool`, se informado,
+    ou um iniciado só para este download). Os passos do navegador são medidos em `timings`.
+    Retorna o caminho ou None.
     """
-    logging.info("Gerando relatório de pesquisa...")
-    report_path = os.path.join(output_dir, "search_report.xlsx")
-    
-    try:
-        # Exemplo: Apenas salva o DataFrame de termos como um relatório (simulado)
-        terms_df.to_excel(report_path, index=False)
-        logging.info(f"Relatório de pesquisa simulado criado: {report_path}")
-        return report_path
-    except Exception as e:
-        logging.error(f"Erro ao gerar relatório de pesquisa: {e}")
-        return None
-
-# --- Função Principal ---
-
-def main():
-    logging.info("Iniciando o processo de scraping e upload")
-
-    google_drive_service = None
-    try:
-        google_drive_service = GoogleDriveService()
-    except ValueError as e:
-        logging.error(f"Erro fatal ao inicializar o serviço Google Drive: {e}")
-        exit(1) # Sai se a autenticação do Drive falhar
-
-    github_uploader = None
-    try:
-        github_uploader = GitHubUploader()
-    except ValueError as e:
-        logging.error(f"Erro fatal ao inicializar o uploader do GitHub: {e}")
-        # Decida se você quer sair aqui ou apenas pular o upload para o GitHub
-        exit(1) # Sai se o GitHub uploader não puder ser configurado
-
-    # --- 1. Baixar a planilha de termos do Google Drive ---
-    terms_df = pd.DataFrame() # DataFrame vazio por padrão
-    if TERMS_FILE_ID:
-        logging.info(f"Lendo a planilha de termos do Google Drive (ID: {TERMS_FILE_ID})")
-        local_terms_path = os.path.join(OUTPUT_DIR, "termos.xlsx")
-        if google_drive_service.download_file(TERMS_FILE_ID, local_terms_path):
-            try:
-                terms_df = pd.read_excel(local_terms_path)
-                logging.info(f"Planilha de termos lida com sucesso. {len(terms_df)} termos encontrados.")
-            except Exception as e:
-                logging.error(f"Erro ao ler a planilha Excel baixada: {e}")
-        else:
-            logging.error("Falha ao baixar a planilha de termos do Google Drive. Prosseguindo sem termos.")
-    else:
-        logging.warning("TERMS_FILE_ID não definido. Não será possível ler a planilha de termos do Google Drive.")
-        # Opcional: Crie um DataFrame de termos de exemplo se não houver um arquivo
-        terms_df = pd.DataFrame({'Termo': ['exemplo', 'teste']})
-        logging.info("Usando termos de exemplo.")
+    fetcher = fetcher or DOUFetcher()
+    dest_path = os.path.join(PDF_DOWNLOAD_DIR, get_dou_pdf_filename(date_str))
+    downloaded_pdf_path = fetcher.fetch_pdf(dest_path, edition_date)
+    if downloaded_pdf_path:
+        logging.info(f"PDF do DOU baixado por HTTP para: {downloaded_pdf_path}")
+        return downloaded_pdf_path
+
+    logging.warning("Download por HTTP falhou. Usando o navegador como alternativa.")
+    page_url = fetcher.edition_page_url(edition_date) if edition_date else None
+    if browser_pool:
+        try:
+            downloaded_pdf_path = download_dou_pdf_with_browser_pool(
+                browser_pool, date_str, dest_path, page_url, timings
+            )
+        except Exception as e:
+            logging.error(f"Erro fatal durante a operação do Selenium: {e}")
+        if not downloaded_pdf_path:
+            logging.error("Não foi possível baixar o PDF do DOU. Verifique os logs do Selenium.")
+        return downloaded_pdf_path
 
+    from selenium import webdriver
 
-    # --- 2. Configurar Selenium e baixar PDF do DOU ---
     driver = None
-    downloaded_pdf_path = None
     try:
         chrome_options = setup_chrome_options(PDF_DOWNLOAD_DIR)
         # O Selenium Manager já deve lidar com o driver no GitHub Actions
         driver = webdriver.Chrome(options=chrome_options)
-        
-        today_date_str = get_dou_date_str()
-        downloaded_pdf_path = download_dou_pdf(driver, today_date_str, PDF_DOWNLOAD_DIR)
+
+        downloaded_pdf_path = download_dou_pdf(driver, date_str, PDF_DOWNLOAD_DIR, page_url, timings)
 
         if downloaded_pdf_path:
             logging.info(f"PDF do DOU baixado para: {downloaded_pdf_path}")
@@ -460,42 +377,187 @@ def main():
         if driver:
             logging.info("Fechando navegador")
             driver.quit()
+    return downloaded_pdf_path
+
+
+def analyze_and_highlight_pdf(pdf_path, matcher, output_pdf_path, edition_cache=None, metrics=None):
+    """
+    Analisa o PDF e grava a cópia com os termos destacados.
+    As páginas passam uma a uma por extração, busca e destaque (ver pipeline.py).
+    Retorna a lista de ocorrências (Setor, Termo, Página) ou None em caso de erro.
+    """
+    logging.info(f"Iniciando análise do PDF: {pdf_path}")
+    try:
+        findings = run_analysis(pdf_path, matcher, output_pdf_path, edition_cache=edition_cache, metrics=metrics)
+        logging.info(f"Análise concluída: {len(findings)} ocorrências encontradas")
+        return findings
+    except Exception as e:
+        logging.error(f"Erro ao analisar/destacar PDF: {e}")
+        return None
+
+def generate_digest_pdf(highlighted_pdf_path, findings, edition_date):
+    """Grava o PDF resumido (páginas com ocorrências e índice) ao lado do PDF destacado."""
+    logging.info("Gerando PDF resumido...")
+    try:
+        return build_digest_pdf(
+            highlighted_pdf_path, findings, highlighted_pdf_path.replace("_highlighted.pdf", "_digest.pdf"),
+            title=f"Ocorrências no DOU de {edition_date:%d/%m/%Y}",
+        )
+    except Exception as e:
+        logging.error(f"Erro ao gerar PDF resumido: {e}")
+        return None
+
+def generate_search_report(findings, output_dir, edition_date, section="do1", terms_version="", store=None):
+    """Grava as ocorrências no histórico e exporta o relatório da edição em Excel."""
+    logging.info("Gerando relatório de pesquisa...")
+    try:
+        return generate_report(
+            output_dir, findings, edition_date=edition_date.isoformat(), section=section, store=store,
+            terms_version=terms_version,
+        )
+    except Exception as e:
+        logging.error(f"Erro ao gerar relatório de pesquisa: {e}")
+        return None
+
+def index_edition_text(text_index, edition_cache, pdf_path, edition_date, section="do1"):
+    """Grava o texto da edição no índice de busca; retorna o número de trechos indexados."""
+    logging.info("Indexando o texto da edição...")
+    try:
+        return index_cached_edition(text_index, edition_cache, pdf_path, edition_date, section)
+    except Exception as e:
+        logging.error(f"Erro ao indexar o texto da edição: {e}")
+        return None
+
+# --- Função Principal ---
+
+def load_matcher(google_drive_service):
+    """Carrega o TermMatcher da planilha de termos do Google Drive (só baixa se tiver mudado)."""
+    if TERMS_FILE_ID:
+        logging.info(f"Lendo a planilha de termos do Google Drive (ID: {TERMS_FILE_ID})")
+        matcher = load_terms_matcher(google_drive_service, TERMS_FILE_ID)
+        if not matcher:
+            logging.error("Falha ao obter a planilha de termos do Google Drive. Prosseguindo sem termos.")
+        return matcher
+    logging.warning("TERMS_FILE_ID não definido. Não será possível ler a planilha de termos do Google Drive.")
+    # Termos de exemplo quando não há planilha
+    logging.info("Usando termos de exemplo.")
+    return TermMatcher([(None, 'exemplo'), (None, 'teste')])
+
+
+def process_edition(edition_date, matcher, github_uploader, fetcher=None, edition_cache=None, metrics=None,
+                    text_index=None, store=None):
+    """
+    Baixa (ou lê do cache), analisa, indexa e publica os resultados da edição do dia informado.
+    O tempo e os recursos de cada etapa vão para `metrics` (RunMetrics), gravado ao final.
+    Retorna True só quando as ocorrências e o registro da edição estão gravados no histórico
+    (ReportStore); sem o PDF ou sem termos para procurar, a edição não conta como processada.
+    """
+    os.makedirs(PDF_DOWNLOAD_DIR, exist_ok=True)
+    edition_date_str = get_dou_date_str(edition_date)
+    metrics = metrics or RunMetrics()
+    store = store or ReportStore()
+    recorded = False
+
+    # --- 2. Baixar PDF do DOU (cache local, HTTP direto e Selenium como alternativa) ---
+    edition_cache = edition_cache or EditionCache()
+    with metrics.stage("fetch") as stage:
+        downloaded_pdf_path = edition_cache.lookup(edition_date)
+        if not downloaded_pdf_path:
+            downloaded_pdf_path = download_dou_pdf_with_fallback(
+                edition_date_str, fetcher, edition_date, timings=metrics
+            )
+            if downloaded_pdf_path:
+                stage.add(items=1, bytes_in=os.path.getsize(downloaded_pdf_path))
+                # Guarda a edição no cache; novas execuções do dia não baixam de novo
+                downloaded_pdf_path = edition_cache.store_pdf(downloaded_pdf_path, edition_date)
+            else:
+                stage.status = "error"
 
     # --- 3. Analisar e Destaque PDF (se baixado) ---
     highlighted_pdf_path = None
-    if downloaded_pdf_path and not terms_df.empty:
-        highlighted_pdf_path = analyze_and_highlight_pdf(downloaded_pdf_path, terms_df, PDF_DOWNLOAD_DIR)
-        if highlighted_pdf_path:
+    digest_pdf_path = None
+    report_xlsx_path = None
+    if downloaded_pdf_path and matcher and matcher.entries:
+        highlighted_pdf_path = os.path.join(
+            PDF_DOWNLOAD_DIR, get_dou_pdf_filename(edition_date_str).replace(".pdf", "_highlighted.pdf")
+        )
+        findings = analyze_and_highlight_pdf(
+            downloaded_pdf_path, matcher, highlighted_pdf_path, edition_cache, metrics
+        )
+        if findings is not None:
             logging.info(f"PDF com destaque salvo localmente em: {highlighted_pdf_path}")
+
+            # --- 3b. PDF resumido: só as páginas com ocorrências ---
+            with metrics.stage("digest") as stage:
+                digest_pdf_path = generate_digest_pdf(highlighted_pdf_path, findings, edition_date)
+                if digest_pdf_path:
+                    stage.add(items=len({finding[2] for finding in findings}),
+                              bytes_out=os.path.getsize(digest_pdf_path))
+                else:
+                    stage.status = "error"
+
+            # --- 4. Gerar Relatório de Pesquisa ---
+            with metrics.stage("report") as stage:
+                report_xlsx_path = generate_search_report(
+                    findings, OUTPUT_DIR, edition_date, terms_version=matcher.version, store=store
+                )
+                # O Excel é só uma exportação; o que conta é o registro da edição no histórico
+                day = edition_date.isoformat()
+                recorded = store.processed_editions(day, day, matcher.version).get((day, "do1")) == EDITION_DONE
+                if report_xlsx_path:
+                    stage.add(items=len(findings), bytes_out=os.path.getsize(report_xlsx_path))
+                else:
+                    stage.status = "error"
+            if report_xlsx_path:
+                logging.info(f"Relatório de pesquisa salvo localmente em: {report_xlsx_path}")
+            else:
+                logging.error("Falha ao gerar relatório de pesquisa.")
         else:
+            highlighted_pdf_path = None
             logging.error("Falha ao criar PDF com destaque.")
 
-    # --- 4. Gerar Relatório de Pesquisa ---
-    report_xlsx_path = generate_search_report(terms_df, OUTPUT_DIR)
-    if report_xlsx_path:
-        logging.info(f"Relatório de pesquisa salvo localmente em: {report_xlsx_path}")
-    else:
-        logging.error("Falha ao gerar relatório de pesquisa.")
+    # --- 4b. Indexar o texto da edição (lido do cache; não abre o PDF de novo) ---
+    if downloaded_pdf_path:
+        text_index = text_index or TextIndex()
+        with metrics.stage("index") as stage:
+            indexed = index_edition_text(text_index, edition_cache, downloaded_pdf_path, edition_date)
+            if indexed is None:
+                stage.status = "error"
+            else:
+                stage.add(items=indexed)
 
-    # --- 5. Upload para o GitHub ---
+    # --- 5. Upload para o GitHub (todos os arquivos em um único commit) ---
     if github_uploader: # Verifica se o uploader foi inicializado com sucesso
-        if highlighted_pdf_path:
-            logging.info(f"Enviando PDF destacado para o GitHub: {highlighted_pdf_path}")
-            if github_uploader.upload_file(highlighted_pdf_path, github_folder_path="PDFs"): # Salva em uma pasta 'PDFs' no GitHub
-                logging.info(f"PDF com destaque salvo no GitHub: {highlighted_pdf_path}")
-            else:
-                logging.error(f"Falha ao enviar PDF com destaque para o GitHub: {highlighted_pdf_path}")
+        uploads = []
+        pdf_paths = []
+        if PDF_UPLOAD_MODE in ("digest", "both") and digest_pdf_path:
+            pdf_paths.append(digest_pdf_path)
+        if PDF_UPLOAD_MODE in ("full", "both") or not digest_pdf_path:
+            # Sem o resumo (erro ao gerá-lo), a edição destacada inteira vai no lugar
+            pdf_paths.append(highlighted_pdf_path)
+        pdf_paths = [path for path in pdf_paths if path]
+        if pdf_paths:
+            uploads.extend((path, "PDFs") for path in pdf_paths) # Salva em uma pasta 'PDFs' no GitHub
         else:
             logging.warning("Nenhum PDF destacado para enviar para o GitHub.")
-
         if report_xlsx_path:
-            logging.info(f"Enviando relatório para o GitHub: {report_xlsx_path}")
-            if github_uploader.upload_file(report_xlsx_path, github_folder_path="Reports"): # Salva em uma pasta 'Reports' no GitHub
-                logging.info(f"Relatório salvo no GitHub: {report_xlsx_path}")
-            else:
-                logging.error(f"Falha ao enviar relatório para o GitHub: {report_xlsx_path}")
+            uploads.append((report_xlsx_path, "Reports")) # Salva em uma pasta 'Reports' no GitHub
         else:
             logging.warning("Nenhum relatório para enviar para o GitHub.")
+
+        if uploads:
+            logging.info(f"Enviando {len(uploads)} arquivo(s) para o GitHub")
+            with metrics.stage("upload") as stage:
+                uploaded = github_uploader.upload_files(
+                    uploads, message=f"Adiciona resultados do DOU de {edition_date_str} via ScraperDOU"
+                )
+                stage.add(items=len(uploads), bytes_out=sum(os.path.getsize(path) for path, _ in uploads))
+                if not uploaded:
+                    stage.status = "error"
+            if uploaded:
+                logging.info("Arquivos salvos no GitHub")
+            else:
+                logging.error("Falha ao enviar arquivos para o GitHub")
     else:
         logging.error("Uploader do GitHub não disponível. Pulando uploads para o GitHub.")
 
@@ -503,6 +565,35 @@ def main():
     logging.info("Executando limpeza final")
     cleanup_local_files(PDF_DOWNLOAD_DIR)
     cleanup_local_files(OUTPUT_DIR) # Limpa a pasta principal de output também, para o relatório e termos.xlsx
+    metrics.write()
+    return recorded
+
+
+def main():
+    logging.info("Iniciando o processo de scraping e upload")
+
+    google_drive_service = None
+    try:
+        google_drive_service = GoogleDriveService()
+    except ValueError as e:
+        logging.error(f"Erro fatal ao inicializar o serviço Google Drive: {e}")
+        exit(1) # Sai se a autenticação do Drive falhar
+
+    github_uploader = None
+    try:
+        github_uploader = GitHubUploader()
+    except ValueError as e:
+        logging.error(f"Erro fatal ao inicializar o uploader do GitHub: {e}")
+        # Decida se você quer sair aqui ou apenas pular o upload para o GitHub
+        exit(1) # Sai se o GitHub uploader não puder ser configurado
+
+    # --- 1. Carregar a planilha de termos do Google Drive (só baixa se tiver mudado) ---
+    metrics = RunMetrics()
+    with metrics.stage("terms_load") as stage:
+        matcher = load_matcher(google_drive_service)
+        stage.add(items=len(matcher.entries) if matcher else 0)
+
+    process_edition(datetime.now().date(), matcher, github_uploader, metrics=metrics)
     logging.info("Processo finalizado")
 
 if __name__ == "__main__":
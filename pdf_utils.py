@@ -1,27 +1,240 @@
 # pdf_utils.py
-import fitz
+import os
+from bisect import bisect_left, bisect_right
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-def search_terms_in_pdf(pdf_path, terms_df):
+from act_segmenter import ActSegment, assign_acts, page_segments
+from term_matcher import TermMatcher
+from text_utils import build_word_index
+
+# Número de processos usados na extração de texto (0 = um por núcleo disponível)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0"))
+# Faixas de páginas em andamento ou prontas à espera do consumidor, por processo de extração
+EXTRACTION_PREFETCH = int(os.getenv("EXTRACTION_PREFETCH", "2"))
+
+# Palavras de contexto mantidas de cada lado de uma ocorrência no trecho do relatório
+SNIPPET_WORDS = int(os.getenv("SNIPPET_WORDS", "12"))
+
+# Conteúdo extraído de uma página; `number` começa em 1. `words` e `acts` (os atos da
+# página, ActSegment) só vêm preenchidos quando as palavras são solicitadas
+PageContent = namedtuple("PageContent", ["number", "text", "words", "acts"], defaults=(None, None))
+
+def _iter_page_range(pdf_path, start, stop, with_words):
+    # O fitz lê o arquivo sob demanda; cada página é liberada assim que a próxima é carregada
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            page = doc.load_page(page_num)
+            if not with_words:
+                yield PageContent(page_num + 1, page.get_text())
+                continue
+            # Palavras e fontes saem da mesma TextPage, para que os números de bloco e linha coincidam
+            textpage = page.get_textpage()
+            words = page.get_text("words", textpage=textpage)
+            segments = page_segments(page, textpage, words)
+            yield PageContent(page_num + 1, page.get_text(textpage=textpage), words, segments)
+
+def _extract_page_range(pdf_path, start, stop, with_words):
+    # Executado nos processos filhos: cada um abre o seu próprio fitz.Document
+    return list(_iter_page_range(pdf_path, start, stop, with_words))
+
+def iter_pdf_pages(pdf_path, workers=None, with_words=False):
+    """
+    Extrai o texto (e opcionalmente as palavras com coordenadas e os atos) de
+    cada página, dividindo o documento em faixas de páginas processadas em paralelo.
+    As páginas são entregues em ordem, à medida que cada faixa fica pronta.
+    """
+    pages = _iter_page_ranges(pdf_path, workers, with_words)
+    # Os identificadores dos atos dependem das páginas anteriores, então são dados aqui, em ordem
+    return assign_acts(pages) if with_words else pages
+
+def _iter_page_ranges(pdf_path, workers, with_words):
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    workers = min(workers or EXTRACTION_WORKERS or os.cpu_count() or 1, page_count)
+
+    if workers <= 1:
+        # No próprio processo, uma página por vez: a memória não cresce com o tamanho da edição
+        yield from _iter_page_range(pdf_path, 0, page_count, with_words)
+        return
+
+    # Faixas menores que página/worker equilibram a carga entre páginas densas e vazias
+    chunk_size = max(1, -(-page_count // (workers * 4)))
+    starts = range(0, page_count, chunk_size)
+    ranges = iter(zip(starts, (min(start + chunk_size, page_count) for start in starts)))
+    # Só `workers * EXTRACTION_PREFETCH` faixas são submetidas de cada vez: com um consumidor
+    # lento, as páginas extraídas não se acumulam na memória à espera dele
+    window = workers * max(EXTRACTION_PREFETCH, 1)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(executor.submit(_extract_page_range, pdf_path, start, stop, with_words))
+            if len(pending) >= window:
+                break
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(executor.submit(_extract_page_range, pdf_path, *next_range, with_words))
+            yield from pages
+    finally:
+        # Se o consumidor parar antes do fim, as faixas ainda não iniciadas são descartadas
+        executor.shutdown(cancel_futures=True)
+
+def extract_pdf_pages(pdf_path, workers=None, with_words=False):
+    """Retorna a lista de PageContent de todas as páginas, em ordem."""
+    return list(iter_pdf_pages(pdf_path, workers=workers, with_words=with_words))
+
+def _match_rects(words, starts, ends, start, end):
+    # Retângulos das palavras cobertas pelo trecho [start, end) do texto normalizado,
+    # recortados proporcionalmente quando a ocorrência cobre só parte da palavra
+    rects = []
+    first = bisect_right(starts, start) - 1
+    last = bisect_left(starts, end) - 1
+    for i in range(max(first, 0), last + 1):
+        covered_start = max(start, starts[i])
+        covered_end = min(end, ends[i])
+        if covered_end <= covered_start:
+            continue
+        x0, y0, x1, y1 = words[i][:4]
+        length = ends[i] - starts[i]
+        width = x1 - x0
+        rects.append((
+            x0 + width * (covered_start - starts[i]) / length,
+            y0,
+            x0 + width * (covered_end - starts[i]) / length,
+            y1,
+        ))
+    return rects
+
+def _snippet(words, starts, start, end):
+    # Palavras originais (com acentos) em volta da ocorrência, dentro do mesmo ato
+    first = max(bisect_right(starts, start) - 1 - SNIPPET_WORDS, 0)
+    last = min(bisect_left(starts, end) + SNIPPET_WORDS, len(words))
+    text = " ".join(word[4] for word in words[first:last])
+    return ("… " if first > 0 else "") + text + (" …" if last < len(words) else "")
+
+def analyze_page(matcher, page):
+    """
+    Procura os termos em cada ato de uma página extraída com palavras e retorna
+    os Findings e a lista de ocorrências, cada uma com os seus retângulos.
+    Cada termo é informado uma vez por ato, com o identificador, título e órgão
+    do ato e um trecho do texto em volta da primeira ocorrência.
+    """
+    # Páginas sem a divisão em atos são tratadas como um único trecho
+    acts = page.acts or [ActSegment(None, 0, len(page.words), None, None)]
     findings = []
-    doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        page_text = page.get_text()
-        for _, row in terms_df.iterrows():
-            term = row['Termo']
-            sector = row['Setor']
-            if term.lower() in page_text.lower():
-                findings.append((sector, term, page_num + 1))
+    matches = []
+    seen = set()
+    for act in acts:
+        words = page.words[act.start:act.end]
+        text, starts, ends = build_word_index(words)
+        spans = matcher.match_spans(text)
+        if not spans:
+            continue
+        act_findings = matcher.span_findings(text, spans, page.number)
+        # Só as ocorrências que satisfazem alguma linha são destacadas (não as de um NOT,
+        # nem as de uma regra que não se completou no ato)
+        highlighted = sorted({span for _, entry_spans in act_findings for span in entry_spans})
+        matches.extend(_match_rects(words, starts, ends, start, end) for start, end in highlighted)
+        for finding, ((start, end), *_) in act_findings:
+            # Um ato interrompido pelo rodapé ou por outra coluna aparece em mais de um trecho
+            key = (finding.sector, finding.term, act.act_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            findings.append(finding._replace(
+                act_id=act.act_id, act_title=act.title, act_organ=act.organ,
+                snippet=_snippet(words, starts, start, end),
+            ))
+    return findings, matches
+
+def analyze_pdf(pdf_path, terms_df=None, matcher=None, whole_words=False, workers=None, pages=None):
+    """
+    Faz a busca em uma única passada pelo documento, registrando também onde
+    cada ocorrência está. Retorna (findings, highlights), em que highlights é
+    {página: [retângulos de cada ocorrência]} pronto para highlight_terms_in_pdf.
+    `pages` permite reaproveitar páginas já extraídas (por exemplo, do cache de edições).
+    """
+    # O matcher pode ser compilado uma vez e reutilizado entre PDFs da mesma execução
+    matcher = matcher or TermMatcher.from_dataframe(terms_df, whole_words=whole_words)
+    findings = []
+    highlights = {}
+    if pages is None:
+        pages = iter_pdf_pages(pdf_path, workers=workers, with_words=True)
+    for page in pages:
+        page_findings, matches = analyze_page(matcher, page)
+        if page_findings:
+            findings.extend(page_findings)
+            highlights[page.number] = matches
+    return findings, highlights
+
+def search_terms_in_pdf(pdf_path, terms_df, matcher=None, whole_words=False, workers=None, pages=None):
+    findings, _ = analyze_pdf(
+        pdf_path, terms_df, matcher=matcher, whole_words=whole_words, workers=workers, pages=pages
+    )
     return findings
 
-def highlight_terms_in_pdf(pdf_path, findings):
-    doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        for sector, term, page_idx in findings:
-            if page_idx - 1 == page_num:
-                rects = page.search_for(term)
-                for r in rects:
-                    page.add_highlight_annot(r)
-    output_pdf_path = pdf_path.replace(".pdf", "_highlighted.pdf")
-    doc.save(output_pdf_path)
\ No newline at end of file
+def open_annotation_copy(pdf_path, output_pdf_path):
+    """
+    Copia o PDF para `output_pdf_path` (em blocos, sem passar pela memória) e abre a
+    cópia para receber anotações. Retorna (documento, incremental): com incremental,
+    save_annotations só acrescenta as anotações ao fim da cópia, sem reescrever a edição.
+    PDFs reparados ao abrir não aceitam gravação incremental e são abertos do original.
+    """
+    import shutil
+
+    import fitz
+
+    if os.path.abspath(pdf_path) != os.path.abspath(output_pdf_path):
+        shutil.copyfile(pdf_path, output_pdf_path)
+        doc = fitz.open(output_pdf_path)
+        if doc.can_save_incrementally():
+            return doc, True
+        doc.close()
+    return fitz.open(pdf_path), False
+
+def save_annotations(doc, output_pdf_path, incremental):
+    """Grava o documento aberto por open_annotation_copy."""
+    if incremental:
+        doc.saveIncr()
+    else:
+        doc.save(output_pdf_path)
+
+def _page_highlights(pdf_path, findings, matcher=None):
+    # Refaz a análise só nas páginas com ocorrências, com o mesmo matcher (expressões, acentos,
+    # hifenização); sem ele, o matcher é montado com as linhas (Setor, Termo) das ocorrências
+    matcher = matcher or TermMatcher(list(dict.fromkeys((finding[0], finding[1]) for finding in findings)))
+    highlights = {}
+    for page_number in sorted({finding[2] for finding in findings}):
+        page = next(assign_acts(_iter_page_range(pdf_path, page_number - 1, page_number, True)))
+        _, matches = analyze_page(matcher, page)
+        highlights[page_number] = matches
+    return highlights
+
+def highlight_terms_in_pdf(pdf_path, findings, highlights=None, output_pdf_path=None, matcher=None):
+    """
+    Grava em `output_pdf_path` a edição com os destaques. `highlights` vem de
+    analyze_pdf; sem ele, as posições são recalculadas nas páginas das ocorrências.
+    """
+    import fitz
+
+    output_pdf_path = output_pdf_path or pdf_path.replace(".pdf", "_highlighted.pdf")
+    if highlights is None:
+        highlights = _page_highlights(pdf_path, findings, matcher)
+    doc, incremental = open_annotation_copy(pdf_path, output_pdf_path)
+    try:
+        for page_idx, matches in highlights.items():
+            page = doc.load_page(page_idx - 1)
+            for rects in matches:
+                if rects:
+                    page.add_highlight_annot(quads=[fitz.Rect(r) for r in rects])
+        save_annotations(doc, output_pdf_path, incremental)
+    finally:
+        doc.close()
+    return output_pdf_path
@@ -0,0 +1,144 @@
+"""
+Etapas da análise de uma edição, encadeadas como geradores:
+páginas extraídas -> ocorrências por página -> destaque no PDF -> relatório.
+
+Cada página atravessa as etapas e é descartada em seguida, então a memória
+usada não cresce com o tamanho da edição (só as ocorrências são acumuladas).
+
+Com um teto de memória (MEMORY_LIMIT_MB), a análise roda no modo de memória
+limitada: extração no próprio processo, uma página por vez, e a memória
+residente conferida a cada página (MemoryGuard).
+"""
+import gc
+import logging
+import os
+from collections import namedtuple
+
+from instrumentation import current_rss_bytes
+from pdf_utils import analyze_page, iter_pdf_pages, open_annotation_copy, save_annotations
+
+# Teto de memória residente (MB) que ativa o modo de memória limitada; 0 desativa
+MEMORY_LIMIT_MB = int(os.getenv("MEMORY_LIMIT_MB", "0"))
+
+# Resultado da busca em uma página com ocorrências
+PageMatches = namedtuple("PageMatches", ["number", "findings", "highlights"])
+
+
+class MemoryGuard:
+    """
+    Confere a memória residente entre uma página e outra. Acima do teto, esvazia
+    o cache de recursos do MuPDF (fontes e imagens já decodificadas) e roda o
+    coletor de lixo; se ainda assim o teto for ultrapassado, registra um aviso.
+    `peak_bytes` guarda o maior valor observado.
+    """
+
+    def __init__(self, limit_mb):
+        self.limit_bytes = limit_mb * 1024 * 1024
+        self.peak_bytes = 0
+        self.exceeded = False
+
+    def check(self):
+        rss = current_rss_bytes()
+        if rss > self.limit_bytes:
+            import fitz
+
+            fitz.TOOLS.store_shrink(100)
+            gc.collect()
+            rss = current_rss_bytes()
+            if rss > self.limit_bytes and not self.exceeded:
+                self.exceeded = True
+                logging.warning(
+                    f"Memória residente ({rss / 2 ** 20:.0f} MB) acima do teto de {self.limit_bytes / 2 ** 20:.0f} MB"
+                )
+        self.peak_bytes = max(self.peak_bytes, rss)
+        return rss
+
+    def watch(self, iterable):
+        """Repassa os itens, conferindo a memória antes de cada um e ao final."""
+        for item in iterable:
+            self.check()
+            yield item
+        self.check()
+
+
+def extract_stage(pdf_path, edition_cache=None, workers=None):
+    """Gera as páginas do PDF com palavras, usando o cache de edições quando disponível."""
+    if edition_cache:
+        return edition_cache.iter_pages(pdf_path, workers=workers)
+    return iter_pdf_pages(pdf_path, workers=workers, with_words=True)
+
+
+def match_stage(pages, matcher):
+    """Procura os termos em cada página e gera apenas as páginas com ocorrências."""
+    for page in pages:
+        findings, highlights = analyze_page(matcher, page)
+        if findings:
+            yield PageMatches(page.number, findings, highlights)
+
+
+def annotate_stage(page_matches, pdf_path, output_pdf_path):
+    """
+    Destaca as ocorrências no PDF à medida que chegam e repassa cada página adiante.
+    Os destaques são gravados de forma incremental sobre uma cópia do original quando
+    todas as páginas tiverem passado; a edição em si não é reescrita.
+    """
+    import fitz
+
+    doc, incremental = open_annotation_copy(pdf_path, output_pdf_path)
+    try:
+        for result in page_matches:
+            page = doc.load_page(result.number - 1)
+            for rects in result.highlights:
+                if rects:
+                    page.add_highlight_annot(quads=[fitz.Rect(r) for r in rects])
+            yield result
+        save_annotations(doc, output_pdf_path, incremental)
+        logging.info(f"PDF com destaques gravado em {output_pdf_path}")
+    finally:
+        doc.close()
+
+
+def collect_findings(page_matches):
+    """Consome o pipeline e retorna todas as tuplas (Setor, Termo, Página) em ordem de página."""
+    findings = []
+    for result in page_matches:
+        findings.extend(result.findings)
+    return findings
+
+
+def run_analysis(pdf_path, matcher, output_pdf_path, edition_cache=None, workers=None, metrics=None,
+                 memory_limit_mb=None):
+    """
+    Executa extração, busca e destaque em uma passada e retorna as ocorrências.
+    Com `metrics` (RunMetrics), cada etapa é medida separadamente.
+    Com `memory_limit_mb` (padrão: MEMORY_LIMIT_MB), roda no modo de memória limitada.
+    """
+    memory_limit_mb = MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+    guard = None
+    if memory_limit_mb:
+        # Processos de extração em paralelo multiplicariam a memória; as páginas vêm uma a uma
+        workers = 1
+        guard = MemoryGuard(memory_limit_mb)
+        if metrics:
+            metrics.memory_limit_bytes = guard.limit_bytes
+    pages = extract_stage(pdf_path, edition_cache, workers)
+    if guard:
+        pages = guard.watch(pages)
+    if metrics:
+        pages = metrics.iter_stage("extract", pages)
+    page_matches = match_stage(pages, matcher)
+    if metrics:
+        page_matches = metrics.iter_stage("match", page_matches, upstream="extract")
+    annotated = annotate_stage(page_matches, pdf_path, output_pdf_path)
+    if metrics:
+        annotated = metrics.iter_stage("highlight", annotated, upstream="match")
+    findings = collect_findings(annotated)
+    if metrics:
+        metrics.stages["extract"].add(bytes_in=os.path.getsize(pdf_path))
+        metrics.stages["highlight"].add(bytes_out=os.path.getsize(output_pdf_path))
+    if guard:
+        logging.info(
+            f"Modo de memória limitada: pico de {guard.peak_bytes / 2 ** 20:.0f} MB "
+            f"(teto de {memory_limit_mb} MB)"
+        )
+    return findings
@@ -0,0 +1,215 @@
+import logging
+import math
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+from term_matcher import Finding
+
+# Banco SQLite que guarda o histórico de ocorrências de todas as execuções
+REPORT_DB_PATH = os.getenv("REPORT_DB_PATH", os.path.join("Reports", "search_report.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    edition_date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    setor TEXT NOT NULL DEFAULT '',
+    termo TEXT NOT NULL,
+    pagina INTEGER NOT NULL,
+    ato TEXT NOT NULL DEFAULT '',
+    titulo_ato TEXT,
+    orgao TEXT,
+    trecho TEXT,
+    run_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    UNIQUE (edition_date, section, setor, termo, pagina, ato)
+);
+CREATE INDEX IF NOT EXISTS idx_findings_edition ON findings (edition_date, section);
+CREATE TABLE IF NOT EXISTS editions (
+    edition_date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    terms_version TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    findings INTEGER NOT NULL DEFAULT 0,
+    processed_at TEXT NOT NULL,
+    PRIMARY KEY (edition_date, section, terms_version)
+);
+"""
+
+# Situação de uma edição na tabela de controle (checkpoints de reprocessamento)
+EDITION_DONE = "done"
+EDITION_MISSING = "missing"
+
+
+def _sector_value(sector):
+    # Setor ausente vira texto vazio; NaN (célula vazia lida pelo pandas) viraria NULL no SQLite
+    if sector is None or (isinstance(sector, float) and math.isnan(sector)):
+        return ""
+    return str(sector)
+
+
+class ReportStore:
+    """
+    Histórico de ocorrências em uma tabela SQLite somente de inserção.
+    Cada execução grava apenas as suas novas linhas; reprocessar a mesma edição
+    não duplica ocorrências. O modo WAL e o timeout de bloqueio permitem que
+    duas execuções sobrepostas gravem no mesmo arquivo com segurança.
+    """
+
+    def __init__(self, db_path=REPORT_DB_PATH, timeout=60):
+        self.db_path = db_path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        # Bancos anteriores à divisão em atos: a tabela é recriada com as colunas do ato e a nova chave única
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'findings'").fetchone():
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Verificado já com a escrita reservada: outra execução pode ter migrado o banco antes
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(findings)")]
+            if "ato" in columns:
+                conn.execute("ROLLBACK")
+                return
+            copied = ", ".join(columns)
+            conn.execute("ALTER TABLE findings RENAME TO findings_old")
+            conn.execute("DROP INDEX IF EXISTS idx_findings_edition")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"INSERT INTO findings ({copied}) SELECT {copied} FROM findings_old")
+            conn.execute("DROP TABLE findings_old")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logging.info("Tabela de ocorrências atualizada com as colunas do ato")
+
+    def append(self, findings, edition_date, section="do1", run_id=None, timestamp=None, terms_version=""):
+        """
+        Grava as ocorrências de uma edição (Findings ou tuplas (Setor, Termo, Página))
+        e marca a edição como processada com a versão de termos informada, na mesma transação.
+        Retorna o número de linhas novas. Só ocorrências já registradas são ignoradas;
+        qualquer outra violação do esquema desfaz a transação e a edição não é marcada.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [
+            (edition_date, section, _sector_value(f.sector), str(f.term), int(f.page), f.act_id or "", f.act_title,
+             f.act_organ, f.snippet, run_id, timestamp)
+            for f in (Finding(*finding) for finding in findings)
+        ]
+        with closing(self._connect()) as conn:
+            # BEGIN IMMEDIATE reserva a escrita logo no início e serializa execuções concorrentes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = conn.total_changes
+                # ON CONFLICT (e não INSERT OR IGNORE) ignora só as duplicatas da chave única:
+                # um NOT NULL violado levanta IntegrityError em vez de descartar a linha em silêncio
+                conn.executemany(
+                    "INSERT INTO findings "
+                    "(edition_date, section, setor, termo, pagina, ato, titulo_ato, orgao, trecho, run_id, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (edition_date, section, setor, termo, pagina, ato) DO NOTHING",
+                    rows,
+                )
+                inserted = conn.total_changes - before
+                duplicates = len(rows) - inserted
+                # Confere que cada linha ignorada é mesmo uma duplicata já presente na tabela
+                missing = len(rows) - self._count_present(conn, rows)
+                if missing:
+                    raise sqlite3.IntegrityError(f"{missing} ocorrências não gravadas em {edition_date} {section}")
+                self._mark_edition(conn, edition_date, section, terms_version, EDITION_DONE, len(rows), timestamp)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logging.info(
+            f"{inserted} novas ocorrências gravadas em {self.db_path} ({edition_date}, {section}); "
+            f"{duplicates} já registradas"
+        )
+        return inserted
+
+    @staticmethod
+    def _count_present(conn, rows):
+        # Quantas linhas de `rows` estão na tabela, pela chave única
+        count = 0
+        for row in rows:
+            count += conn.execute(
+                "SELECT COUNT(*) FROM findings WHERE edition_date = ? AND section = ? AND setor = ? "
+                "AND termo = ? AND pagina = ? AND ato = ?",
+                row[:6],
+            ).fetchone()[0]
+        return count
+
+    @staticmethod
+    def _mark_edition(conn, edition_date, section, terms_version, status, findings, timestamp):
+        conn.execute(
+            "INSERT OR REPLACE INTO editions "
+            "(edition_date, section, terms_version, status, findings, processed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (edition_date, section, terms_version, status, findings, timestamp),
+        )
+
+    def mark_edition_missing(self, edition_date, section="do1", terms_version=""):
+        """Registra que não há edição publicada para a data/seção (ex.: fins de semana)."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with closing(self._connect()) as conn:
+            self._mark_edition(conn, edition_date, section, terms_version, EDITION_MISSING, 0, timestamp)
+
+    def processed_editions(self, start_date, end_date, terms_version=""):
+        """Retorna {(data, seção): situação} das edições já processadas com a versão de termos."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT edition_date, section, status FROM editions "
+                "WHERE edition_date BETWEEN ? AND ? AND terms_version = ?",
+                (start_date, end_date, terms_version),
+            ).fetchall()
+        return {(edition_date, section): status for edition_date, section, status in rows}
+
+    def query(self, start_date=None, end_date=None, sections=None):
+        """Retorna um DataFrame com as ocorrências no intervalo de datas (inclusivo)."""
+        import pandas as pd
+
+        clauses = []
+        params = []
+        if start_date:
+            clauses.append("edition_date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("edition_date <= ?")
+            params.append(end_date)
+        if sections:
+            clauses.append(f"section IN ({', '.join('?' * len(sections))})")
+            params.extend(sections)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            'SELECT setor AS "Setor", termo AS "Termo", pagina AS "Página", '
+            'ato AS "Ato", titulo_ato AS "Título do ato", orgao AS "Órgão", trecho AS "Trecho", '
+            'timestamp AS "Timestamp", edition_date AS "Edição", section AS "Seção" '
+            f"FROM findings {where} ORDER BY edition_date, section, id"
+        )
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def export_excel(self, report_path, start_date=None, end_date=None, sections=None):
+        """Exporta para Excel as ocorrências de um intervalo de datas."""
+        report_df = self.query(start_date, end_date, sections)
+        report_df.to_excel(report_path, index=False)
+        logging.info(f"Relatório exportado para {report_path} ({len(report_df)} linhas)")
+        return report_path
@@ -1,16 +1,16 @@
 # report_utils.py
 import os
-import pandas as pd
 from datetime import datetime
+from report_store import ReportStore
 
-def generate_report(download_dir, findings):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report_df = pd.DataFrame(findings, columns=["Setor", "Termo", "Página"])
-    report_df['Timestamp'] = timestamp
+def generate_report(download_dir, findings, edition_date=None, section="do1", store=None, export_excel=True,
+                    terms_version=""):
+    # O histórico fica no ReportStore; cada execução grava apenas as suas ocorrências
+    edition_date = edition_date or datetime.now().strftime("%Y-%m-%d")
+    store = store or ReportStore()
+    store.append(findings, edition_date, section, terms_version=terms_version)
+    if not export_excel:
+        return None
+    # O Excel passa a ser só uma exportação da edição processada
     report_path = os.path.join(download_dir, "search_report.xlsx")
-    if os.path.exists(report_path):
-        existing_df = pd.read_excel(report_path)
-        updated_df = pd.concat([existing_df, report_df], ignore_index=True)
-        updated_df.to_excel(report_path, index=False)
-    else:
-        report_df.to_excel(report_path, index=False)
\ No newline at end of file
+    return store.export_excel(report_path, edition_date, edition_date, [section])
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Processo contínuo que executa a coleta diária do DOU.
+
+Uso: python scheduler.py [--at 06:00] [--now]
+
+Substitui o laço `while true; sleep 86400` do entrypoint.sh: os clientes
+(sessão HTTP, Drive, GitHub, índice de texto e o matcher compilado) são criados uma vez e
+reaproveitados entre os dias. No horário de publicação, a página da edição é
+consultada até o PDF aparecer, com intervalos crescentes; assim que ele é
+encontrado, o pipeline de main.py roda no próprio processo. O horário segue o
+fuso do processo (variável TZ).
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import schedule
+
+from dou_fetcher import DOUFetcher
+from edition_cache import EditionCache
+from instrumentation import RunMetrics
+from main import GitHubUploader, GoogleDriveService, load_matcher, process_edition
+from report_store import EDITION_DONE, ReportStore
+from text_index import TextIndex
+
+# Horário (HH:MM) em que começa a procura pela edição do dia
+SCHEDULE_TIME = os.getenv("SCHEDULE_TIME", "06:00")
+# Intervalo inicial e máximo entre as consultas, em segundos
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "60"))
+POLL_MAX_INTERVAL = int(os.getenv("POLL_MAX_INTERVAL", "900"))
+# Por quanto tempo, após o início, a edição do dia continua sendo procurada
+POLL_DEADLINE_HOURS = float(os.getenv("POLL_DEADLINE_HOURS", "12"))
+# Dias da semana (0 = segunda) com edição ordinária do DOU; nos demais a edição não é procurada
+# (edições extras de fim de semana podem ser obtidas com o backfill.py)
+PUBLICATION_WEEKDAYS = {int(day) for day in os.getenv("PUBLICATION_WEEKDAYS", "0,1,2,3,4").split(",") if day.strip()}
+
+
+class DailyScheduler:
+    """Mantém os clientes aquecidos e processa a edição de cada dia uma única vez."""
+
+    def __init__(self, poll_interval=POLL_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 deadline_hours=POLL_DEADLINE_HOURS, weekdays=PUBLICATION_WEEKDAYS, fetcher=None,
+                 edition_cache=None, store=None, text_index=None, drive_service=None, github_uploader=None,
+                 clock=datetime.now):
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.deadline = timedelta(hours=deadline_hours)
+        self.weekdays = weekdays
+        self.clock = clock
+        self.stop_event = threading.Event()
+
+        self.fetcher = fetcher or DOUFetcher()
+        self.edition_cache = edition_cache or EditionCache()
+        self.store = store or ReportStore()
+        self.text_index = text_index or TextIndex()
+        self.drive_service = drive_service or GoogleDriveService()
+        self.github_uploader = github_uploader or GitHubUploader()
+        self.matcher = None
+        self.done_dates = set()
+
+    def refresh_matcher(self):
+        # Só consulta os metadados da planilha; o matcher em memória é reaproveitado se ela não mudou
+        matcher = load_matcher(self.drive_service)
+        if matcher:
+            self.matcher = matcher
+        return self.matcher
+
+    def is_done(self, edition_date):
+        if edition_date in self.done_dates:
+            return True
+        if self.matcher is None:
+            return False
+        # Após um reinício, o histórico de ocorrências diz se a edição já foi processada
+        processed = self.store.processed_editions(
+            edition_date.isoformat(), edition_date.isoformat(), self.matcher.version
+        )
+        return processed.get((edition_date.isoformat(), "do1")) == EDITION_DONE
+
+    def edition_available(self, edition_date):
+        """
+        Consulta a página da edição; retorna True quando o link do PDF da data e da seção
+        já está publicado (o PDF de outra edição listado na página não conta).
+        """
+        try:
+            return self.fetcher.resolve_pdf_url(edition_date) is not None
+        except Exception as e:
+            logging.warning(f"Erro ao consultar a edição de {edition_date}: {e}")
+            return False
+
+    def run_day(self, edition_date=None):
+        """
+        Procura a edição com intervalos crescentes e a processa assim que for publicada.
+        O pipeline roda uma única vez por dia depois que o PDF é obtido: se a edição não
+        chegar ao histórico, os envios não são repetidos a cada consulta.
+        """
+        edition_date = edition_date or self.clock().date()
+        if edition_date.weekday() not in self.weekdays:
+            logging.info(f"Sem edição ordinária do DOU em {edition_date} (dia {edition_date.weekday()}); dia ignorado")
+            return False
+        metrics = RunMetrics()
+        with metrics.stage("terms_load") as stage:
+            self.refresh_matcher()
+            stage.add(items=len(self.matcher.entries) if self.matcher else 0)
+        if self.is_done(edition_date):
+            logging.info(f"Edição de {edition_date} já processada")
+            return True
+
+        deadline = self.clock() + self.deadline
+        delay = self.poll_interval
+        while not self.stop_event.is_set():
+            last_attempt = self.clock() + timedelta(seconds=delay) > deadline
+            if self.matcher is None:
+                # Sem a planilha de termos não há o que procurar; ela é consultada de novo a cada intervalo
+                self.refresh_matcher()
+            if self.matcher is None:
+                logging.error("Planilha de termos indisponível; a edição ainda não será processada")
+                if last_attempt:
+                    return False
+            # Na última tentativa o pipeline roda mesmo sem o link, para usar o navegador como alternativa
+            elif self.edition_available(edition_date) or last_attempt:
+                try:
+                    processed = process_edition(edition_date, self.matcher, self.github_uploader,
+                                                fetcher=self.fetcher, edition_cache=self.edition_cache,
+                                                metrics=metrics, text_index=self.text_index, store=self.store)
+                    # Cada tentativa grava o seu resumo; a próxima começa com métricas novas
+                    metrics = RunMetrics()
+                    if processed:
+                        self.done_dates.add(edition_date)
+                        logging.info(f"Edição de {edition_date} processada")
+                        return True
+                except Exception as e:
+                    logging.error(f"Erro ao processar a edição de {edition_date}: {e}")
+                # Com o PDF já obtido, uma nova tentativa repetiria a indexação e os envios ao GitHub
+                if last_attempt or self.edition_cache.lookup(edition_date):
+                    logging.error(f"Edição de {edition_date} não processada; reprocesse-a com o backfill.py")
+                    return False
+            else:
+                logging.info(f"Edição de {edition_date} ainda não disponível; nova consulta em {delay}s")
+            self.stop_event.wait(delay)
+            delay = min(delay * 2, self.max_interval)
+        return False
+
+    def stop(self, *_):
+        logging.info("Encerrando o agendador")
+        self.stop_event.set()
+
+    def run_forever(self, at=SCHEDULE_TIME, run_now=False):
+        schedule.every().day.at(at).do(self.run_day)
+        logging.info(f"Agendador iniciado; edição do dia procurada diariamente às {at}")
+        # Ao iniciar depois do horário (ex.: reinício do contêiner), a edição do dia é procurada de imediato
+        if run_now or self.clock().strftime("%H:%M") >= at:
+            self.run_day()
+        while not self.stop_event.is_set():
+            schedule.run_pending()
+            self.stop_event.wait(min(max(schedule.idle_seconds() or 60, 1), 60))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--at", default=SCHEDULE_TIME, help="horário diário da coleta (HH:MM, padrão: 06:00)")
+    parser.add_argument("--now", action="store_true", help="procura a edição do dia imediatamente ao iniciar")
+    args = parser.parse_args()
+
+    scheduler = DailyScheduler()
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run_forever(args.at, run_now=args.now)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
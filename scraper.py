@@ -13,10 +13,13 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import ElementClickInterceptedException, StaleElementReferenceException
 import shutil
-from pdf_utils import search_terms_in_pdf, highlight_terms_in_pdf
+from browser_pool import build_chrome_options
+from dou_fetcher import DOUFetcher
+from download_watcher import wait_for_download, wait_for_download_start
+from instrumentation import SpanRecorder
+from pdf_utils import analyze_pdf, highlight_terms_in_pdf
 from report_utils import generate_report
 
 class DOUScraper:
@@ -25,105 +28,94 @@ class DOUScraper:
         self.findings = []
         self.pdf_path = None
         self.download_dir = download_dir
-        self.setup_driver()
+        self.fetcher = DOUFetcher()
+        # O navegador só é iniciado se o download direto por HTTP falhar
+        self.driver = None
+        # Tempo de cada passo da navegação (carregamento, clique, nova janela, download)
+        self.timings = SpanRecorder()
 
     def setup_driver(self):
-        chrome_options = Options()
-        prefs = {
-            "download.default_directory": self.download_dir,
-            "download.prompt_for_download": False,
-            "plugins.always_open_pdf_externally": True,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        }
-        chrome_options.add_experimental_option("prefs", prefs)
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        chrome_options.add_argument("--disable-dev-tools")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Porta de depuração livre, para que dois scrapers possam rodar lado a lado
+        self.driver = webdriver.Chrome(options=build_chrome_options(self.download_dir))
         self.wait = WebDriverWait(self.driver, 20)
 
-    def is_download_complete(self):
-        for ext in ['.crdownload', '.tmp', '.partial']:
-            if glob.glob(os.path.join(self.download_dir, f'*{ext}')):
-                return False
-        return True
-
-    def wait_for_download(self, timeout=300000):
+    def wait_for_download(self, timeout=300, since=None):
         logging.info("Aguardando conclusão do download do PDF")
-        start_time = time.time()
-        time.sleep(5)
-        while time.time() - start_time < timeout:
-            pdf_files = [f for f in os.listdir(self.download_dir) if f.endswith('.pdf')]
-            logging.info(f"Arquivos PDF encontrados: {pdf_files}")
-            if pdf_files and self.is_download_complete():
-                pdf_files.sort(key=lambda x: os.path.getmtime(os.path.join(self.download_dir, x)), reverse=True)
-                self.pdf_path = os.path.join(self.download_dir, pdf_files[0])
-                size = os.path.getsize(self.pdf_path)
-                logging.info(f"Arquivo {self.pdf_path} tem {size} bytes")
-                if size > 0:
-                    logging.info(f"Download finalizado: {self.pdf_path}")
-                    return True
-            elapsed = int(time.time() - start_time)
-            if elapsed % 30 == 0:
-                logging.info(f"Esperando... {elapsed}s se passaram")
-            time.sleep(2)
-        logging.error("Timeout ao esperar o download do PDF")
-        return False
+        result = wait_for_download(self.download_dir, timeout=timeout, since=since)
+        if not result:
+            return False
+        self.pdf_path = result.path
+        return True
 
     def retry_click(self, by, selector, max_attempts=3):
         for attempt in range(max_attempts):
             try:
                 logging.info(f"Tentando clicar em {selector} (tentativa {attempt+1})")
                 element = self.wait.until(EC.element_to_be_clickable((by, selector)))
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                time.sleep(1)
+                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
                 element.click()
                 return True
             except StaleElementReferenceException:
-                time.sleep(1)
+                # A página redesenhou o elemento; a próxima espera localiza o novo
+                continue
+            except ElementClickInterceptedException:
+                # Outro elemento (ex.: um banner) cobre o alvo; o clique é feito direto no elemento
+                self.driver.execute_script("arguments[0].click();", element)
+                return True
         return False
 
     def navigate_and_download(self, terms_df):
+        pdf_name = f"{datetime.now():%Y_%m_%d}_ASSINADO_do1.pdf"
+        self.pdf_path = self.fetcher.fetch_pdf(os.path.join(self.download_dir, pdf_name))
+        if not self.pdf_path:
+            self.download_with_browser()
+
+        logging.info("Iniciando análise do PDF")
+        self.findings, highlights = analyze_pdf(self.pdf_path, terms_df)
+        highlight_terms_in_pdf(self.pdf_path, self.findings, highlights)
+        generate_report(self.download_dir, self.findings)
+
+    def download_with_browser(self):
+        if not self.driver:
+            with self.timings.span("browser_start"):
+                self.setup_driver()
         logging.info("Acessando a página do DOU")
-        self.driver.get(self.url)
-        time.sleep(5)
-        self.driver.set_window_size(1024, 768)
-        self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".btn-diario-completo")))
+        download_started = time.time()
+        with self.timings.span("page_load"):
+            self.driver.get(self.url)
+            self.driver.set_window_size(1024, 768)
+            self.wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".btn-diario-completo")))
 
-        if not self.retry_click(By.CSS_SELECTOR, ".btn-diario-completo"):
-            raise Exception("Falha ao clicar em .btn-diario-completo")
+        with self.timings.span("click"):
+            if not self.retry_click(By.CSS_SELECTOR, ".btn-diario-completo"):
+                raise Exception("Falha ao clicar em .btn-diario-completo")
 
-        time.sleep(3)
         original_window = self.driver.current_window_handle
+        with self.timings.span("new_window"):
+            # retry_click espera o link do PDF ficar clicável, no lugar da pausa fixa após o clique anterior
+            if not self.retry_click(By.CSS_SELECTOR, "a > img"):
+                raise Exception("Falha ao clicar na imagem")
+            self.wait.until(lambda d: len(d.window_handles) > 1)
+            for window_handle in self.driver.window_handles:
+                if window_handle != original_window:
+                    self.driver.switch_to.window(window_handle)
+                    break
 
-        if not self.retry_click(By.CSS_SELECTOR, "a > img"):
-            raise Exception("Falha ao clicar na imagem")
-
-        self.wait.until(lambda d: len(d.window_handles) > 1)
-        for window_handle in self.driver.window_handles:
-            if window_handle != original_window:
-                self.driver.switch_to.window(window_handle)
-                break
+        with self.timings.span("download_start"):
+            if not wait_for_download_start(self.download_dir, timeout=60, since=download_started):
+                raise Exception("Download do PDF não começou")
 
         logging.info("Esperando a conclusão do download")
-        if not self.wait_for_download():
-            raise Exception("Download do PDF não completou")
-
-        logging.info("Iniciando análise do PDF")
-        self.findings = search_terms_in_pdf(self.pdf_path, terms_df)
-        highlight_terms_in_pdf(self.pdf_path, self.findings)
-        generate_report(self.download_dir, self.findings)
+        with self.timings.span("download_end"):
+            if not self.wait_for_download(since=download_started):
+                raise Exception("Download do PDF não completou")
 
     def cleanup(self):
-        if hasattr(self, 'driver'):
+        if self.driver:
             logging.info("Fechando navegador")
             self.driver.quit()
-        for pattern in ['*.crdownload', '*.tmp', '*.partial']:
+        for pattern in ['*.crdownload', '*.tmp', '*.partial', '*.part']:
             files = glob.glob(os.path.join(self.download_dir, pattern))
             for file in files:
                 try:
@@ -0,0 +1,282 @@
+"""
+Expressões da coluna 'Termo' da planilha.
+
+Um termo simples continua sendo procurado literalmente. Uma célula que começa
+com aspas, parêntese, NOT ou `re:` é uma expressão:
+
+    "pregão" AND "Ministério da Saúde"
+    "CNPJ 12.345.678" NEAR/20 "contrato"
+    ("dispensa" OR "inexigibilidade") AND NOT "revogação"
+    re:"\\d{5}\\.\\d{6}/\\d{4}-\\d{2}" AND "contrato"
+    re:\\d{5}\\.\\d{6}/\\d{4}-\\d{2}
+
+Os textos entre aspas são termos literais e `re:"..."` é uma expressão regular
+(uma célula inteira `re:...` também). `a NEAR/n b` exige no máximo n palavras
+entre as duas ocorrências; NEAR tem precedência sobre NOT, que tem precedência
+sobre AND, que tem precedência sobre OR. Os operadores não diferenciam
+maiúsculas de minúsculas e `\\"` representa aspas dentro de um texto.
+
+As regras são avaliadas dentro de cada ato (ou da página inteira, quando ela
+não foi dividida em atos) a partir das posições das ocorrências de cada termo,
+encontradas em uma única varredura pelo TermMatcher.
+"""
+import re
+
+from text_utils import fold_text, normalize_text
+
+# Nós da árvore da expressão; TERM guarda o texto normalizado e o original, REGEX o padrão adaptado
+TERM = "term"
+REGEX = "regex"
+AND = "and"
+OR = "or"
+NOT = "not"
+NEAR = "near"
+
+_OPERATOR = re.compile(r"(AND|OR|NOT|NEAR/(\d+))(?![\w/])", re.IGNORECASE)
+
+
+class TermSyntaxError(ValueError):
+    """Expressão inválida na coluna 'Termo'."""
+
+
+def is_expression(term):
+    """Indica se a célula da planilha é uma expressão (e não um termo literal)."""
+    text = str(term).lstrip()
+    return text.startswith(('"', "(", "re:")) or bool(re.match(r"NOT\s", text, re.IGNORECASE))
+
+
+def _read_quoted(text, i):
+    # text[i] é a aspa de abertura; retorna (conteúdo, posição depois da aspa de fechamento)
+    parts = []
+    i += 1
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and text[i + 1:i + 2] == '"':
+            parts.append('"')
+            i += 2
+        elif ch == '"':
+            return "".join(parts), i + 1
+        else:
+            parts.append(ch)
+            i += 1
+    raise TermSyntaxError("aspas sem fechamento")
+
+
+def _tokenize(text):
+    tokens = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+        elif ch in "()":
+            tokens.append((ch, None))
+            i += 1
+        elif text.startswith('re:"', i):
+            value, i = _read_quoted(text, i + 3)
+            tokens.append((REGEX, value))
+        elif ch == '"':
+            value, i = _read_quoted(text, i)
+            tokens.append((TERM, value))
+        else:
+            match = _OPERATOR.match(text, i)
+            if not match:
+                raise TermSyntaxError(f"texto fora de aspas na posição {i + 1}: {text[i:i + 20]!r}")
+            if match.group(2):
+                tokens.append((NEAR, int(match.group(2))))
+            else:
+                tokens.append((match.group(1).lower(), None))
+            i = match.end()
+    return tokens
+
+
+def compile_regex(pattern):
+    """
+    Adapta uma expressão regular ao texto normalizado das páginas (sem acentos e
+    em minúsculas) e valida o resultado: as letras do padrão passam pela mesma
+    conversão e um hífen literal fica opcional, já que a normalização remove os
+    hífens entre letras e dígitos ("2026-12" vira "202612"). Retorna o padrão adaptado.
+    """
+    parts = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            # Escapes (\d, \., \b...) não são convertidos
+            parts.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+            parts.append(ch if ch in "]-^" else fold_text(ch))
+        elif ch == "[":
+            in_class = True
+            parts.append(ch)
+            if pattern[i + 1:i + 2] == "^":
+                parts.append("^")
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                # "]" logo após a abertura faz parte da classe
+                parts.append("]")
+                i += 1
+        elif ch == "-":
+            parts.append("-?")
+        else:
+            parts.append(fold_text(ch))
+        i += 1
+    normalized = "".join(parts)
+    try:
+        compiled = re.compile(normalized)
+    except re.error as e:
+        raise TermSyntaxError(f"expressão regular inválida ({e})") from None
+    if compiled.fullmatch(""):
+        raise TermSyntaxError("a expressão regular aceita texto vazio")
+    return normalized
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise TermSyntaxError("expressão vazia")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise TermSyntaxError(f"operador esperado antes de {self._describe()}")
+        return node
+
+    def _describe(self):
+        kind, value = self.tokens[self.position]
+        return f'"{value}"' if kind in (TERM, REGEX) else kind.upper()
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == OR:
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else (OR, tuple(children))
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() == AND:
+            self.take()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else (AND, tuple(children))
+
+    def parse_not(self):
+        if self.peek() == NOT:
+            self.take()
+            return (NOT, self.parse_not())
+        return self.parse_near()
+
+    def parse_near(self):
+        node = self.parse_atom()
+        while self.peek() == NEAR:
+            _, distance = self.take()
+            right = self.parse_atom()
+            for operand in (node, right):
+                if not has_positions(operand):
+                    raise TermSyntaxError("NEAR não aceita NOT entre os seus termos")
+            node = (NEAR, node, right, distance)
+        return node
+
+    def parse_atom(self):
+        kind = self.peek()
+        if kind is None:
+            raise TermSyntaxError("expressão incompleta")
+        if kind == "(":
+            self.take()
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise TermSyntaxError("parêntese sem fechamento")
+            self.take()
+            return node
+        if kind == TERM:
+            _, value = self.take()
+            text = normalize_text(value)
+            if not text:
+                raise TermSyntaxError("termo vazio entre aspas")
+            return (TERM, text, value)
+        if kind == REGEX:
+            _, value = self.take()
+            return (REGEX, compile_regex(value))
+        raise TermSyntaxError(f"termo esperado antes de {self._describe()}")
+
+
+def has_positions(node):
+    """
+    Indica se, quando verdadeira, a expressão sempre aponta ao menos uma ocorrência
+    no texto: NOT não aponta nenhuma, e um OR só aponta se todos os ramos apontarem.
+    """
+    kind = node[0]
+    if kind in (TERM, REGEX, NEAR):
+        return True
+    if kind == NOT:
+        return False
+    if kind == AND:
+        return any(has_positions(child) for child in node[1])
+    return all(has_positions(child) for child in node[1])
+
+
+def parse_expression(term):
+    """
+    Converte a célula da planilha na árvore da expressão, com tuplas (TERM, texto
+    normalizado, texto entre aspas), (REGEX, padrão), (AND|OR, filhos), (NOT, filho)
+    e (NEAR, esquerda, direita, distância).
+    """
+    text = str(term).strip()
+    if text.startswith("re:") and not text.startswith('re:"'):
+        node = (REGEX, compile_regex(text[3:].strip()))
+    else:
+        node = _Parser(_tokenize(text)).parse()
+    if not has_positions(node):
+        # Uma regra só com NOT valeria para quase todos os atos
+        raise TermSyntaxError("a expressão precisa de ao menos um termo que não esteja sob NOT")
+    return node
+
+
+def _fts_phrase(node):
+    # Parte do texto entre aspas, só sem acentos e em minúsculas: a normalização do matcher
+    # junta "2026-12" em "202612", mas o tokenizador do FTS5 separa "2026" e "12"
+    text = fold_text(node[2])
+    return '"' + text.replace('"', '""') + '"'
+
+
+def to_fts_query(node):
+    """
+    Traduz a expressão para a sintaxe MATCH do FTS5 (índice de texto), ou retorna
+    None quando não há equivalente (expressões regulares, NOT isolado, NEAR composto).
+    """
+    kind = node[0]
+    if kind == TERM:
+        return _fts_phrase(node)
+    if kind == REGEX:
+        return None
+    if kind == NEAR:
+        left, right, distance = node[1:]
+        if left[0] != TERM or right[0] != TERM:
+            return None
+        return f"NEAR({_fts_phrase(left)} {_fts_phrase(right)}, {distance})"
+    if kind == OR:
+        parts = [to_fts_query(child) for child in node[1]]
+        return None if None in parts else "(" + " OR ".join(parts) + ")"
+    if kind == AND:
+        # No FTS5, NOT é binário: "a NOT b"
+        positive = [to_fts_query(child) for child in node[1] if child[0] != NOT]
+        negative = [to_fts_query(child[1]) for child in node[1] if child[0] == NOT]
+        if not positive or None in positive or None in negative:
+            return None
+        query = "(" + " AND ".join(positive) + ")"
+        return query + "".join(f" NOT {part}" for part in negative)
+    return None
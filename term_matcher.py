@@ -0,0 +1,357 @@
+import hashlib
+import logging
+import re
+from bisect import bisect_left
+from collections import namedtuple
+
+from term_expressions import (
+    AND, NEAR, NOT, OR, REGEX, TERM, TermSyntaxError, is_expression, parse_expression,
+)
+from text_utils import is_word_boundary, normalize_text
+
+# Muda quando a interpretação da planilha muda; faz parte do nome dos matchers em cache
+MATCHER_FORMAT = 3
+
+# Ocorrência de um termo. Os campos do ato (identificador, título, órgão e o trecho
+# do texto em volta da ocorrência) só vêm preenchidos quando a página foi dividida em atos.
+Finding = namedtuple(
+    "Finding", ["sector", "term", "page", "act_id", "act_title", "act_organ", "snippet"],
+    defaults=(None, None, None, None),
+)
+
+
+class TermMatcher:
+    """
+    Autômato Aho-Corasick com todos os termos da planilha.
+    É compilado uma vez por execução e encontra todos os termos de uma página
+    em uma única varredura do texto, independentemente da quantidade de termos.
+    Termos e páginas passam pela mesma normalização (acentos, caixa, hifenização
+    e espaços); com `whole_words=True` só valem ocorrências de palavras inteiras.
+
+    Expressões da planilha (AND, OR, NOT, NEAR/n e expressões regulares, ver
+    term_expressions.py) são compiladas junto: os termos literais delas entram no
+    mesmo autômato e cada expressão regular é compilada e procurada separadamente,
+    para que ocorrências sobrepostas de padrões diferentes não se percam. A regra de
+    cada linha é avaliada a partir das posições das ocorrências dos seus termos, só
+    quando algum deles aparece no texto.
+    """
+
+    def __init__(self, entries, whole_words=False):
+        # entries: lista de tuplas (Setor, Termo) na ordem da planilha
+        self.whole_words = whole_words
+        self.entries = []
+        self._patterns = []
+        self._lengths = []
+        self._pattern_ids = {}
+        # Cada padrão distinto vira um nó terminal; várias linhas podem compartilhar o mesmo padrão
+        self._pattern_entries = []
+        # Expressões regulares distintas; o id de cada uma vem depois dos padrões literais
+        self._regex_patterns = []
+        regex_ids = {}
+        # Regras das linhas com expressão: {linha: árvore com ("atom", id) nas folhas}
+        self._rules = {}
+        for sector, term in entries:
+            if is_expression(term):
+                try:
+                    node = parse_expression(term)
+                except TermSyntaxError as e:
+                    # Células como "(FNDE)" ou "NOT aplicável" também podem ser termos literais
+                    logging.warning(f"Termo {term!r} não é uma expressão válida ({e}); procurado literalmente")
+                else:
+                    self._rules[len(self.entries)] = self._register_atoms(node, regex_ids)
+                    self.entries.append((sector, term))
+                    continue
+            pattern = normalize_text(str(term))
+            if not pattern:
+                continue
+            entry_id = len(self.entries)
+            self.entries.append((sector, term))
+            self._pattern_entries[self._add_pattern(pattern)].append(entry_id)
+
+        # As folhas ("regex", i) passam a apontar para os ids depois dos literais
+        offset = len(self._patterns)
+        self._rules = {entry_id: self._resolve(node, offset) for entry_id, node in self._rules.items()}
+        # Uma regex por padrão: numa alternação única, só o primeiro ramo que casa em cada
+        # posição seria registrado, e as referências numeradas (\1) mudariam de grupo
+        self._regexes = [(offset + index, re.compile(pattern)) for index, pattern in enumerate(self._regex_patterns)]
+        # Regras a avaliar quando um padrão aparece no texto
+        self._atom_rules = {}
+        for entry_id, node in self._rules.items():
+            for atom_id in self._positive_atoms(node):
+                self._atom_rules.setdefault(atom_id, []).append(entry_id)
+        for atom_rules in self._atom_rules.values():
+            atom_rules.sort()
+
+        # Identifica a lista de termos; muda quando a planilha muda (usada nos checkpoints).
+        # Planilhas só com termos literais mantêm a versão de antes das expressões.
+        key = (whole_words, self.entries) + ((MATCHER_FORMAT,) if self._rules else ())
+        digest = hashlib.sha256(repr(key).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self._build()
+        logging.info(
+            f"Matcher compilado: {len(self.entries)} termos ({len(self._rules)} expressões), "
+            f"{len(self._goto)} estados, {len(self._regex_patterns)} expressões regulares"
+        )
+
+    def _add_pattern(self, pattern):
+        if pattern not in self._pattern_ids:
+            self._pattern_ids[pattern] = len(self._patterns)
+            self._patterns.append(pattern)
+            self._lengths.append(len(pattern))
+            self._pattern_entries.append([])
+        return self._pattern_ids[pattern]
+
+    def _register_atoms(self, node, regex_ids):
+        # Troca as folhas por ("atom", id_do_padrão) ou ("regex", índice da expressão regular)
+        kind = node[0]
+        if kind == TERM:
+            return ("atom", self._add_pattern(node[1]))
+        if kind == REGEX:
+            if node[1] not in regex_ids:
+                regex_ids[node[1]] = len(self._regex_patterns)
+                self._regex_patterns.append(node[1])
+            return ("regex", regex_ids[node[1]])
+        if kind in (AND, OR):
+            return (kind, tuple(self._register_atoms(child, regex_ids) for child in node[1]))
+        if kind == NOT:
+            return (NOT, self._register_atoms(node[1], regex_ids))
+        return (NEAR, self._register_atoms(node[1], regex_ids), self._register_atoms(node[2], regex_ids), node[3])
+
+    def _resolve(self, node, offset):
+        kind = node[0]
+        if kind == "regex":
+            return ("atom", offset + node[1])
+        if kind == "atom":
+            return node
+        if kind in (AND, OR):
+            return (kind, tuple(self._resolve(child, offset) for child in node[1]))
+        if kind == NOT:
+            return (NOT, self._resolve(node[1], offset))
+        return (NEAR, self._resolve(node[1], offset), self._resolve(node[2], offset), node[3])
+
+    def _positive_atoms(self, node):
+        # Padrões fora de NOT: a regra só pode valer se ao menos um deles aparecer
+        kind = node[0]
+        if kind == "atom":
+            return {node[1]}
+        if kind == NOT:
+            return set()
+        if kind == NEAR:
+            return self._positive_atoms(node[1]) | self._positive_atoms(node[2])
+        return set().union(*(self._positive_atoms(child) for child in node[1]))
+
+    @classmethod
+    def from_dataframe(cls, terms_df, whole_words=False):
+        """Cria o matcher a partir do DataFrame de termos (colunas 'Setor' e 'Termo')."""
+        import pandas as pd
+
+        sectors = terms_df['Setor'] if 'Setor' in terms_df.columns else [None] * len(terms_df)
+        entries = [
+            # Célula de setor vazia chega do pandas como NaN, que é verdadeiro em `setor or ...`
+            (None if pd.isna(sector) else str(sector), term)
+            for sector, term in zip(sectors, terms_df['Termo'])
+            if not pd.isna(term)  # linhas sem termo na planilha
+        ]
+        return cls(entries, whole_words=whole_words)
+
+    def to_dataframe(self):
+        """Retorna os termos do matcher como DataFrame (colunas 'Setor' e 'Termo')."""
+        import pandas as pd
+
+        return pd.DataFrame(self.entries, columns=['Setor', 'Termo'])
+
+    def _build(self):
+        goto = [{}]
+        out = [()]
+        for pattern_id, pattern in enumerate(self._patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (pattern_id,)
+
+        # Links de falha em largura; as saídas de cada estado já incluem as do link de falha
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def iter_matches(self, text):
+        """Gera (início, fim, id_do_padrão) para cada ocorrência em `text` (já normalizado)."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        lengths = self._lengths
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for pattern_id in out[state]:
+                    yield end - lengths[pattern_id], end, pattern_id
+
+    def find_entries(self, text):
+        """Retorna os índices (ordenados) das linhas da planilha presentes em `text` (já normalizado)."""
+        if self._rules:
+            return sorted(self.entry_spans(text, self.match_spans(text)))
+        if self.whole_words:
+            return self._entries_for(self.match_spans(text))
+
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return self._entries_for(found)
+
+    def match_spans(self, text):
+        """
+        Retorna {id_do_padrão: [(início, fim), ...]} com as posições das ocorrências
+        em `text`, inclusive dos termos e expressões regulares usados nas expressões.
+        """
+        spans = {}
+        for start, end, pattern_id in self.iter_matches(text):
+            if self.whole_words and not is_word_boundary(text, start, end):
+                continue
+            spans.setdefault(pattern_id, []).append((start, end))
+        for pattern_id, regex in self._regexes:
+            regex_spans = [match.span() for match in regex.finditer(text)]
+            if regex_spans:
+                spans[pattern_id] = regex_spans
+        return spans
+
+    def entry_spans(self, text, spans):
+        """
+        Avalia as linhas da planilha sobre o resultado de match_spans(text) e retorna
+        {linha: [(início, fim), ...]} com as ocorrências que satisfazem cada linha
+        presente no texto, em ordem de posição (para expressões, só as dos termos
+        que tornam a regra verdadeira; termos sob NOT nunca entram).
+        """
+        found = {}
+        rules = set()
+        for pattern_id, pattern_spans in spans.items():
+            for entry_id in self._pattern_entries[pattern_id] if pattern_id < len(self._patterns) else ():
+                found[entry_id] = pattern_spans
+            rules.update(self._atom_rules.get(pattern_id, ()))
+        if rules:
+            word_of = _WordIndex(text)
+            for entry_id in rules:
+                witness = _evaluate(self._rules[entry_id], spans, word_of)
+                if witness:
+                    found[entry_id] = sorted(set(witness))
+        return found
+
+    def _entries_for(self, pattern_ids):
+        entry_ids = []
+        for pattern_id in pattern_ids:
+            entry_ids.extend(self._pattern_entries[pattern_id])
+        entry_ids.sort()
+        return entry_ids
+
+    def page_findings(self, pattern_ids, page_number):
+        """
+        Converte os padrões encontrados em Findings (Setor, Termo, Página), na ordem da planilha.
+        Só cobre as linhas com termo literal; expressões precisam das posições (span_findings).
+        """
+        return [Finding(*self.entries[entry_id], page_number) for entry_id in self._entries_for(pattern_ids)]
+
+    def span_findings(self, text, spans, page_number):
+        """
+        Como page_findings, para o resultado de match_spans, já avaliando as
+        expressões: retorna pares (Finding, [(início, fim), ...]) com as ocorrências
+        de cada linha no texto (ver entry_spans), na ordem da planilha.
+        """
+        found = self.entry_spans(text, spans)
+        return [(Finding(*self.entries[entry_id], page_number), found[entry_id]) for entry_id in sorted(found)]
+
+    def search_page(self, page_text, page_number):
+        """Retorna os Findings (Setor, Termo, Página) encontrados no texto de uma página."""
+        return [
+            Finding(*self.entries[entry_id], page_number)
+            for entry_id in self.find_entries(normalize_text(page_text))
+        ]
+
+
+class _WordIndex:
+    """
+    Número da palavra que contém uma posição do texto normalizado, em que as palavras
+    são separadas por um espaço. Os espaços só são localizados na primeira consulta,
+    ou seja, quando alguma regra NEAR chega a ser avaliada.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.spaces = None
+
+    def __call__(self, position):
+        if self.spaces is None:
+            self.spaces = [match.start() for match in re.finditer(" ", self.text)]
+        return bisect_left(self.spaces, position)
+
+
+def _near(left, right, distance, word_of):
+    # Ocorrências dos dois lados com no máximo `distance` palavras entre elas
+    left_words = [(word_of(start), word_of(end - 1), (start, end)) for start, end in left]
+    right_words = [(word_of(start), word_of(end - 1), (start, end)) for start, end in right]
+    witness = []
+    for left_first, left_last, left_span in left_words:
+        for right_first, right_last, right_span in right_words:
+            gap = max(right_first - left_last, left_first - right_last) - 1
+            if gap <= distance:
+                witness.append(left_span)
+                witness.append(right_span)
+    return witness
+
+
+def _evaluate(node, spans, word_of):
+    """
+    Avalia a regra com as ocorrências de match_spans. Retorna as ocorrências que
+    a tornam verdadeira (lista vazia para um NOT verdadeiro) ou None se for falsa.
+    """
+    kind = node[0]
+    if kind == "atom":
+        return spans.get(node[1])
+    if kind == NOT:
+        return [] if _evaluate(node[1], spans, word_of) is None else None
+    if kind == AND:
+        witness = []
+        for child in node[1]:
+            child_witness = _evaluate(child, spans, word_of)
+            if child_witness is None:
+                return None
+            witness.extend(child_witness)
+        return witness
+    if kind == OR:
+        results = [_evaluate(child, spans, word_of) for child in node[1]]
+        results = [result for result in results if result is not None]
+        return [span for result in results for span in result] if results else None
+    left = _evaluate(node[1], spans, word_of)
+    right = _evaluate(node[2], spans, word_of) if left else None
+    if not right:
+        return None
+    return _near(left, right, node[3], word_of) or None
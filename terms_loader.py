@@ -0,0 +1,105 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+from functools import lru_cache
+
+import term_expressions
+import term_matcher
+import text_utils
+from edition_cache import CACHE_DIR
+from term_matcher import MATCHER_FORMAT, TermMatcher
+
+# Matchers pré-compilados, um por versão da planilha de termos no Drive
+TERMS_CACHE_DIR = os.getenv("TERMS_CACHE_DIR", os.path.join(CACHE_DIR, "terms"))
+
+# Matchers já carregados neste processo, por artefato; um processo de longa duração
+# (scheduler.py) não precisa ler o pickle de novo enquanto a planilha não mudar
+_loaded = {}
+
+
+@lru_cache(maxsize=None)
+def matcher_code_hash():
+    """
+    Hash do código que monta o matcher (normalização, expressões e autômato).
+    Uma mudança nesses módulos invalida os pickles mesmo sem MATCHER_FORMAT novo.
+    """
+    digest = hashlib.sha256()
+    for module in (text_utils, term_expressions, term_matcher):
+        with open(module.__file__, "rb") as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()[:12]
+
+
+def _artifact_prefix():
+    return f"matcher_v{MATCHER_FORMAT}_{matcher_code_hash()}_"
+
+
+def _artifact_path(cache_dir, checksum, whole_words):
+    # O formato e o código do matcher entram no nome: pickles de outras versões da classe não são reaproveitados
+    return os.path.join(cache_dir, f"{_artifact_prefix()}{checksum}{'_ww' if whole_words else ''}.pickle")
+
+
+def _load_artifact(path):
+    with open(path, "rb") as fh:
+        return pickle.load(fh)
+
+
+def _save_artifact(path, matcher):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        pickle.dump(matcher, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    # Versões anteriores da planilha não serão mais usadas
+    for old_path in glob.glob(os.path.join(os.path.dirname(path), "matcher_*.pickle")):
+        if old_path != path:
+            os.remove(old_path)
+
+
+def load_terms_matcher(drive_service, file_id, cache_dir=TERMS_CACHE_DIR, whole_words=False):
+    """
+    Retorna o TermMatcher da planilha de termos do Google Drive.
+    Consulta primeiro o md5Checksum/modifiedTime do arquivo: se a planilha não mudou,
+    usa o matcher já compilado em disco, sem baixar nem ler o Excel. Se a consulta
+    falhar, usa o último matcher disponível. Retorna None se não houver como obter os termos.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        metadata = drive_service.service.files().get(
+            fileId=file_id, fields="md5Checksum, modifiedTime", supportsAllDrives=True
+        ).execute()
+    except Exception as e:
+        logging.warning(f"Erro ao consultar os metadados da planilha de termos: {e}")
+        artifacts = glob.glob(os.path.join(cache_dir, f"{_artifact_prefix()}*.pickle"))
+        if not artifacts:
+            return None
+        logging.info("Usando o último matcher compilado disponível em disco")
+        return _load_artifact(max(artifacts, key=os.path.getmtime))
+
+    # Planilhas nativas do Google não têm md5Checksum; nesse caso vale a data de modificação
+    checksum = metadata.get("md5Checksum") or hashlib.md5(metadata["modifiedTime"].encode()).hexdigest()
+    artifact_path = _artifact_path(cache_dir, checksum, whole_words)
+    if artifact_path in _loaded and os.path.exists(artifact_path):
+        return _loaded[artifact_path]
+    if os.path.exists(artifact_path):
+        try:
+            matcher = _loaded[artifact_path] = _load_artifact(artifact_path)
+            logging.info(f"Planilha de termos sem alterações ({checksum}); usando matcher compilado")
+            return matcher
+        except Exception as e:
+            logging.warning(f"Matcher em cache inválido ({artifact_path}): {e}")
+
+    import pandas as pd
+
+    local_terms_path = os.path.join(cache_dir, "termos.xlsx")
+    if not drive_service.download_file(file_id, local_terms_path):
+        return None
+    terms_df = pd.read_excel(local_terms_path)
+    logging.info(f"Planilha de termos lida com sucesso. {len(terms_df)} termos encontrados.")
+    matcher = TermMatcher.from_dataframe(terms_df, whole_words=whole_words)
+    _save_artifact(artifact_path, matcher)
+    _loaded.clear()
+    _loaded[artifact_path] = matcher
+    os.remove(local_terms_path)
+    return matcher
@@ -0,0 +1,71 @@
+import fitz
+
+from act_segmenter import is_act_title
+from pdf_utils import iter_pdf_pages
+
+
+def _write(page, y, text, bold=False):
+    page.insert_text((50, y), text, fontname="hebo" if bold else "helv", fontsize=9)
+
+
+def _acts(path):
+    return [
+        (page.number, act.act_id, act.organ, act.title, " ".join(word[4] for word in page.words[act.start:act.end]))
+        for page in iter_pdf_pages(str(path), workers=1, with_words=True)
+        for act in page.acts
+    ]
+
+
+def test_acts_split_by_bold_headings_across_pages(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    _write(page, 20, "DIÁRIO OFICIAL DA UNIÃO")
+    _write(page, 80, "Texto antes do primeiro ato")
+    _write(page, 120, "MINISTÉRIO DA SAÚDE", bold=True)
+    _write(page, 135, "PORTARIA Nº 1, DE 2 DE JANEIRO DE 2026", bold=True)
+    _write(page, 160, "Aprova o contrato de limpeza.")
+    _write(page, 200, "EXTRATO DE CONTRATO Nº 7/2026", bold=True)
+    _write(page, 220, "Objeto: serviços de vigilância.")
+    _write(page, 240, "ANEXO I", bold=True)
+    _write(page, 260, "Valor global.")
+    page = doc.new_page()
+    _write(page, 80, "Vigência: doze meses.")
+    _write(page, 120, "SECRETARIA DE GESTÃO", bold=True)
+    _write(page, 135, "AVISO DE LICITAÇÃO", bold=True)
+    _write(page, 160, "Pregão eletrônico nº 3/2026.")
+    doc.save(tmp_path / "edicao.pdf")
+
+    extract = "EXTRATO DE CONTRATO Nº 7/2026"
+    assert _acts(tmp_path / "edicao.pdf") == [
+        # Cabeçalho do jornal (margem) e texto antes do primeiro ato ficam sem ato
+        (1, None, None, None, "DIÁRIO OFICIAL DA UNIÃO"),
+        (1, None, None, None, "Texto antes do primeiro ato"),
+        (1, "1-1", "MINISTÉRIO DA SAÚDE", "PORTARIA Nº 1, DE 2 DE JANEIRO DE 2026",
+         "MINISTÉRIO DA SAÚDE PORTARIA Nº 1, DE 2 DE JANEIRO DE 2026 Aprova o contrato de limpeza."),
+        # Sem órgão no cabeçalho, o ato herda o do anterior; "ANEXO I" em negrito não abre outro ato
+        (1, "1-2", "MINISTÉRIO DA SAÚDE", extract,
+         f"{extract} Objeto: serviços de vigilância. ANEXO I Valor global."),
+        # O corpo no topo da página seguinte continua o ato
+        (2, "1-2", "MINISTÉRIO DA SAÚDE", extract, "Vigência: doze meses."),
+        (2, "2-1", "SECRETARIA DE GESTÃO", "AVISO DE LICITAÇÃO",
+         "SECRETARIA DE GESTÃO AVISO DE LICITAÇÃO Pregão eletrônico nº 3/2026."),
+    ]
+
+
+def test_is_act_title():
+    assert is_act_title("PORTARIA Nº 12, DE 3 DE MARÇO DE 2026")
+    assert is_act_title("RESOLUÇÃO CD/FNDE Nº 5")
+    assert not is_act_title("Portaria nº 12")  # título do DOU é em maiúsculas
+    assert not is_act_title("ANEXO I")
+    assert not is_act_title("ATOSSEGUINTES")
+    assert not is_act_title("")
+
+
+def test_text_only_extraction_has_no_words_or_acts(tmp_path):
+    doc = fitz.open()
+    _write(doc.new_page(), 80, "PORTARIA Nº 1", bold=True)
+    doc.save(tmp_path / "edicao.pdf")
+    doc.close()
+    (page,) = iter_pdf_pages(str(tmp_path / "edicao.pdf"), workers=1)
+    assert page.text.strip() == "PORTARIA Nº 1"
+    assert page.words is None and page.acts is None
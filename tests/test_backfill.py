@@ -0,0 +1,83 @@
+from datetime import date
+
+import fitz
+
+import backfill
+from dou_fetcher import DOUFetcher
+from edition_cache import EditionCache
+from report_store import EDITION_DONE, EDITION_MISSING, ReportStore
+from term_matcher import TermMatcher
+from text_index import TextIndex
+
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _Session:
+    """Página de leitura que, sem edição no dia pedido, lista o PDF da edição anterior."""
+
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        return _Response(url, '<a class="btn-diario-completo" href="/pdf/2026_10_16_ASSINADO_do1.pdf">PDF</a>')
+
+
+def test_date_without_edition_is_recorded_as_missing(tmp_path):
+    session = _Session()
+    fetcher = DOUFetcher(base_url="https://dou.test/leiturajornal", session=session)
+    cache = EditionCache(str(tmp_path / "cache"))
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    matcher = TermMatcher([("Compras", "contrato")])
+
+    status = backfill.process_edition(fetcher, cache, matcher, store, date(2026, 10, 17), "do1", 1)
+
+    assert status == EDITION_MISSING
+    # Só a página da edição foi consultada: o PDF do dia anterior não é baixado
+    assert session.requested == ["https://dou.test/leiturajornal?data=17-10-2026&secao=do1"]
+    assert cache.lookup(date(2026, 10, 17)) is None
+    processed = store.processed_editions("2026-10-17", "2026-10-17", matcher.version)
+    assert processed == {("2026-10-17", "do1"): EDITION_MISSING}
+
+
+def test_cached_edition_is_streamed_through_analysis_and_index(monkeypatch, tmp_path):
+    doc = fitz.open()
+    for number in range(3):
+        doc.new_page().insert_text((72, 100), f"Página {number + 1} do contrato de obras", fontname="helv")
+    doc.save(tmp_path / "edicao.pdf")
+    doc.close()
+    cache = EditionCache(str(tmp_path / "cache"))
+    cache.store_pdf(str(tmp_path / "edicao.pdf"), date(2026, 10, 16))
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    text_index = TextIndex(str(tmp_path / "text.sqlite"))
+    matcher = TermMatcher([("Obras", "contrato")])
+
+    # A edição não é carregada inteira (get_pages); as páginas vêm do gerador, uma de cada vez
+    def get_pages(*args, **kwargs):
+        raise AssertionError("get_pages carrega a edição inteira")
+
+    monkeypatch.setattr(cache, "get_pages", get_pages)
+    consumed = []
+    iter_pages = cache.iter_pages
+
+    def tracked_iter_pages(pdf_path, workers=None):
+        for page in iter_pages(pdf_path, workers=workers):
+            consumed.append(page.number)
+            yield page
+
+    monkeypatch.setattr(cache, "iter_pages", tracked_iter_pages)
+
+    status = backfill.process_edition(None, cache, matcher, store, date(2026, 10, 16), "do1", 1, text_index=text_index)
+
+    assert status == EDITION_DONE
+    # Uma passada da análise (extraindo e gravando o auxiliar) e uma da indexação (lendo o auxiliar)
+    assert consumed == [1, 2, 3, 1, 2, 3]
+    assert store.query()["Página"].tolist() == [1, 2, 3]
+    assert text_index.term_history("obras")["hits"] == 3
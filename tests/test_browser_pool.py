@@ -0,0 +1,40 @@
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class _Browser:
+    launched = 0
+
+    def __init__(self, index, port, download_dir):
+        _Browser.launched += 1
+        self.index = index
+        self.uses = 0
+        self.resets = 0
+        self.fail_reset = False
+
+    def is_healthy(self):
+        return True
+
+    def reset(self):
+        if self.fail_reset:
+            raise RuntimeError("sem resposta")
+        self.resets += 1
+
+    def quit(self):
+        pass
+
+
+def test_lease_resets_or_replaces_the_browser(monkeypatch, tmp_path):
+    monkeypatch.setattr(browser_pool, "PooledBrowser", _Browser)
+    pool = BrowserPool(size=1, download_root=str(tmp_path)).start()
+    with pool.lease() as browser:
+        first = browser
+    assert first.resets == 1
+
+    with pool.lease() as browser:
+        assert browser is first
+        browser.fail_reset = True
+    # A sessão não pôde ser limpa: o próximo empréstimo recebe outro navegador
+    with pool.lease() as browser:
+        assert browser is not first and _Browser.launched == 2
+    pool.close()
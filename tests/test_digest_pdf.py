@@ -0,0 +1,41 @@
+import math
+
+import fitz
+
+from digest_pdf import NO_SECTOR, build_digest_pdf
+from term_matcher import Finding
+
+
+def _make_pdf(path, n_pages):
+    doc = fitz.open()
+    for number in range(1, n_pages + 1):
+        doc.new_page().insert_text((72, 72), f"Página {number}")
+    doc.save(path)
+
+
+def test_digest_with_blank_sector(tmp_path):
+    source = str(tmp_path / "edition.pdf")
+    _make_pdf(source, 5)
+    findings = [
+        Finding("Compras", "contrato", 2),
+        Finding(math.nan, "portaria", 4),
+        Finding(None, "portaria", 5),
+    ]
+    digest = build_digest_pdf(source, findings, str(tmp_path / "digest.pdf"))
+
+    doc = fitz.open(digest)
+    # Índice + páginas 2, 4 e 5
+    assert len(doc) == 4
+    index_text = doc[0].get_text()
+    assert "Compras" in index_text and NO_SECTOR in index_text
+    assert [doc[i].get_label() for i in range(1, 4)] == ["2", "4", "5"]
+    # Cada número do índice aponta para a sua página no resumo
+    destinations = [doc.xref_get_key(link["xref"], "A/D")[1] for link in doc[0].get_links()]
+    assert destinations == [f"[{doc[i].xref} 0 R/Fit]" for i in range(1, 4)]
+
+
+def test_digest_without_findings(tmp_path):
+    source = str(tmp_path / "edition.pdf")
+    _make_pdf(source, 2)
+    doc = fitz.open(build_digest_pdf(source, [], str(tmp_path / "digest.pdf")))
+    assert len(doc) == 1
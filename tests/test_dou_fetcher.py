@@ -0,0 +1,118 @@
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import dou_fetcher
+from dou_fetcher import DOUFetcher, build_session
+
+PAGE_URL = "https://www.in.gov.br/leiturajornal?data=16-10-2026&secao=do1"
+
+
+def _page(*hrefs):
+    return "".join(f'<a href="{href}">PDF</a>' for href in hrefs)
+
+
+def test_pdf_link_of_requested_date_and_section():
+    html = _page("/pdf/2026_10_16_ASSINADO_do2.pdf", "/pdf/2026_10_16_ASSINADO_do1.pdf")
+    link = DOUFetcher._find_pdf_link(html, PAGE_URL, date(2026, 10, 16), "do1")
+    assert link == "https://www.in.gov.br/pdf/2026_10_16_ASSINADO_do1.pdf"
+
+
+def test_no_link_when_only_another_edition_is_listed():
+    # Sem edição no dia, a página mostra o PDF da edição anterior
+    html = _page("/pdf/2026_10_15_ASSINADO_do1.pdf", "/pdf/outro.pdf")
+    assert DOUFetcher._find_pdf_link(html, PAGE_URL, date(2026, 10, 16), "do1") is None
+    html = _page("/pdf/2026_10_16_ASSINADO_do2.pdf")
+    assert DOUFetcher._find_pdf_link(html, PAGE_URL, date(2026, 10, 16), "do1") is None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Página de leitura e PDF da edição, com respostas configuráveis por caminho."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        state = self.server.state
+        state["requests"].append((self.command, self.path))
+        path = self.path.split("?")[0]
+        failures = state["failures"].get((self.command, path), 0)
+        if failures:
+            state["failures"][(self.command, path)] = failures - 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = state["routes"].get(path)
+        self.send_response(200 if body is not None else 404)
+        body = body or b""
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.state = {"routes": {}, "failures": {}, "requests": []}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _fetcher(httpd, **session_kwargs):
+    host, port = httpd.server_address[:2]
+    session = build_session(backoff_factor=0, **session_kwargs)
+    return DOUFetcher(base_url=f"http://{host}:{port}/leiturajornal", session=session), f"http://{host}:{port}"
+
+
+def test_fetch_pdf_streams_the_edition(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(dou_fetcher, "CHUNK_SIZE", 1024)
+    content = b"%PDF-1.7\n" + bytes(range(256)) * 40
+    server.state["routes"] = {
+        "/leiturajornal": _page("/pdf/2026_10_16_ASSINADO_do1.pdf").encode(),
+        "/pdf/2026_10_16_ASSINADO_do1.pdf": content,
+    }
+    # A primeira consulta à página falha com 503 e é repetida pela sessão
+    server.state["failures"] = {("GET", "/leiturajornal"): 1}
+    fetcher, _ = _fetcher(server)
+    dest = tmp_path / "edicoes" / "do1.pdf"
+
+    assert fetcher.fetch_pdf(str(dest), date(2026, 10, 16)) == str(dest)
+    assert dest.read_bytes() == content
+    assert not os.path.exists(str(dest) + ".part")
+    assert [path for _, path in server.state["requests"]] == [
+        "/leiturajornal?data=16-10-2026&secao=do1",
+        "/leiturajornal?data=16-10-2026&secao=do1",
+        "/pdf/2026_10_16_ASSINADO_do1.pdf",
+    ]
+
+
+def test_fetch_pdf_rejects_content_that_is_not_a_pdf(tmp_path, server):
+    server.state["routes"] = {
+        "/leiturajornal": _page("/pdf/2026_10_16_ASSINADO_do1.pdf").encode(),
+        "/pdf/2026_10_16_ASSINADO_do1.pdf": b"<html>manutencao</html>",
+    }
+    fetcher, _ = _fetcher(server)
+    dest = tmp_path / "do1.pdf"
+    assert fetcher.fetch_pdf(str(dest), date(2026, 10, 16)) is None
+    assert not dest.exists() and not os.path.exists(str(dest) + ".part")
+
+
+def test_post_is_retried_only_when_allowed(server):
+    server.state["routes"] = {"/git/blobs": b"{}"}
+    server.state["failures"] = {("POST", "/git/blobs"): 1}
+    _, url = _fetcher(server)
+    assert build_session(backoff_factor=0).post(f"{url}/git/blobs").status_code == 503
+
+    server.state["failures"] = {("POST", "/git/blobs"): 1}
+    session = build_session(backoff_factor=0, extra_retry_methods=("POST",))
+    assert session.post(f"{url}/git/blobs").status_code == 200
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+import pytest
+
+import download_watcher
+from download_watcher import _Inotify, _Polling, wait_for_download, wait_for_download_start
+
+
+def _finish_later(directory, delay=0.2, content=b"%PDF-1.4 edicao"):
+    # Como o navegador: grava o .crdownload e o renomeia ao concluir
+    def run():
+        partial = os.path.join(directory, "edicao.pdf.crdownload")
+        with open(partial, "wb") as fh:
+            fh.write(content)
+        time.sleep(delay)
+        os.rename(partial, os.path.join(directory, "edicao.pdf"))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(download_watcher, "_Inotify", lambda directory: _Polling(interval=0.01))
+    else:
+        try:
+            _Inotify(".").close()
+        except (OSError, AttributeError):
+            pytest.skip("inotify indisponível")
+    return request.param
+
+
+def test_waits_for_the_partial_file_to_be_renamed(tmp_path, watcher):
+    since = time.time()
+    thread = _finish_later(str(tmp_path))
+    assert wait_for_download_start(str(tmp_path), timeout=5, since=since)
+    result = wait_for_download(str(tmp_path), timeout=5, since=since)
+    thread.join()
+    assert result.path == str(tmp_path / "edicao.pdf")
+    assert result.size == len(b"%PDF-1.4 edicao")
+
+
+def test_stale_partial_does_not_block(tmp_path, watcher):
+    stale = tmp_path / "antigo.pdf.crdownload"
+    stale.write_bytes(b"%PDF")
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+    since = time.time()
+    thread = _finish_later(str(tmp_path), delay=0.05)
+    result = wait_for_download(str(tmp_path), timeout=5, since=since)
+    thread.join()
+    assert result and result.path == str(tmp_path / "edicao.pdf")
+
+
+def test_file_from_before_the_download_is_ignored(tmp_path, watcher):
+    old = tmp_path / "anterior.pdf"
+    old.write_bytes(b"%PDF")
+    os.utime(old, (time.time() - 3600, time.time() - 3600))
+    started = time.time()
+    assert wait_for_download(str(tmp_path), timeout=0.3, since=time.time()) is None
+    assert time.time() - started >= 0.3
+
+
+def test_missing_directory_is_created(tmp_path, watcher):
+    directory = tmp_path / "downloads"
+    assert wait_for_download_start(str(directory), timeout=0.1, since=time.time()) is None
+    assert directory.is_dir()
@@ -0,0 +1,157 @@
+import hashlib
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import drive_uploader
+from main import GoogleDriveService
+
+
+class _MetadataCache:
+    refreshes = 0
+    files = {}
+
+    def __init__(self, folder_id):
+        pass
+
+    def refresh(self):
+        _MetadataCache.refreshes += 1
+
+    def find_by_name(self, name):
+        return next((f for f in self.files.values() if f["name"] == name), None)
+
+
+def _write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_upload_skips_only_unchanged_files_already_in_folder(monkeypatch, tmp_path):
+    same = _write(tmp_path / "DOU_16_10_2026_highlighted.pdf", b"%PDF mesma")
+    changed = _write(tmp_path / "search_report.csv", b"linha nova")
+    new = _write(tmp_path / "search_report.xlsx", b"planilha")
+    monkeypatch.setattr(_MetadataCache, "files", {
+        "1": {"id": "1", "name": "DOU_16_10_2026_highlighted.pdf", "md5Checksum": drive_uploader.file_md5(same)},
+        "3": {"id": "3", "name": "search_report.csv", "md5Checksum": hashlib.md5(b"linha antiga").hexdigest()},
+    })
+    monkeypatch.setattr(drive_uploader, "DriveMetadataCache", _MetadataCache)
+    sent = []
+
+    def upload_many(files, folder_id=None):
+        sent.extend(files)
+        return {path: drive_uploader.UploadResult("2", path, 1, 1.0, 1.0) for path in files}
+
+    monkeypatch.setattr(drive_uploader, "upload_many", upload_many)
+    service = GoogleDriveService.__new__(GoogleDriveService)
+    service._metadata_caches = {}
+
+    assert service.upload_files([same, changed, new], folder_id="pasta") == {same: "1", changed: "2", new: "2"}
+    # O arquivo com o mesmo nome e outro conteúdo é enviado de novo
+    assert sent == [changed, new]
+    assert service.file_exists("DOU_16_10_2026_highlighted.pdf", folder_id="pasta")
+    # O cache da pasta é criado uma vez e só atualizado pelo feed de alterações
+    assert list(service._metadata_caches) == ["pasta"] and _MetadataCache.refreshes == 2
+
+
+def test_metadata_cache_is_kept_per_folder(monkeypatch, tmp_path):
+    monkeypatch.setattr(drive_uploader, "DRIVE_METADATA_CACHE_DIR", str(tmp_path))
+    for folder_id in ("pasta_a", "pasta_b"):
+        cache = drive_uploader.DriveMetadataCache(folder_id)
+        cache.page_token = f"token_{folder_id}"
+        cache.files = {folder_id: {"id": folder_id, "name": f"{folder_id}.pdf"}}
+        cache._save()
+
+    # Alternar entre pastas não descarta o token nem os arquivos da outra
+    for folder_id in ("pasta_a", "pasta_b"):
+        cache = drive_uploader.DriveMetadataCache(folder_id)
+        assert cache.path == str(tmp_path / f"{folder_id}.json")
+        assert cache.page_token == f"token_{folder_id}"
+        assert cache.find_by_name(f"{folder_id}.pdf")["id"] == folder_id
+
+
+def test_local_file_errors_are_not_retried():
+    assert not drive_uploader._is_retriable(FileNotFoundError("edicao.pdf"))
+    assert not drive_uploader._is_retriable(PermissionError("edicao.pdf"))
+    assert drive_uploader._is_retriable(ConnectionResetError())
+    assert drive_uploader._is_retriable(TimeoutError())
+
+
+class _Status:
+    def __init__(self, resumable_progress):
+        self.resumable_progress = resumable_progress
+
+
+class _UploadRequest:
+    """Upload resumível que segue um roteiro de blocos: bytes confirmados ou exceções."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def next_chunk(self):
+        self.calls += 1
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        if step is None:
+            return None, {"id": "arquivo"}
+        return _Status(step), None
+
+
+class _DriveApi:
+    def __init__(self, request):
+        self.request = request
+        self.created = []
+
+    def files(self):
+        return self
+
+    def create(self, **kwargs):
+        self.created.append(kwargs)
+        return self.request
+
+
+def _http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"")
+
+
+def _upload(monkeypatch, tmp_path, script, max_retries=5):
+    import googleapiclient.http
+
+    request = _UploadRequest(script)
+    api = _DriveApi(request)
+    sleeps = []
+    monkeypatch.setattr(drive_uploader, "get_service", lambda: api)
+    monkeypatch.setattr(googleapiclient.http, "MediaFileUpload", lambda path, **kwargs: (path, kwargs))
+    monkeypatch.setattr(drive_uploader.time, "sleep", sleeps.append)
+    monkeypatch.setattr(drive_uploader.random, "random", lambda: 0.5)
+    progress = []
+    path = _write(tmp_path / "edicao.pdf", b"%PDF" + b"0" * 12)
+    result = drive_uploader.upload_to_drive(
+        path, folder_id="pasta", chunk_size=256 * 1024, max_retries=max_retries,
+        progress=lambda _, sent, total: progress.append((sent, total)),
+    )
+    return result, request, api, sleeps, progress
+
+
+def test_resumable_upload_resumes_after_failed_chunks(monkeypatch, tmp_path):
+    script = [4, _http_error(503), ConnectionResetError(), 8, _http_error(429), 12, None]
+    result, request, api, sleeps, progress = _upload(monkeypatch, tmp_path, script)
+
+    assert result.file_id == "arquivo" and result.size == 16
+    # O mesmo pedido continua de onde parou: um único create, sem reenviar os blocos confirmados
+    assert len(api.created) == 1 and api.created[0]["body"]["parents"] == ["pasta"]
+    assert request.calls == 7
+    assert progress == [(4, 16), (8, 16), (12, 16), (16, 16)]
+    # Backoff exponencial, zerado após cada bloco confirmado
+    assert sleeps == [2.5, 4.5, 2.5]
+
+
+def test_resumable_upload_gives_up_on_permanent_or_repeated_errors(monkeypatch, tmp_path):
+    with pytest.raises(HttpError) as permanent:
+        _upload(monkeypatch, tmp_path, [4, _http_error(403)])
+    assert permanent.value.resp.status == 403
+
+    with pytest.raises(ConnectionResetError):
+        _upload(monkeypatch, tmp_path, [ConnectionResetError()] * 3, max_retries=2)
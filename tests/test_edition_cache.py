@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from edition_cache import EditionCache
+
+
+def _pdf(path, size=1000):
+    with open(path, "wb") as fh:
+        fh.write(b"%PDF" + os.urandom(size))
+    return str(path)
+
+
+def test_concurrent_store_keeps_the_cache_bounded(tmp_path):
+    cache = EditionCache(str(tmp_path / "cache"), max_bytes=3000)
+    editions = [date(2026, 10, 1) + timedelta(days=day) for day in range(20)]
+
+    def store(edition_date):
+        return cache.store_pdf(_pdf(tmp_path / f"{edition_date}.pdf"), edition_date)
+
+    # Gravações e remoções simultâneas não falham com arquivos removidos por outra thread
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(store, editions))
+    # Edições protegidas durante a gravação de outras threads saem na limpeza seguinte
+    cache.evict()
+    remaining = list(cache.iter_editions())
+    assert 1 <= len(remaining) <= 3
+
+
+def test_edition_being_written_is_not_evicted(tmp_path):
+    cache = EditionCache(str(tmp_path / "cache"), max_bytes=1500)
+    old_path = cache.store_pdf(_pdf(tmp_path / "old.pdf"), date(2026, 10, 1))
+    os.utime(old_path, (0, 0))
+    marker = cache._begin_write(old_path)
+    try:
+        new_path = cache.store_pdf(_pdf(tmp_path / "new.pdf"), date(2026, 10, 2))
+    finally:
+        cache._end_write(old_path, marker)
+    assert os.path.exists(old_path) and os.path.exists(new_path)
+
+    # Terminada a gravação, a edição antiga volta a ser removível
+    cache.evict()
+    assert not os.path.exists(old_path) and os.path.exists(new_path)
+
+
+def _write_in_other_process(root, pdf_path, started, release):
+    cache = EditionCache(root)
+    marker = cache._begin_write(pdf_path)
+    started.set()
+    release.wait(10)
+    cache._end_write(pdf_path, marker)
+
+
+def test_edition_being_written_by_another_process_is_not_evicted(tmp_path):
+    root = str(tmp_path / "cache")
+    cache = EditionCache(root, max_bytes=1500)
+    old_path = cache.store_pdf(_pdf(tmp_path / "old.pdf"), date(2026, 10, 1))
+    os.utime(old_path, (0, 0))
+
+    context = multiprocessing.get_context("fork")
+    started, release = context.Event(), context.Event()
+    writer = context.Process(target=_write_in_other_process, args=(root, old_path, started, release))
+    writer.start()
+    try:
+        assert started.wait(10)
+        # A contagem de gravações deste processo não vê o outro; quem protege é o flock no marcador
+        assert not cache._writing
+        new_path = cache.store_pdf(_pdf(tmp_path / "new.pdf"), date(2026, 10, 2))
+        assert os.path.exists(old_path) and os.path.exists(new_path)
+    finally:
+        release.set()
+        writer.join(10)
+
+    cache.evict()
+    assert not os.path.exists(old_path) and os.path.exists(new_path)
+    assert not os.path.exists(os.path.dirname(old_path))
+
+
+def test_lookup_returns_the_last_stored_version_or_the_requested_sha(tmp_path):
+    cache = EditionCache(str(tmp_path / "cache"))
+    edition_date = date(2026, 10, 1)
+    first = cache.store_pdf(_pdf(tmp_path / "first.pdf"), edition_date)
+    second = cache.store_pdf(_pdf(tmp_path / "second.pdf"), edition_date)
+    # Um uso da versão anterior (mtime mais novo) não a torna a versão atual
+    os.utime(first)
+    os.utime(second, (0, 0))
+
+    assert cache.lookup(edition_date) == second
+    assert [path for _, _, path in cache.iter_editions()] == [second]
+    first_sha = os.path.basename(first)[:-len(".pdf")]
+    assert cache.lookup(edition_date, sha256=first_sha) == first
+    assert cache.lookup(edition_date, sha256="0" * 64) is None
+    assert cache.lookup(date(2026, 10, 2)) is None
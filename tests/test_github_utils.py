@@ -0,0 +1,81 @@
+import base64
+import os
+
+import pytest
+import requests
+
+import github_utils
+from benchmarks.standins import StandinServer
+from github_utils import GitHubBatchUploader, _Base64BlobBody
+
+
+@pytest.fixture
+def server():
+    with StandinServer() as server:
+        yield server
+
+
+def _file(path, size):
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_blob_body_is_streamed_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(github_utils, "BLOB_READ_SIZE", 3 * 10)
+    path = _file(tmp_path / "edicao.pdf", 100)
+    body = _Base64BlobBody(path)
+    chunks = list(body)
+    assert len(chunks) > 3
+    payload = b"".join(chunks)
+    assert len(payload) == len(body)
+    with open(path, "rb") as fh:
+        assert payload == b'{"encoding":"base64","content":"' + base64.b64encode(fh.read()) + b'"}'
+
+
+def test_batch_commit_sequence(tmp_path, server):
+    pdf = _file(tmp_path / "edicao.pdf", 3 * 256 * 1024 + 5)
+    report = _file(tmp_path / "search_report.xlsx", 10)
+    uploader = GitHubBatchUploader(repo="dono/repo", branch="main", token="x", api_url=server.url)
+    uploader.add(pdf, "PDFs/edicao.pdf")
+    uploader.add(report, "Reports/search_report.xlsx")
+
+    sha = uploader.commit("Adiciona resultados")
+
+    assert server.state.head == sha
+    assert [(method, path.rsplit("/repos/dono/repo/", 1)[1]) for method, path in server.state.requests] == [
+        ("POST", "git/blobs"),
+        ("POST", "git/blobs"),
+        ("GET", "git/ref/heads/main"),
+        ("GET", "git/commits/c0"),
+        ("POST", "git/trees"),
+        ("POST", "git/commits"),
+        ("PATCH", "git/refs/heads/main"),
+    ]
+    with open(pdf, "rb") as fh:
+        assert fh.read() in server.state.blobs.values()
+    # O corpo do blob chega com o Content-Length calculado antes da leitura do arquivo
+    assert server.state.blob_content_lengths[0] == len(_Base64BlobBody(pdf))
+    assert uploader.files == []
+
+
+def test_ref_conflict_is_retried_on_the_new_head(tmp_path, server):
+    server.state.ref_conflicts = 1
+    uploader = GitHubBatchUploader(repo="dono/repo", branch="main", token="x", api_url=server.url)
+    uploader.add(_file(tmp_path / "edicao.pdf", 10))
+
+    sha = uploader.commit("Adiciona resultados")
+
+    assert server.state.head == sha
+    endpoints = [path.rsplit("/", 1)[-1] for method, path in server.state.requests if method == "PATCH"]
+    assert endpoints == ["main", "main"]
+    # Os blobs não são reenviados; tree e commit são refeitos sobre o novo HEAD
+    assert sum(path.endswith("/git/blobs") for _, path in server.state.requests) == 1
+    assert sum(path.endswith("/git/commits") for _, path in server.state.requests) == 2
+
+
+def test_persistent_conflict_raises(tmp_path, server):
+    server.state.ref_conflicts = 5
+    uploader = GitHubBatchUploader(repo="dono/repo", branch="main", token="x", api_url=server.url)
+    uploader.add(_file(tmp_path / "edicao.pdf", 10))
+    with pytest.raises(requests.exceptions.HTTPError):
+        uploader.commit("Adiciona resultados", max_attempts=2)
@@ -0,0 +1,191 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import instrumentation
+from instrumentation import RunMetrics, SpanRecorder
+
+STARTED_AT = 1792152000  # 2026-10-16 12:00:00 UTC
+
+
+class _Clock:
+    """Relógio de parede e de CPU controlado pelo teste."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(instrumentation, "time", SimpleNamespace(
+        perf_counter=lambda: clock.now, process_time=lambda: clock.now, time=lambda: STARTED_AT + clock.now,
+    ))
+    monkeypatch.setattr(instrumentation, "_children_cpu", lambda: 0.0)
+    monkeypatch.setattr(instrumentation, "reset_peak_rss", lambda: True)
+    monkeypatch.setattr(instrumentation, "peak_rss_bytes", lambda: 64 * 1024 * 1024)
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield clock
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_nested_spans_are_recorded_when_they_end(clock):
+    recorder = SpanRecorder()
+    with recorder.span("download"):
+        clock.advance(1)
+        with recorder.span("page_load"):
+            clock.advance(2)
+        with recorder.span("click"):
+            clock.advance(0.5)
+        with recorder.span("click"):
+            clock.advance(0.25)
+        clock.advance(1)
+
+    assert [(span.name, span.duration) for span in recorder.spans] == [
+        ("page_load", 2), ("click", 0.5), ("click", 0.25), ("download", 4.75),
+    ]
+    assert recorder.spans[-1].start == STARTED_AT
+    # O intervalo externo inclui os internos; passos repetidos são somados
+    assert recorder.durations() == {"page_load": 2, "click": 0.75, "download": 4.75}
+
+
+def test_iter_stage_subtracts_the_upstream_time(clock):
+    metrics = RunMetrics(run_id="teste")
+
+    def extract():
+        for number in range(3):
+            clock.advance(1)
+            yield number
+
+    def match(pages):
+        for page in pages:
+            clock.advance(2)
+            if page != 1:
+                yield page
+
+    pages = metrics.iter_stage("extract", extract())
+    matches = metrics.iter_stage("match", match(pages), upstream="extract")
+    assert list(matches) == [0, 2]
+
+    extract_stage, match_stage = metrics.stages["extract"], metrics.stages["match"]
+    assert (extract_stage.wall_seconds, extract_stage.cpu_seconds, extract_stage.items) == (3, 3, 3)
+    # Cada `next` da busca também roda a extração; só o tempo da própria busca fica com ela
+    assert (match_stage.wall_seconds, match_stage.cpu_seconds, match_stage.items) == (6, 6, 2)
+    assert list(metrics.stages) == ["extract", "match"]
+
+
+def test_stage_marks_errors_and_accumulates(clock):
+    metrics = RunMetrics(run_id="teste")
+    with metrics.stage("upload") as record:
+        clock.advance(1)
+        record.add(items=1, bytes_out=10)
+    with pytest.raises(RuntimeError):
+        with metrics.stage("upload") as record:
+            clock.advance(2)
+            raise RuntimeError("Drive indisponível")
+    upload = metrics.stages["upload"]
+    assert (upload.wall_seconds, upload.items, upload.bytes_out, upload.status) == (3, 1, 10, "error")
+    assert metrics.summary()["status"] == "error"
+
+
+GOLDEN_PROM = """\
+# HELP scraperdou_stage_wall_seconds Tempo de relógio da etapa
+# TYPE scraperdou_stage_wall_seconds gauge
+scraperdou_stage_wall_seconds{stage="terms"} 1.5
+scraperdou_stage_wall_seconds{stage="extract"} 2.0
+# HELP scraperdou_stage_cpu_seconds Tempo de CPU do processo na etapa
+# TYPE scraperdou_stage_cpu_seconds gauge
+scraperdou_stage_cpu_seconds{stage="terms"} 1.5
+scraperdou_stage_cpu_seconds{stage="extract"} 2.0
+# HELP scraperdou_stage_children_cpu_seconds Tempo de CPU dos processos filhos na etapa
+# TYPE scraperdou_stage_children_cpu_seconds gauge
+scraperdou_stage_children_cpu_seconds{stage="terms"} 0.0
+scraperdou_stage_children_cpu_seconds{stage="extract"} 0.0
+# HELP scraperdou_stage_peak_rss_bytes Pico de memória residente na etapa
+# TYPE scraperdou_stage_peak_rss_bytes gauge
+scraperdou_stage_peak_rss_bytes{stage="terms"} 67108864
+scraperdou_stage_peak_rss_bytes{stage="extract"} 67108864
+# HELP scraperdou_stage_bytes_in Bytes lidos pela etapa
+# TYPE scraperdou_stage_bytes_in gauge
+scraperdou_stage_bytes_in{stage="terms"} 0
+scraperdou_stage_bytes_in{stage="extract"} 2048
+# HELP scraperdou_stage_bytes_out Bytes gravados ou enviados pela etapa
+# TYPE scraperdou_stage_bytes_out gauge
+scraperdou_stage_bytes_out{stage="terms"} 0
+scraperdou_stage_bytes_out{stage="extract"} 0
+# HELP scraperdou_stage_items Itens processados pela etapa
+# TYPE scraperdou_stage_items gauge
+scraperdou_stage_items{stage="terms"} 120
+scraperdou_stage_items{stage="extract"} 2
+# HELP scraperdou_step_seconds Duração de cada passo da navegação
+# TYPE scraperdou_step_seconds gauge
+scraperdou_step_seconds{step="page_load"} 0.5
+# HELP scraperdou_run_wall_seconds Duração total da última execução
+# TYPE scraperdou_run_wall_seconds gauge
+scraperdou_run_wall_seconds 4.0
+# HELP scraperdou_run_success 1 se a última execução terminou sem erros
+# TYPE scraperdou_run_success gauge
+scraperdou_run_success 1
+# HELP scraperdou_run_timestamp_seconds Início da última execução (epoch)
+# TYPE scraperdou_run_timestamp_seconds gauge
+scraperdou_run_timestamp_seconds 1792152000
+# HELP scraperdou_run_peak_rss_bytes Pico de memória residente da última execução
+# TYPE scraperdou_run_peak_rss_bytes gauge
+scraperdou_run_peak_rss_bytes 67108864
+# HELP scraperdou_run_memory_limit_bytes Teto de memória do modo de memória limitada
+# TYPE scraperdou_run_memory_limit_bytes gauge
+scraperdou_run_memory_limit_bytes 268435456
+"""
+
+
+def _golden_run(tmp_path, clock):
+    metrics = RunMetrics(run_id="golden", metrics_dir=str(tmp_path), textfile=str(tmp_path / "scraperdou.prom"))
+    metrics.memory_limit_bytes = 256 * 1024 * 1024
+    with metrics.stage("terms") as record:
+        clock.advance(1.5)
+        record.add(items=120)
+    with metrics.span("page_load"):
+        clock.advance(0.5)
+
+    def pages():
+        for number in (1, 2):
+            clock.advance(1)
+            yield number
+
+    for _ in metrics.iter_stage("extract", pages()):
+        pass
+    metrics.stages["extract"].add(bytes_in=2048)
+    return metrics
+
+
+def test_prometheus_and_json_output_match_the_golden_files(clock, tmp_path):
+    metrics = _golden_run(tmp_path, clock)
+    summary = metrics.write()
+    metrics.write()
+
+    assert (tmp_path / "scraperdou.prom").read_text(encoding="utf-8") == GOLDEN_PROM
+    assert json.loads((tmp_path / "last_run.json").read_text(encoding="utf-8")) == summary == {
+        "run_id": "golden",
+        "started_at": "2026-10-16T12:00:00",
+        "wall_seconds": 4.0,
+        "status": "ok",
+        "peak_rss_bytes": 67108864,
+        "memory_limit_bytes": 268435456,
+        "stages": [
+            {"name": "terms", "wall_seconds": 1.5, "cpu_seconds": 1.5, "children_cpu_seconds": 0.0,
+             "peak_rss_bytes": 67108864, "bytes_in": 0, "bytes_out": 0, "items": 120, "status": "ok"},
+            {"name": "extract", "wall_seconds": 2.0, "cpu_seconds": 2.0, "children_cpu_seconds": 0.0,
+             "peak_rss_bytes": 67108864, "bytes_in": 2048, "bytes_out": 0, "items": 2, "status": "ok"},
+        ],
+        "steps": {"page_load": 0.5},
+    }
+    # Cada gravação acrescenta uma linha ao histórico
+    runs = (tmp_path / "runs.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in runs] == [summary, summary]
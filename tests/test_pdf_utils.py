@@ -0,0 +1,105 @@
+from concurrent.futures import Future
+
+import fitz
+
+import pdf_utils
+from pdf_utils import analyze_pdf, highlight_terms_in_pdf, iter_pdf_pages
+from term_matcher import TermMatcher
+
+
+def _edition(path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Aviso de Licitação do contrato nº 5", fontname="helv", fontsize=11)
+    page.insert_text((72, 130), "Outro parágrafo sem termos", fontname="helv", fontsize=11)
+    doc.new_page().insert_text((72, 100), "Extrato de contrato", fontname="helv", fontsize=11)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def _annotations(path):
+    with fitz.open(path) as doc:
+        return {
+            page.number + 1: sorted(tuple(round(v) for v in annot.rect) for annot in page.annots())
+            for page in doc if page.first_annot
+        }
+
+
+def _word_rect(path, page_number, word):
+    with fitz.open(path) as doc:
+        rect = doc[page_number - 1].search_for(word)[0]
+    return rect
+
+
+def test_highlights_without_positions_match_the_analysis(tmp_path):
+    pdf_path = _edition(tmp_path / "edicao.pdf")
+    matcher = TermMatcher([("Compras", "licitacao"), ("Contratos", '"contrato" AND "aviso"')])
+    findings, highlights = analyze_pdf(pdf_path, matcher=matcher, workers=1)
+    assert [(finding.term, finding.page) for finding in findings] == [
+        ("licitacao", 1), ('"contrato" AND "aviso"', 1),
+    ]
+
+    with_positions = highlight_terms_in_pdf(pdf_path, findings, highlights, str(tmp_path / "a.pdf"))
+    recomputed = highlight_terms_in_pdf(pdf_path, findings, output_pdf_path=str(tmp_path / "b.pdf"))
+    annotations = _annotations(recomputed)
+    assert annotations == _annotations(with_positions)
+
+    # "licitacao" (sem acento) destaca "Licitação"; a expressão destaca "Aviso" e "contrato" da página 1,
+    # não o "contrato" da página 2, em que a regra não vale
+    assert list(annotations) == [1]
+    for word in ("Licitação", "Aviso", "contrato"):
+        rect = _word_rect(pdf_path, 1, word)
+        assert any(fitz.Rect(annot).intersects(rect) for annot in annotations[1])
+    assert len(annotations[1]) == 3
+
+
+def _long_edition(path, pages=24):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 80), f"PORTARIA Nº {number + 1}", fontname="hebo", fontsize=11)
+        page.insert_text((72, 110), f"Texto da página {number + 1} sobre o contrato", fontname="helv", fontsize=11)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_parallel_extraction_matches_the_sequential_path(tmp_path):
+    pdf_path = _long_edition(tmp_path / "edicao.pdf")
+    sequential = list(iter_pdf_pages(pdf_path, workers=1, with_words=True))
+    parallel = list(iter_pdf_pages(pdf_path, workers=3, with_words=True))
+    assert [page.number for page in parallel] == list(range(1, 25))
+    assert parallel == sequential
+
+
+class _InlineExecutor:
+    """Executor que roda cada faixa na hora e conta as submissões."""
+
+    submitted = 0
+
+    def __init__(self, max_workers):
+        pass
+
+    def submit(self, fn, *args):
+        _InlineExecutor.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        pass
+
+
+def test_parallel_extraction_submits_a_bounded_window(monkeypatch, tmp_path):
+    pdf_path = _long_edition(tmp_path / "edicao.pdf")
+    monkeypatch.setattr(pdf_utils, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(pdf_utils, "EXTRACTION_PREFETCH", 2)
+    monkeypatch.setattr(_InlineExecutor, "submitted", 0)
+
+    # 2 processos, faixas de 3 páginas (24 páginas / 8 faixas): no máximo 4 faixas submetidas de cada vez
+    pages = iter_pdf_pages(pdf_path, workers=2)
+    assert next(pages).number == 1
+    assert _InlineExecutor.submitted == 5  # a janela inicial e a reposição da faixa consumida
+    assert [page.number for page in pages] == list(range(2, 25))
+    assert _InlineExecutor.submitted == 8
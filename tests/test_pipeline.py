@@ -0,0 +1,74 @@
+from datetime import date
+
+import fitz
+
+import pipeline
+from edition_cache import EditionCache
+from pipeline import MemoryGuard, run_analysis
+from term_matcher import TermMatcher
+
+MB = 1024 * 1024
+
+
+class _Rss:
+    """Leitor de memória residente com valores programados; repete o último."""
+
+    def __init__(self, *values):
+        self.values = list(values)
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.values.pop(0) if len(self.values) > 1 else self.values[0]
+
+
+def _shrinks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(fitz.TOOLS, "store_shrink", lambda percent: calls.append(percent))
+    return calls
+
+
+def test_guard_shrinks_above_the_limit_and_warns_once(monkeypatch, caplog):
+    shrinks = _shrinks(monkeypatch)
+    # Página 1 abaixo do teto; página 2 acima, resolvida pela limpeza; página 3 continua acima
+    monkeypatch.setattr(pipeline, "current_rss_bytes", _Rss(5 * MB, 12 * MB, 8 * MB, 15 * MB, 14 * MB, 14 * MB))
+    guard = MemoryGuard(10)
+
+    assert list(guard.watch(["p1", "p2", "p3"])) == ["p1", "p2", "p3"]
+
+    assert len(shrinks) == 3  # páginas 2 e 3 e a conferência final
+    assert guard.exceeded
+    assert guard.peak_bytes == 14 * MB
+    assert sum("acima do teto" in record.message for record in caplog.records) == 1
+
+
+def test_memory_mode_checks_each_page_read_through_the_edition_cache(monkeypatch, tmp_path):
+    doc = fitz.open()
+    for number in range(3):
+        doc.new_page().insert_text((72, 100), f"Página {number + 1} com o contrato", fontname="helv")
+    doc.save(tmp_path / "edicao.pdf")
+    doc.close()
+    cache = EditionCache(str(tmp_path / "cache"))
+    pdf_path = cache.store_pdf(str(tmp_path / "edicao.pdf"), date(2026, 10, 16))
+
+    requested_workers = []
+    iter_pages = cache.iter_pages
+
+    def tracked_iter_pages(path, workers=None):
+        requested_workers.append(workers)
+        return iter_pages(path, workers=workers)
+
+    monkeypatch.setattr(cache, "iter_pages", tracked_iter_pages)
+    shrinks = _shrinks(monkeypatch)
+    monkeypatch.setattr(pipeline, "current_rss_bytes", _Rss(20 * MB))
+    matcher = TermMatcher([("Obras", "contrato")])
+
+    # Primeira passada: extrai do PDF e grava o auxiliar; segunda: lê o auxiliar
+    for run in range(2):
+        findings = run_analysis(pdf_path, matcher, str(tmp_path / f"destaques_{run}.pdf"),
+                                edition_cache=cache, workers=4, memory_limit_mb=10)
+        assert [finding.page for finding in findings] == [1, 2, 3]
+        assert len(shrinks) == 4 * (run + 1)  # antes de cada página e ao final
+    assert cache.load_pages(pdf_path) is not None
+    # No modo de memória limitada a extração roda no próprio processo, uma página por vez
+    assert requested_workers == [1, 1]
@@ -0,0 +1,49 @@
+from datetime import date
+
+import fitz
+
+from edition_cache import EditionCache
+from instrumentation import RunMetrics
+from main import process_edition
+from report_store import EDITION_DONE, ReportStore
+from term_matcher import TermMatcher
+from text_index import TextIndex
+
+
+def _cached_edition(tmp_path, edition_date):
+    pdf_path = tmp_path / "edicao.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Extrato de contrato")
+    doc.save(pdf_path)
+    doc.close()
+    cache = EditionCache(str(tmp_path / "cache"))
+    cache.store_pdf(str(pdf_path), edition_date)
+    return cache
+
+
+def _process(tmp_path, edition_date, matcher, cache, store):
+    metrics = RunMetrics(metrics_dir=str(tmp_path / "metrics"), textfile=str(tmp_path / "metrics" / "run.prom"))
+    return process_edition(edition_date, matcher, None, edition_cache=cache, metrics=metrics,
+                           text_index=TextIndex(str(tmp_path / "text.sqlite")), store=store)
+
+
+def test_edition_without_terms_is_not_done(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    edition_date = date(2026, 10, 16)
+    cache = _cached_edition(tmp_path, edition_date)
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    assert _process(tmp_path, edition_date, None, cache, store) is False
+    assert _process(tmp_path, edition_date, TermMatcher([]), cache, store) is False
+    assert store.processed_editions("2026-10-16", "2026-10-16") == {}
+
+
+def test_edition_is_done_once_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    edition_date = date(2026, 10, 16)
+    cache = _cached_edition(tmp_path, edition_date)
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    matcher = TermMatcher([("Compras", "contrato")])
+    assert _process(tmp_path, edition_date, matcher, cache, store) is True
+    processed = store.processed_editions("2026-10-16", "2026-10-16", matcher.version)
+    assert processed[("2026-10-16", "do1")] == EDITION_DONE
+    assert list(store.query()["Termo"]) == ["contrato"]
@@ -0,0 +1,100 @@
+import math
+import multiprocessing
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from report_store import EDITION_DONE, ReportStore
+from term_matcher import Finding, TermMatcher
+
+
+def test_blank_sector_from_sheet_is_stored(tmp_path):
+    terms_df = pd.DataFrame({"Setor": ["Compras", float("nan")], "Termo": ["contrato", "portaria"]})
+    matcher = TermMatcher.from_dataframe(terms_df)
+    assert matcher.entries == [("Compras", "contrato"), (None, "portaria")]
+
+    findings = matcher.search_page("Portaria do contrato", 1)
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    assert store.append(findings, "2026-10-16") == 2
+    report = store.query()
+    assert sorted(zip(report["Setor"], report["Termo"])) == [("", "portaria"), ("Compras", "contrato")]
+
+
+def test_nan_sector_is_stored_as_empty(tmp_path):
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    assert store.append([Finding(math.nan, "portaria", 3)], "2026-10-16") == 1
+    assert list(store.query()["Setor"]) == [""]
+
+
+def test_reprocessing_ignores_only_duplicates(tmp_path):
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    findings = [Finding("Compras", "contrato", 1), Finding("Compras", "contrato", 2)]
+    assert store.append(findings, "2026-10-16") == 2
+    assert store.append(findings + [Finding(None, "portaria", 2)], "2026-10-16") == 1
+    assert len(store.query()) == 3
+    assert store.processed_editions("2026-10-16", "2026-10-16") == {("2026-10-16", "do1"): EDITION_DONE}
+
+
+def test_query_filters_and_excel_export(tmp_path):
+    store = ReportStore(str(tmp_path / "report.sqlite"))
+    store.append([Finding("Compras", "contrato", 1)], "2026-10-15")
+    store.append([Finding("Compras", "contrato", 2)], "2026-10-16", section="do3")
+    store.append([Finding("Saúde", "vacina", 4, "2026-10-16-do1-3", "PORTARIA Nº 1", "MINISTÉRIO DA SAÚDE",
+                          "… compra de vacina …")], "2026-10-16")
+
+    assert len(store.query()) == 3
+    assert store.query(start_date="2026-10-16")["Página"].tolist() == [4, 2]
+    assert store.query(sections=["do3"])["Edição"].tolist() == ["2026-10-16"]
+    assert store.query(end_date="2026-10-15", sections=["do1"])["Termo"].tolist() == ["contrato"]
+
+    report_path = store.export_excel(str(tmp_path / "search_report.xlsx"), start_date="2026-10-16", sections=["do1"])
+    exported = pd.read_excel(report_path)
+    assert exported[["Setor", "Termo", "Página", "Ato", "Órgão"]].values.tolist() == [
+        ["Saúde", "vacina", 4, "2026-10-16-do1-3", "MINISTÉRIO DA SAÚDE"],
+    ]
+
+
+def test_database_from_before_acts_is_migrated(tmp_path):
+    db_path = str(tmp_path / "report.sqlite")
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.executescript("""
+            CREATE TABLE findings (
+                id INTEGER PRIMARY KEY, edition_date TEXT NOT NULL, section TEXT NOT NULL,
+                setor TEXT NOT NULL DEFAULT '', termo TEXT NOT NULL, pagina INTEGER NOT NULL,
+                run_id TEXT NOT NULL, timestamp TEXT NOT NULL,
+                UNIQUE (edition_date, section, setor, termo, pagina)
+            );
+            INSERT INTO findings (edition_date, section, setor, termo, pagina, run_id, timestamp)
+            VALUES ('2026-10-15', 'do1', 'Compras', 'contrato', 1, 'antiga', '2026-10-15 08:00:00');
+        """)
+
+    store = ReportStore(db_path)
+    # A linha antiga fica com o ato vazio; o mesmo termo na mesma página em outro ato é uma nova ocorrência
+    assert store.append([Finding("Compras", "contrato", 1), Finding("Compras", "contrato", 1, "ato-2")],
+                        "2026-10-15") == 1
+    report = store.query()
+    assert report["Ato"].tolist() == ["", "ato-2"]
+    assert report["Timestamp"][0] == "2026-10-15 08:00:00"
+    # Abrir de novo não repete a migração
+    assert len(ReportStore(db_path).query()) == 2
+
+
+def _append_edition(db_path, edition_date, start):
+    store = ReportStore(db_path, timeout=30)
+    for page in range(20):
+        store.append([Finding("Compras", "contrato", page + 1)], edition_date, run_id=f"run-{start}")
+
+
+def test_overlapping_runs_append_to_the_same_database(tmp_path):
+    db_path = str(tmp_path / "report.sqlite")
+    ReportStore(db_path)
+    context = multiprocessing.get_context("fork")
+    runs = [context.Process(target=_append_edition, args=(db_path, "2026-10-16", run)) for run in range(3)]
+    for run in runs:
+        run.start()
+    for run in runs:
+        run.join(60)
+    assert [run.exitcode for run in runs] == [0, 0, 0]
+    # As três execuções gravam as mesmas 20 ocorrências: nenhuma falha de bloqueio, nenhuma duplicata
+    assert ReportStore(db_path).query()["Página"].tolist() == list(range(1, 21))
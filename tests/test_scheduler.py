@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta
+
+import scheduler
+from edition_cache import EditionCache
+from report_store import ReportStore
+from scheduler import DailyScheduler
+from term_matcher import TermMatcher
+
+FRIDAY = date(2026, 10, 16)
+
+
+class _Clock:
+    """Relógio que avança 10 minutos a cada consulta."""
+
+    def __init__(self):
+        self.now = datetime(2026, 10, 16, 6, 0)
+
+    def __call__(self):
+        self.now += timedelta(minutes=10)
+        return self.now
+
+
+class _Fetcher:
+    def __init__(self, available_after=0):
+        self.available_after = available_after
+        self.checks = 0
+
+    def resolve_pdf_url(self, edition_date, section="do1"):
+        self.checks += 1
+        return "https://dou.test/edicao.pdf" if self.checks > self.available_after else None
+
+
+class _Metrics:
+    def stage(self, name):
+        return _Stage()
+
+
+class _Stage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **kwargs):
+        pass
+
+
+def _scheduler(tmp_path, fetcher, monkeypatch, matchers, results):
+    monkeypatch.setattr(scheduler, "RunMetrics", lambda: _Metrics())
+    loads = iter(matchers)
+    monkeypatch.setattr(scheduler, "load_matcher", lambda drive_service: next(loads, matchers[-1]))
+    calls = []
+
+    def process_edition(edition_date, matcher, github_uploader, edition_cache=None, **kwargs):
+        calls.append(edition_date)
+        # Simula o PDF obtido e guardado no cache pelo pipeline
+        pdf_path = tmp_path / "edicao.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+        edition_cache.store_pdf(str(pdf_path), edition_date)
+        return results.pop(0)
+
+    monkeypatch.setattr(scheduler, "process_edition", process_edition)
+    daily = DailyScheduler(
+        poll_interval=0, deadline_hours=1, fetcher=fetcher, edition_cache=EditionCache(str(tmp_path / "cache")),
+        store=ReportStore(str(tmp_path / "report.sqlite")), text_index=object(), drive_service=object(),
+        github_uploader=object(), clock=_Clock(),
+    )
+    return daily, calls
+
+
+def test_processes_once_the_edition_is_published(tmp_path, monkeypatch):
+    fetcher = _Fetcher(available_after=2)
+    daily, calls = _scheduler(tmp_path, fetcher, monkeypatch, [TermMatcher([(None, "contrato")])], [True])
+    assert daily.run_day(FRIDAY) is True
+    assert calls == [FRIDAY] and fetcher.checks == 3
+    # A edição fica marcada e não é procurada de novo no mesmo dia
+    assert daily.run_day(FRIDAY) is True and fetcher.checks == 3
+
+
+def test_weekend_is_skipped(tmp_path, monkeypatch):
+    fetcher = _Fetcher()
+    daily, calls = _scheduler(tmp_path, fetcher, monkeypatch, [TermMatcher([(None, "contrato")])], [])
+    assert daily.run_day(FRIDAY + timedelta(days=1)) is False
+    assert fetcher.checks == 0 and calls == []
+
+
+def test_fetched_edition_not_recorded_is_not_retried(tmp_path, monkeypatch):
+    fetcher = _Fetcher()
+    daily, calls = _scheduler(tmp_path, fetcher, monkeypatch, [TermMatcher([(None, "contrato")])], [False, True])
+    assert daily.run_day(FRIDAY) is False
+    assert calls == [FRIDAY]
+
+
+def test_waits_for_the_terms_sheet(tmp_path, monkeypatch):
+    fetcher = _Fetcher()
+    matcher = TermMatcher([(None, "contrato")])
+    daily, calls = _scheduler(tmp_path, fetcher, monkeypatch, [None, None, matcher], [True])
+    assert daily.run_day(FRIDAY) is True
+    assert daily.matcher is matcher and calls == [FRIDAY]
+
+
+def test_gives_up_without_terms_sheet(tmp_path, monkeypatch):
+    fetcher = _Fetcher()
+    daily, calls = _scheduler(tmp_path, fetcher, monkeypatch, [None], [])
+    assert daily.run_day(FRIDAY) is False
+    assert calls == [] and fetcher.checks == 0
@@ -0,0 +1,63 @@
+import pytest
+
+from term_expressions import (
+    AND, NEAR, NOT, OR, REGEX, TERM, TermSyntaxError, is_expression, parse_expression, to_fts_query,
+)
+from term_matcher import TermMatcher
+from text_utils import normalize_text
+
+
+def _rules_found(rules, text):
+    matcher = TermMatcher([(None, rule) for rule in rules])
+    return [matcher.entries[entry_id][1] for entry_id in matcher.find_entries(normalize_text(text))]
+
+
+def test_operator_precedence_and_normalized_terms():
+    a, b, c = (TERM, "a", "a"), (TERM, "b", "b"), (TERM, "c", "c")
+    assert parse_expression('"a" OR "b" AND "c"') == (OR, (a, (AND, (b, c))))
+    assert parse_expression('("a" OR "b") and "c"') == (AND, ((OR, (a, b)), c))
+    assert parse_expression('"a" AND NOT "b" NEAR/2 "c"') == (AND, (a, (NOT, (NEAR, b, c, 2))))
+    assert parse_expression('"Revogação \\"total\\""') == (TERM, 'revogacao "total"', 'Revogação "total"')
+    # O hífen literal de uma expressão regular fica opcional, como no texto normalizado
+    assert parse_expression(r"re:2026-\d+") == (REGEX, r"2026-?\d+")
+    assert is_expression('NOT "a" AND "b"') and is_expression("re:x") and not is_expression("Nota técnica")
+
+
+@pytest.mark.parametrize("term, message", [
+    ('"pregão', "aspas sem fechamento"),
+    ('"a" "b"', "operador esperado"),
+    ('"a" AND', "expressão incompleta"),
+    ('("a" OR "b"', "parêntese sem fechamento"),
+    ('NOT "a"', "ao menos um termo"),
+    ('"a" NEAR/3 ("b" OR NOT "c")', "NEAR não aceita NOT"),
+    ('"a" NEAR/3 NOT "b"', "termo esperado antes de NOT"),
+    ('"a" AND pregão', "texto fora de aspas"),
+    ("re:(a", "expressão regular inválida"),
+    ("re:a*", "aceita texto vazio"),
+])
+def test_invalid_expressions(term, message):
+    with pytest.raises(TermSyntaxError, match=message):
+        parse_expression(term)
+
+
+def test_rules_are_evaluated_within_the_text():
+    rules = [
+        '("dispensa" OR "inexigibilidade") AND NOT "revogação"',
+        '"cnpj" NEAR/2 "contrato"',
+        r're:"\d{5}\.\d{6}/\d{4}-\d{2}" AND "processo"',
+    ]
+    assert _rules_found(rules, "Dispensa de licitação") == [rules[0]]
+    assert _rules_found(rules, "Revogação da dispensa") == []
+    assert _rules_found(rules, "CNPJ do novo contrato") == [rules[1]]
+    assert _rules_found(rules, "CNPJ da empresa vencedora do contrato") == []
+    assert _rules_found(rules, "Processo 25000.123456/2026-11") == [rules[2]]
+    assert _rules_found(rules, "Processo 25000.123456/202611") == [rules[2]]
+    assert _rules_found(rules, "Protocolo 25000.123456/2026-11") == []
+
+
+def test_fts_translation():
+    assert to_fts_query(parse_expression('"Pregão" AND NOT "revogação"')) == '("pregao") NOT "revogacao"'
+    assert to_fts_query(parse_expression('"cnpj" NEAR/5 "contrato"')) == 'NEAR("cnpj" "contrato", 5)'
+    assert to_fts_query(parse_expression('"a" OR "b"')) == '("a" OR "b")'
+    # Expressões regulares não têm equivalente no índice
+    assert to_fts_query(parse_expression(r're:"\d{5}" OR "a"')) is None
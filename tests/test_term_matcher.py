@@ -0,0 +1,75 @@
+import random
+
+from term_matcher import TermMatcher
+from text_utils import is_word_boundary, normalize_text
+
+
+def _entries_found(matcher, text):
+    return [matcher.entries[entry_id][1] for entry_id in matcher.find_entries(normalize_text(text))]
+
+
+def test_regex_rows_matching_the_same_text():
+    matcher = TermMatcher([
+        ("A", "processo"),
+        ("B", r"re:\d{5}"),
+        ("C", "contrato"),
+        ("D", r're:"\d+"'),
+    ])
+    found = _entries_found(matcher, "Processo 12345 do contrato")
+    assert found == ["processo", r"re:\d{5}", "contrato", r're:"\d+"']
+
+    text = normalize_text("Processo 12345 do contrato")
+    findings = matcher.span_findings(text, matcher.match_spans(text), 1)
+    spans = {finding.term: finding_spans for finding, finding_spans in findings}
+    assert spans[r"re:\d{5}"] == spans[r're:"\d+"'] == [(9, 14)]
+
+
+def test_regex_with_backreference():
+    matcher = TermMatcher([("A", r"re:(\d)\1"), ("B", r"re:\d{3}")])
+    assert _entries_found(matcher, "Lote 455") == [r"re:(\d)\1", r"re:\d{3}"]
+    assert _entries_found(matcher, "Lote 456") == [r"re:\d{3}"]
+
+
+def test_literal_cells_that_look_like_expressions():
+    matcher = TermMatcher([
+        ("A", "(FNDE)"),
+        ("B", '"Pregão'),
+        ("C", "NOT aplicável"),
+        ("D", '"pregão" AND "fnde"'),
+    ])
+    assert len(matcher.entries) == 4
+    assert _entries_found(matcher, "Recursos do (FNDE) para o pregão") == ["(FNDE)", '"pregão" AND "fnde"']
+    assert _entries_found(matcher, "Item NOT aplicável") == ["NOT aplicável"]
+
+
+def _naive_spans(pattern, text):
+    # Busca de antes do autômato: cada termo procurado no texto, inclusive sobreposto
+    spans = []
+    start = text.find(pattern)
+    while start >= 0:
+        spans.append((start, start + len(pattern)))
+        start = text.find(pattern, start + 1)
+    return spans
+
+
+def test_automaton_matches_the_per_term_search():
+    rng = random.Random(2026)
+    # Vocabulário com prefixos, sufixos e sobreposições ("ana", "banana", "nana") e acentos
+    vocabulary = ["ana", "banana", "nana", "ação", "licitação", "contrato", "contratação", "Saúde", "de", "a"]
+    terms = [(f"Setor {i}", term) for i, term in enumerate(vocabulary + ["bana", "ção de", "ANA", "ana"])]
+    for whole_words in (False, True):
+        matcher = TermMatcher(terms, whole_words=whole_words)
+        for _ in range(200):
+            text = normalize_text(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 12))))
+            expected_entries = []
+            for entry_id, (_, term) in enumerate(matcher.entries):
+                pattern = normalize_text(term)
+                spans = [
+                    (start, end) for start, end in _naive_spans(pattern, text)
+                    if not whole_words or is_word_boundary(text, start, end)
+                ]
+                if spans:
+                    expected_entries.append(entry_id)
+                    pattern_id = matcher._pattern_ids[pattern]
+                    assert matcher.match_spans(text)[pattern_id] == spans
+            assert matcher.find_entries(text) == expected_entries, text
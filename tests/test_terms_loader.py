@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+import pytest
+
+import terms_loader
+from terms_loader import load_terms_matcher
+
+
+class _Request:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def execute(self):
+        if self.drive.metadata is None:
+            raise ConnectionError("Drive indisponível")
+        return self.drive.metadata
+
+
+class _Files:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def get(self, **kwargs):
+        return _Request(self.drive)
+
+
+class _Drive:
+    """GoogleDriveService mínimo: metadados da planilha e download do Excel."""
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.metadata = {"md5Checksum": "aaa", "modifiedTime": "2026-10-16T10:00:00Z"}
+        self.downloads = 0
+        self.service = self
+
+    def files(self):
+        return _Files(self)
+
+    def download_file(self, file_id, dest_path):
+        self.downloads += 1
+        pd.DataFrame(self.terms, columns=["Setor", "Termo"]).to_excel(dest_path, index=False)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def _fresh_process(monkeypatch):
+    monkeypatch.setattr(terms_loader, "_loaded", {})
+
+
+def _artifacts(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".pickle"))
+
+
+def test_unchanged_spreadsheet_reuses_the_compiled_matcher(tmp_path):
+    drive = _Drive([("Compras", "licitação")])
+    cache_dir = str(tmp_path / "terms")
+
+    matcher = load_terms_matcher(drive, "planilha", cache_dir)
+    assert drive.downloads == 1 and matcher.entries == [("Compras", "licitação")]
+    # Outro processo (sem os matchers já carregados) lê o pickle em vez de baixar o Excel
+    terms_loader._loaded.clear()
+    assert load_terms_matcher(drive, "planilha", cache_dir).version == matcher.version
+    assert drive.downloads == 1
+    prefix = f"matcher_v{terms_loader.MATCHER_FORMAT}_{terms_loader.matcher_code_hash()}_"
+    assert _artifacts(cache_dir) == [f"{prefix}aaa.pickle"]
+
+
+def test_changed_spreadsheet_or_matcher_code_invalidates_the_artifact(monkeypatch, tmp_path):
+    drive = _Drive([("Compras", "licitação")])
+    cache_dir = str(tmp_path / "terms")
+    load_terms_matcher(drive, "planilha", cache_dir)
+
+    drive.terms = [("Compras", "licitação"), ("Obras", "contrato")]
+    drive.metadata = {"md5Checksum": "bbb", "modifiedTime": "2026-10-17T10:00:00Z"}
+    assert len(load_terms_matcher(drive, "planilha", cache_dir).entries) == 2
+    assert drive.downloads == 2
+    assert [name.rsplit("_", 1)[-1] for name in _artifacts(cache_dir)] == ["bbb.pickle"]
+
+    # Mesmo checksum, código do matcher diferente: o pickle antigo não é usado
+    monkeypatch.setattr(terms_loader, "matcher_code_hash", lambda: "outrocodigo1")
+    terms_loader._loaded.clear()
+    load_terms_matcher(drive, "planilha", cache_dir)
+    assert drive.downloads == 3
+    assert _artifacts(cache_dir) == [f"matcher_v{terms_loader.MATCHER_FORMAT}_outrocodigo1_bbb.pickle"]
+
+
+def test_metadata_failure_falls_back_to_the_last_matcher(tmp_path):
+    drive = _Drive([("Compras", "licitação")])
+    cache_dir = str(tmp_path / "terms")
+    matcher = load_terms_matcher(drive, "planilha", cache_dir)
+
+    drive.metadata = None
+    assert load_terms_matcher(drive, "planilha", cache_dir).version == matcher.version
+    assert drive.downloads == 1
+    # Sem artefato compatível não há como obter os termos
+    assert load_terms_matcher(drive, "planilha", str(tmp_path / "vazio")) is None
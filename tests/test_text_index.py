@@ -0,0 +1,62 @@
+from act_segmenter import ActSegment
+from pdf_utils import PageContent
+from term_expressions import parse_expression, to_fts_query
+from text_index import QUERY_PHRASE, QUERY_PREFIX, QUERY_RAW, TextIndex
+
+
+def _page(number, text):
+    words = [(0, 0, 1, 1, word, 0, 0, i) for i, word in enumerate(text.split())]
+    return PageContent(number, text, words)
+
+
+def test_hyphenated_term_in_expression(tmp_path):
+    text_index = TextIndex(str(tmp_path / "text.sqlite"))
+    text_index.index_edition([_page(1, "Portaria nº 2026-12 do Ministério da Saúde")], "2026-10-16")
+
+    query = to_fts_query(parse_expression('"2026-12" AND "ministerio da saúde"'))
+    assert query == '("2026-12" AND "ministerio da saude")'
+    assert text_index.term_history(query, QUERY_RAW)["hits"] == 1
+
+    query = to_fts_query(parse_expression('"Portaria" NEAR/2 "2026-12"'))
+    assert text_index.term_history(query, QUERY_RAW)["hits"] == 1
+
+
+def test_search_modes_filters_and_act_metadata(tmp_path):
+    text_index = TextIndex(str(tmp_path / "text.sqlite"))
+    words = [(0, 0, 1, 1, word, 0, 0, i) for i, word in enumerate(
+        "MINISTÉRIO DA SAÚDE PORTARIA Nº 1 Aprova a licita- ção de obras".split()
+    )]
+    acts = [ActSegment("2026-10-15-do1-1", 0, len(words), "MINISTÉRIO DA SAÚDE", "PORTARIA Nº 1")]
+    text_index.index_edition([PageContent(3, "", words, acts)], "2026-10-15")
+    text_index.index_edition([_page(1, "Pregão eletrônico para licitação de obras")], "2026-10-16", "do3")
+
+    # Sem acentos e com a hifenização desfeita; as edições mais recentes vêm primeiro
+    results = text_index.search("licitacao")
+    assert [(row["edition_date"], row["section"], row["page"]) for row in results] == [
+        ("2026-10-16", "do3", 1), ("2026-10-15", "do1", 3),
+    ]
+    assert results[1]["act_id"] == "2026-10-15-do1-1" and results[1]["title"] == "PORTARIA Nº 1"
+    assert "[licitação]" in results[1]["snippet"]
+    assert [row["page"] for row in text_index.search("licitação", sections=["do1"])] == [3]
+    assert text_index.search("licitação", end_date="2026-10-15")[0]["edition_date"] == "2026-10-15"
+    assert len(text_index.search("pregao eletronico", QUERY_PHRASE)) == 1
+    assert len(text_index.search("eletronico pregao", QUERY_PHRASE)) == 0
+    assert len(text_index.search("licit", QUERY_PREFIX)) == 2
+    # Palavras inteiras: um pedaço de palavra só é encontrado como prefixo
+    assert text_index.search("licit") == []
+    assert text_index.term_history("licitação") == {
+        "hits": 2, "editions": 2, "first": "2026-10-15", "last": "2026-10-16",
+    }
+
+
+def test_reindexing_an_edition_replaces_its_text(tmp_path):
+    text_index = TextIndex(str(tmp_path / "text.sqlite"))
+    text_index.index_edition([_page(1, "Aviso de licitação")], "2026-10-16", sha256="a")
+    assert text_index.is_indexed("2026-10-16", sha256="a")
+    assert not text_index.is_indexed("2026-10-16", sha256="b")
+    assert not text_index.is_indexed("2026-10-16", "do2")
+
+    text_index.index_edition([_page(1, "Extrato de contrato"), _page(2, "Outro contrato")], "2026-10-16", sha256="b")
+    assert text_index.search("licitação") == []
+    assert text_index.term_history("contrato")["hits"] == 2
+    assert text_index.is_indexed("2026-10-16", sha256="b")
@@ -0,0 +1,40 @@
+from term_matcher import TermMatcher
+from text_utils import build_word_index, fold_text, is_word_boundary, join_words, normalize_text
+
+
+def _words(*tokens):
+    return [(0, 0, 1, 1, token, 0, 0, i) for i, token in enumerate(tokens)]
+
+
+def test_fold_and_normalize_ignore_accents_case_and_hyphenation():
+    assert fold_text("AÇÃO Pública") == "acao publica"
+    assert fold_text("ação") == fold_text("acao") == "acao"
+    # fold_text não mexe em hífens nem espaços; normalize_text junta a palavra e colapsa os espaços
+    assert fold_text("licita-\nção") == "licita-\ncao"
+    assert normalize_text("licita-\nção") == normalize_text("licitação") == "licitacao"
+    assert normalize_text("licita­ção  de\n obras") == "licitacao de obras"
+    assert normalize_text("  Pregão   Eletrônico\n") == "pregao eletronico"
+
+
+def test_join_words_undoes_line_hyphenation_only():
+    assert join_words(_words("Aviso", "de", "licita-", "ção", "nº", "5")) == "Aviso de licitação nº 5"
+    # Um hífen isolado é palavra, não hifenização
+    assert join_words(_words("2026", "-", "DOU")) == "2026 - DOU"
+    text, starts, ends = build_word_index(_words("Aviso", "de", "licita-", "ção"))
+    assert text == "aviso de licitacao"
+    assert [text[start:end] for start, end in zip(starts, ends)] == ["aviso", "de", "licita", "cao"]
+
+
+def test_whole_words_rejects_partial_words():
+    assert is_word_boundary("acao civil", 0, 4)
+    assert not is_word_boundary("transacao civil", 5, 9)
+
+    text = normalize_text("Transação sem licitação; nova ação civil")
+    assert text == "transacao sem licitacao; nova acao civil"
+    partial = TermMatcher([("Jurídico", "ação")])
+    whole = TermMatcher([("Jurídico", "ação")], whole_words=True)
+    # "transacao" e "licitacao" contêm "acao", mas só a palavra inteira vale com whole_words
+    assert [start for spans in partial.match_spans(text).values() for start, _ in spans] == [5, 19, 30]
+    assert list(whole.match_spans(text).values()) == [[(30, 34)]]
+    assert partial.find_entries(text) and whole.find_entries(text)
+    assert not whole.find_entries(normalize_text("Transação sem licitação"))
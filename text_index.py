@@ -0,0 +1,330 @@
+"""
+Índice de texto completo (SQLite FTS5) das edições já processadas.
+
+Uso: python text_index.py search "pregão eletrônico" [--phrase | --prefix | --raw]
+                                 [--start 2024-01-01] [--end 2026-12-31] [--sections do1] [--limit 20]
+     python text_index.py terms termos.xlsx [--start ...] [--end ...]
+     python text_index.py index-cache
+
+Cada trecho de ato de cada página vira uma linha com data, seção, página,
+ato, título e órgão, e o texto é indexado sem acentos e sem diferenciar
+maiúsculas. A busca responde em milissegundos sem baixar nem abrir PDFs:
+`search` lista as ocorrências mais recentes primeiro, `terms` mostra, para
+cada termo de uma planilha, quantas vezes e quando apareceu pela última vez,
+e `index-cache` indexa as edições guardadas no cache de edições.
+
+Os termos são procurados como palavras inteiras (ou prefixos, com --prefix),
+enquanto o matcher da coleta diária também encontra trechos de palavras.
+Expressões da planilha (AND, OR, NOT, NEAR/n) são traduzidas para o FTS5;
+as que usam expressões regulares não têm equivalente no índice.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+from text_utils import join_words
+
+# Banco SQLite do índice; fica junto do histórico de ocorrências e não é apagado pela limpeza de cada execução
+TEXT_INDEX_PATH = os.getenv("TEXT_INDEX_PATH", os.path.join("Reports", "dou_text.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    edition_date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    act_id TEXT,
+    title TEXT,
+    organ TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_edition ON segments (edition_date, section);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, title, organ,
+    content='segments', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='3'
+);
+CREATE TABLE IF NOT EXISTS indexed_editions (
+    edition_date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    sha256 TEXT NOT NULL DEFAULT '',
+    segments INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL,
+    PRIMARY KEY (edition_date, section)
+);
+"""
+
+# Modos de consulta aceitos por fts_query
+QUERY_TERMS = "terms"
+QUERY_PHRASE = "phrase"
+QUERY_PREFIX = "prefix"
+QUERY_RAW = "raw"
+
+
+def _quote(token):
+    return '"' + token.replace('"', '""') + '"'
+
+
+def fts_query(text, mode=QUERY_TERMS):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5: todas as palavras
+    (QUERY_TERMS), a frase exata (QUERY_PHRASE), palavras iniciadas pelo texto
+    (QUERY_PREFIX) ou a sintaxe do FTS5 sem alterações (QUERY_RAW, com AND/OR/NEAR).
+    """
+    if mode == QUERY_RAW:
+        return text
+    tokens = text.split()
+    if not tokens:
+        raise ValueError("Consulta vazia")
+    if mode == QUERY_PHRASE:
+        return _quote(" ".join(tokens))
+    if mode == QUERY_PREFIX:
+        return " ".join(_quote(token) + "*" for token in tokens)
+    return " ".join(_quote(token) for token in tokens)
+
+
+class TextIndex:
+    """
+    Texto das edições em uma tabela comum (datas, páginas e atos) com um índice
+    FTS5 de conteúdo externo, de modo que o texto é guardado uma única vez.
+    Como no ReportStore, o modo WAL e o timeout de bloqueio permitem gravações
+    de execuções sobrepostas (ex.: backfill com várias edições simultâneas).
+    """
+
+    def __init__(self, db_path=TEXT_INDEX_PATH, timeout=60):
+        self.db_path = db_path
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def is_indexed(self, edition_date, section="do1", sha256=None):
+        """Indica se a edição já está no índice (com o mesmo PDF, quando `sha256` é informado)."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT sha256 FROM indexed_editions WHERE edition_date = ? AND section = ?",
+                (edition_date, section),
+            ).fetchone()
+        return row is not None and (sha256 is None or row[0] == sha256)
+
+    @staticmethod
+    def _rows(pages, edition_date, section):
+        for page in pages:
+            if not page.words:
+                continue
+            # Páginas sem divisão em atos entram como um único trecho
+            segments = page.acts or [(None, 0, len(page.words), None, None)]
+            for act_id, start, end, organ, title in segments:
+                text = join_words(page.words[start:end])
+                if text:
+                    yield edition_date, section, page.number, act_id, title, organ, text
+
+    def index_edition(self, pages, edition_date, section="do1", sha256=""):
+        """
+        Substitui no índice o texto da edição pelo das páginas informadas
+        (PageContent com palavras e atos, como as do cache de edições).
+        Retorna o número de trechos indexados.
+        """
+        rows = list(self._rows(pages, edition_date, section))
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Com conteúdo externo, as linhas antigas saem do índice pelo comando 'delete' do FTS5
+                conn.execute(
+                    "INSERT INTO segments_fts (segments_fts, rowid, text, title, organ) "
+                    "SELECT 'delete', id, text, title, organ FROM segments WHERE edition_date = ? AND section = ?",
+                    (edition_date, section),
+                )
+                conn.execute("DELETE FROM segments WHERE edition_date = ? AND section = ?", (edition_date, section))
+                first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM segments").fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO segments (id, edition_date, section, page, act_id, title, organ, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(first_id + i, *row) for i, row in enumerate(rows)],
+                )
+                conn.execute(
+                    "INSERT INTO segments_fts (rowid, text, title, organ) "
+                    "SELECT id, text, title, organ FROM segments WHERE id >= ?",
+                    (first_id,),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO indexed_editions (edition_date, section, sha256, segments, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (edition_date, section, sha256, len(rows), timestamp),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logging.info(f"{len(rows)} trechos da edição {edition_date} {section} indexados em {self.db_path}")
+        return len(rows)
+
+    @staticmethod
+    def _filters(start_date, end_date, sections):
+        clauses = []
+        params = []
+        if start_date:
+            clauses.append("s.edition_date >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("s.edition_date <= ?")
+            params.append(end_date)
+        if sections:
+            clauses.append(f"s.section IN ({', '.join('?' * len(sections))})")
+            params.extend(sections)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def search(self, query, mode=QUERY_TERMS, start_date=None, end_date=None, sections=None, limit=20):
+        """
+        Retorna as ocorrências mais recentes como dicionários com data, seção,
+        página, ato, título, órgão e um trecho com os termos entre colchetes.
+        """
+        where, params = self._filters(start_date, end_date, sections)
+        sql = (
+            "SELECT s.edition_date, s.section, s.page, s.act_id, s.title, s.organ, "
+            "snippet(segments_fts, 0, '[', ']', '…', 16) "
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+            f"WHERE segments_fts MATCH ?{where} "
+            "ORDER BY s.edition_date DESC, s.section, s.page LIMIT ?"
+        )
+        columns = ("edition_date", "section", "page", "act_id", "title", "organ", "snippet")
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, [fts_query(query, mode), *params, limit]).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def term_history(self, query, mode=QUERY_PHRASE, start_date=None, end_date=None, sections=None):
+        """Retorna {hits, editions, first, last}: trechos e edições com o termo e as datas extremas."""
+        where, params = self._filters(start_date, end_date, sections)
+        sql = (
+            "SELECT COUNT(*), COUNT(DISTINCT s.edition_date || s.section), MIN(s.edition_date), MAX(s.edition_date) "
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+            f"WHERE segments_fts MATCH ?{where}"
+        )
+        with closing(self._connect()) as conn:
+            hits, editions, first, last = conn.execute(sql, [fts_query(query, mode), *params]).fetchone()
+        return {"hits": hits, "editions": editions, "first": first, "last": last}
+
+
+def index_cached_edition(text_index, edition_cache, pdf_path, edition_date, section="do1", pages=None, workers=None):
+    """
+    Indexa uma edição do cache de edições, lendo o arquivo auxiliar (ou extraindo o
+    PDF uma única vez), a menos que as páginas já lidas sejam informadas em `pages`.
+    Edições já indexadas com o mesmo PDF são puladas; retorna o número de trechos indexados.
+    """
+    from edition_cache import file_sha256
+
+    sha256 = file_sha256(pdf_path)
+    if text_index.is_indexed(edition_date.isoformat(), section, sha256):
+        logging.info(f"Edição {edition_date} {section} já indexada")
+        return 0
+    if pages is None:
+        pages = edition_cache.iter_pages(pdf_path, workers=workers)
+    return text_index.index_edition(pages, edition_date.isoformat(), section, sha256=sha256)
+
+
+def _print_results(results):
+    for row in results:
+        act = f" ato {row['act_id']}" if row["act_id"] else ""
+        title = f" {row['title']}" if row["title"] else ""
+        print(f"{row['edition_date']} {row['section']} p.{row['page']}{act}{title}")
+        print(f"    {row['snippet']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=TEXT_INDEX_PATH, help="banco do índice (padrão: TEXT_INDEX_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="procura um termo, frase ou prefixo")
+    search.add_argument("query")
+    mode = search.add_mutually_exclusive_group()
+    mode.add_argument("--phrase", dest="mode", action="store_const", const=QUERY_PHRASE, help="frase exata")
+    mode.add_argument("--prefix", dest="mode", action="store_const", const=QUERY_PREFIX,
+                      help="palavras que começam com o texto (ex.: licit)")
+    mode.add_argument("--raw", dest="mode", action="store_const", const=QUERY_RAW,
+                      help="sintaxe do FTS5 (AND, OR, NOT, NEAR)")
+    search.add_argument("--limit", type=int, default=20)
+
+    terms = commands.add_parser("terms", help="histórico de cada termo de uma planilha (coluna 'Termo')")
+    terms.add_argument("terms_path")
+
+    for command in (search, terms):
+        command.add_argument("--start", type=date.fromisoformat, help="data inicial (AAAA-MM-DD)")
+        command.add_argument("--end", type=date.fromisoformat, help="data final (AAAA-MM-DD)")
+        command.add_argument("--sections", help="seções separadas por vírgula (do1,do2,do3)")
+
+    commands.add_parser("index-cache", help="indexa as edições guardadas no cache de edições")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    text_index = TextIndex(args.db)
+
+    if args.command == "index-cache":
+        from edition_cache import EditionCache
+
+        edition_cache = EditionCache()
+        total = 0
+        for edition_date, section, pdf_path in edition_cache.iter_editions():
+            total += index_cached_edition(text_index, edition_cache, pdf_path, edition_date, section)
+        logging.info(f"{total} trechos indexados")
+        return 0
+
+    start = args.start.isoformat() if args.start else None
+    end = args.end.isoformat() if args.end else None
+    sections = args.sections.split(",") if args.sections else None
+    entries = []
+    if args.command == "terms":
+        import pandas as pd
+
+        from term_expressions import TermSyntaxError, is_expression, parse_expression, to_fts_query
+        from term_matcher import TermMatcher
+
+        entries = TermMatcher.from_dataframe(pd.read_excel(args.terms_path)).entries
+    started = time.perf_counter()
+    try:
+        if args.command == "search":
+            results = text_index.search(args.query, args.mode or QUERY_TERMS, start, end, sections, args.limit)
+            _print_results(results)
+            summary = f"{len(results)} resultado(s)"
+        else:
+            for sector, term in entries:
+                try:
+                    node = parse_expression(term) if is_expression(term) else None
+                except TermSyntaxError:
+                    node = None  # como no matcher, a célula é procurada literalmente
+                if node:
+                    # Expressões da planilha viram a consulta equivalente do FTS5, quando existe
+                    query = to_fts_query(node)
+                    if query is None:
+                        print(f"{sector or '-'}\t{term}\tsem equivalente no índice (expressão regular ou NOT isolado)")
+                        continue
+                    history = text_index.term_history(query, QUERY_RAW, start, end, sections)
+                else:
+                    history = text_index.term_history(str(term), QUERY_PHRASE, start, end, sections)
+                last = history["last"] or "nunca"
+                print(f"{sector or '-'}\t{term}\t{history['hits']} trecho(s) em {history['editions']} edição(ões)"
+                      f"\túltima: {last}")
+            summary = f"{len(entries)} termo(s)"
+    except sqlite3.OperationalError as e:
+        # Erros de sintaxe da consulta (ex.: aspas sem fechamento em --raw)
+        logging.error(f"Consulta inválida: {e}")
+        return 2
+    print(f"{summary} em {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
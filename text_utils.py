@@ -0,0 +1,91 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Marcas diacríticas combinantes que sobram após a decomposição NFKD
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+# Hífen entre letras/dígitos, inclusive na quebra de linha ("licita-\nção")
+_HYPHEN = re.compile(r"(?<=\w)[-\u00ad]\s*(?=\w)")
+_SOFT_HYPHEN = re.compile("\u00ad")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fold_text(text):
+    """Remove acentos (NFKD) e converte para minúsculas sem alterar o restante do texto."""
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text)).casefold()
+
+
+def normalize_text(text):
+    """
+    Normaliza um texto para comparação: junta palavras hifenizadas, remove
+    acentos, ignora maiúsculas/minúsculas e colapsa espaços e quebras de linha.
+    A mesma função é aplicada aos termos da planilha e ao texto das páginas.
+    """
+    text = _HYPHEN.sub("", text)
+    text = _SOFT_HYPHEN.sub("", text)
+    text = fold_text(text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def is_word_boundary(text, start, end):
+    """Indica se o trecho text[start:end] não está colado a outras letras ou dígitos."""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum():
+        return False
+    return True
+
+
+@lru_cache(maxsize=65536)
+def normalize_word(word):
+    """Normaliza uma palavra isolada (o vocabulário se repete muito, daí o cache)."""
+    return normalize_text(word)
+
+
+def build_word_index(words):
+    """
+    Monta o texto normalizado de uma página a partir das palavras extraídas pelo
+    PyMuPDF (`page.get_text("words")`), separadas por um espaço.
+    Palavras terminadas em hífen são unidas à seguinte. Retorna o texto e as
+    posições inicial e final de cada palavra nele, para mapear ocorrências de
+    volta às palavras.
+    """
+    parts = []
+    starts = []
+    ends = []
+    position = 0
+    joined = False
+    for word in words:
+        token = word[4]
+        hyphenated = token.endswith(("-", "\u00ad")) and len(token) > 1
+        if hyphenated:
+            token = token[:-1]
+        token = normalize_word(token)
+        if parts and not joined:
+            parts.append(" ")
+            position += 1
+        starts.append(position)
+        parts.append(token)
+        position += len(token)
+        ends.append(position)
+        joined = hyphenated
+    return "".join(parts), starts, ends
+
+
+def join_words(words):
+    """
+    Junta as palavras extraídas pelo PyMuPDF em um texto legível, sem normalizar:
+    palavras separadas por um espaço e hifenização de fim de linha desfeita.
+    """
+    parts = []
+    joined = False
+    for word in words:
+        token = word[4]
+        hyphenated = token.endswith(("-", "\u00ad")) and len(token) > 1
+        if hyphenated:
+            token = token[:-1]
+        if parts and not joined:
+            parts.append(" ")
+        parts.append(token)
+        joined = hyphenated
+    return "".join(parts)